@@ -0,0 +1,89 @@
+"""
+Benchmark for the columnar catalog against a list of product dicts.
+
+Reports memory per product and the time to filter (category substring,
+price range, artisan) and sort by price, for each representation. Run from
+the backend directory:
+
+    python -m benchmarks.catalog_columns --sizes 10000,100000,1000000
+"""
+
+import argparse
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.lib.catalog import Catalog
+
+from benchmarks.report import summarize_ms, write_report
+from benchmarks.workload import synthetic_products
+
+FILTERS = [
+    {"categories": ["pottery"], "min_price": 500, "max_price": 3000},
+    {"categories": ["textile", "jewel"], "max_price": 10000},
+    {"min_price": 1000, "max_price": 2000},
+    {"categories": ["wood"], "artisans": ["sharma"]},
+]
+
+
+def dict_filter(products, categories=None, min_price=None, max_price=None, artisans=None):
+    # The list-comprehension filters /recommend used before the facet index
+    rows = products
+    if categories:
+        rows = [p for p in rows if any(c in p["category"].lower() for c in categories)]
+    if min_price is not None or max_price is not None:
+        lo = min_price if min_price is not None else float("-inf")
+        hi = max_price if max_price is not None else float("inf")
+        rows = [p for p in rows if lo <= p["price"] <= hi]
+    if artisans:
+        rows = [p for p in rows if any(a in p["artisan"].lower() for a in artisans)]
+    return rows
+
+
+def measure_memory(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize_ms(samples)
+
+
+def bench(size: int, repeat: int) -> dict:
+    # Built through JSON-like copies so both sides own their strings
+    products, dict_bytes = measure_memory(lambda: [dict(p) for p in synthetic_products(size)])
+    catalog, catalog_bytes = measure_memory(lambda: Catalog(products))
+    return {
+        "products": size,
+        "dict_bytes_per_product": round(dict_bytes / size, 1),
+        "columnar_bytes_per_product": round(catalog_bytes / size, 1),
+        "dict_filter": timed(lambda: [dict_filter(products, **f) for f in FILTERS], repeat),
+        "columnar_filter": timed(lambda: [catalog.filter_rows(**f) for f in FILTERS], repeat),
+        "dict_sort": timed(lambda: sorted(products, key=lambda p: p["price"]), repeat),
+        "columnar_sort": timed(lambda: catalog.sort_rows(by="price"), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    results = [bench(int(size), args.repeat) for size in args.sizes.split(",")]
+    write_report("catalog_columns", vars(args), results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare two benchmark reports and flag latency/throughput regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.15
+
+Rows are matched on their identifying fields (products, engine, columnar,
+dim, concurrency). Exits with status 1 when any metric regresses by more than
+the threshold, so it can gate CI.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+KEY_FIELDS = ("products", "engine", "columnar", "dim", "mode", "concurrency")
+# metric path -> True when higher is better
+METRICS = {
+    "latency.p50_ms": False,
+    "latency.p95_ms": False,
+    "latency.p99_ms": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput_rps": True,
+    "build_s": False,
+    "peak_rss_mb": False,
+    "columnar_filter.p50_ms": False,
+    "columnar_sort.p50_ms": False,
+    "columnar_bytes_per_product": False,
+}
+
+
+def _get(row: dict, path: str):
+    value = row
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _key(row: dict) -> Tuple:
+    return tuple((field, row.get(field)) for field in KEY_FIELDS if field in row)
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[dict]:
+    base_rows: Dict[Tuple, dict] = {_key(row): row for row in baseline["results"]}
+    changes = []
+    for row in candidate["results"]:
+        base = base_rows.get(_key(row))
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = _get(base, metric), _get(row, metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old == 0:
+                continue
+            change = (new - old) / old
+            regressed = change < -threshold if higher_is_better else change > threshold
+            changes.append({"row": dict(_key(row)), "metric": metric, "baseline": old, "candidate": new,
+                            "change": round(change, 4), "regression": regressed})
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative change (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        sys.exit(f"Reports are from different benchmarks: {baseline.get('benchmark')} vs {candidate.get('benchmark')}")
+
+    changes = compare(baseline, candidate, args.threshold)
+    regressions = [c for c in changes if c["regression"]]
+    print(json.dumps({"compared": len(changes), "regressions": regressions}, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+HTTP load test for POST /recommend.
+
+Starts a local uvicorn instance serving a synthetic catalog (through
+CATALOG_PATH) and sweeps client concurrency, recording throughput, latency
+percentiles and errors per level. Pass --url to target a running server
+instead. Run from the backend directory:
+
+    python -m benchmarks.load_test --size 20000 --engine semantic --concurrency 1,8,32,64 --out load.json
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import json
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from benchmarks.report import summarize_ms, write_report
+from benchmarks.workload import query_mix, synthetic_products
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, catalog_path: str, engine: str, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "CATALOG_PATH": catalog_path, "RECOMMENDATION_ENGINE": engine, "LOG_LEVEL": "WARNING"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+
+
+def wait_ready(url: str, server: Optional[subprocess.Popen], timeout_s: float = 90) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited: {server.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} not ready after {timeout_s}s")
+
+
+async def run_level(url: str, prompts: List[str], concurrency: int, duration_s: float, k: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_prompt = 0
+    deadline = time.monotonic() + duration_s
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal next_prompt
+        while time.monotonic() < deadline:
+            prompt = prompts[next_prompt % len(prompts)]
+            next_prompt += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/recommend", json={"userPrompt": prompt, "maxResults": k})
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        started = time.monotonic()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    ok = statuses.get(200, 0)
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": sum(statuses.values()),
+        "throughput_rps": round(ok / elapsed, 1),
+        "error_rate": round(1 - ok / max(sum(statuses.values()), 1), 4),
+        "statuses": {str(code): count for code, count in statuses.items()},
+        "latency": summarize_ms(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--size", type=int, default=10000, help="synthetic catalog size for the local server")
+    parser.add_argument("--engine", default="keyword", choices=["keyword", "semantic"])
+    parser.add_argument("--port", type=int, default=9179)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--queries", type=int, default=500, help="distinct prompts in the query mix")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    catalog = synthetic_products(args.size)
+    prompts = query_mix(args.queries, catalog)
+    server = None
+    url = args.url
+    with tempfile.TemporaryDirectory() as tmp:
+        if url is None:
+            catalog_path = os.path.join(tmp, "catalog.json")
+            with open(catalog_path, "w") as f:
+                json.dump(catalog, f)
+            server = start_server(args.port, catalog_path, args.engine, args.workers)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(url, server)
+            # First request builds the indexes; keep it out of the measurements
+            httpx.post(f"{url}/recommend", json={"userPrompt": prompts[0], "maxResults": args.k}, timeout=120)
+            results = [
+                asyncio.run(run_level(url, prompts, int(level), args.duration, args.k))
+                for level in args.concurrency.split(",")
+            ]
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+    write_report("load_test", vars(args), results, args.out)
+
+
+if __name__ == "__main__":
+    main()
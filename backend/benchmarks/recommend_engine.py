@@ -0,0 +1,101 @@
+"""
+Engine-level benchmark for /recommend.
+
+For each catalog size and engine, measures index build time and memory,
+then per-query latency (prompt parsing, filters, scoring, ranking) over a
+realistic query mix. No server or Gemini calls are involved. Run from the
+backend directory:
+
+    python -m benchmarks.recommend_engine --sizes 1000,10000,100000 --out engine.json
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from data_types_class import RecommendationRequest
+from src.lib.catalog import Catalog
+from src.recommendation.facets import get_facet_index
+from src.recommendation.keyword import keyword_recommendations
+from src.recommendation.personalization import profile_for_request
+from src.recommendation.query_parser import get_query_parser
+from src.recommendation.semantic import get_index, semantic_recommendations
+
+from benchmarks.report import peak_rss_mb, summarize_ms, write_report
+from benchmarks.workload import query_mix, synthetic_products
+
+ENGINES = {"keyword": keyword_recommendations, "semantic": semantic_recommendations}
+
+
+def build(catalog: list, engine: str) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    get_facet_index(catalog)
+    get_query_parser(catalog)
+    if engine == "semantic":
+        get_index(catalog)
+    build_s = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"build_s": round(build_s, 3), "build_peak_mb": round(peak / 2 ** 20, 1)}
+
+
+def bench(size: int, engine: str, queries: int, k: int, history: int, columnar: bool, warmup: int = 5) -> dict:
+    catalog = Catalog(synthetic_products(size)) if columnar else synthetic_products(size)
+    result = {"products": size, "engine": engine, "columnar": columnar, **build(catalog, engine)}
+
+    rng = random.Random(3)
+    prompts = query_mix(queries + warmup, catalog)
+    parser = get_query_parser(catalog)
+    lookup = get_facet_index(catalog).get
+    recommend = ENGINES[engine]
+
+    latencies, parse_latencies, empty = [], [], 0
+    for i, prompt in enumerate(prompts):
+        user_history = [str(rng.randint(1, size)) for _ in range(history)] or None
+        started = time.perf_counter()
+        parsed = parser.parse(prompt)
+        parsed_at = time.perf_counter()
+        req = RecommendationRequest(userPrompt=prompt, maxResults=k, userHistory=user_history)
+        response = recommend(req, catalog, parsed, profile_for_request(None, user_history, lookup))
+        finished = time.perf_counter()
+        if i < warmup:
+            continue
+        latencies.append((finished - started) * 1000)
+        parse_latencies.append((parsed_at - started) * 1000)
+        empty += not response["products"]
+
+    result.update({
+        "latency": summarize_ms(latencies),
+        "parse_latency": summarize_ms(parse_latencies),
+        "empty_results": empty,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--engines", default="keyword,semantic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--history", type=int, default=0, help="userHistory items per request (personalization)")
+    parser.add_argument("--dicts", action="store_true", help="use a list of dicts instead of the columnar Catalog")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = [
+        bench(int(size), engine, args.queries, args.k, args.history, not args.dicts)
+        for size in args.sizes.split(",")
+        for engine in args.engines.split(",")
+    ]
+    write_report("recommend_engine", vars(args), results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark for encoding /recommend and /products response bodies.
+
+Reports the time to encode 1k products for each path:
+
+- fastapi: response_model validation + jsonable_encoder + json.dumps, as
+  FastAPI does for a route that returns a dict
+- stdlib: json.dumps of the plain dicts (no validation)
+- fast: validation + encoding through the fragment cache, cold and warm
+
+Run from the backend directory:
+
+    python -m benchmarks.response_encoding --sizes 100,1000,10000
+"""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from fastapi.encoders import jsonable_encoder
+
+from data_types_class import RecommendationResponse
+from src.lib import fastjson
+from src.lib.fastjson import FragmentCache
+from src.recommendation import serialization
+
+from benchmarks.report import summarize_ms, write_report
+from benchmarks.workload import synthetic_products
+
+
+def make_result(size: int) -> dict:
+    products = synthetic_products(size)
+    for i, product in enumerate(products):
+        product["relevanceScore"] = round(1 - i / size, 4)
+    return {"products": products, "reasoning": "benchmark", "confidence": 0.8, "categories": ["Pottery"]}
+
+
+def fastapi_path(result: dict) -> bytes:
+    model = RecommendationResponse.model_validate(result)
+    return json.dumps(jsonable_encoder(model), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def stdlib_path(result: dict) -> bytes:
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def fast_path(result: dict) -> bytes:
+    # Each synthetic catalog reuses ids 1..n, so its size is the catalog version
+    return serialization.encode_recommendations(result, version=len(result["products"])).data
+
+
+def per_1k(fn, result: dict, size: int, repeat: int, reset=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if reset:
+            reset()
+        started = time.perf_counter()
+        fn(result)
+        samples.append((time.perf_counter() - started) * 1000 * 1000 / size)
+    return summarize_ms(samples)
+
+
+def reset_fragments():
+    serialization.fragments = FragmentCache(serialization.PRODUCT_FRAGMENT_CACHE_SIZE)
+
+
+def bench(size: int, repeat: int) -> dict:
+    result = make_result(size)
+    # The fast path must produce the same document as the response_model path
+    assert json.loads(fast_path(result)) == json.loads(fastapi_path(result))
+    return {
+        "products": size,
+        "encoder": serialization.fragments.stats()["encoder"],
+        "body_bytes": len(fast_path(result)),
+        "fastapi_per_1k": per_1k(fastapi_path, result, size, repeat),
+        "stdlib_per_1k": per_1k(stdlib_path, result, size, repeat),
+        "fast_cold_per_1k": per_1k(fast_path, result, size, repeat, reset=reset_fragments),
+        "fast_warm_per_1k": per_1k(fast_path, result, size, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    results = [bench(int(size), args.repeat) for size in args.sizes.split(",")]
+    write_report("response_encoding", vars(args), results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for the semantic recommendation engine.
+
+Measures index build time, matrix memory and query latency (embed + matmul +
+argpartition) on synthetic catalogs. Run from the backend directory:
+
+    python -m benchmarks.semantic_search --sizes 10000,100000,1000000
+
+Catalogs larger than --text-limit use random unit vectors instead of
+embedding generated text, since only the scoring path depends on size.
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from src.recommendation.semantic import HashingEmbedder, SemanticIndex
+
+from benchmarks.report import write_report
+from benchmarks.workload import synthetic_products
+
+QUERIES = [
+    "gift for a potter friend", "blue pottery vase under 2000", "silver earrings for a wedding",
+    "hand carved wooden spice box", "kalamkari saree", "brass animal figurine", "madhubani painting",
+]
+
+
+def bench(size: int, dim: int, text_limit: int, queries: int, k: int) -> dict:
+    products = synthetic_products(size)
+    started = time.perf_counter()
+    if size <= text_limit:
+        index = SemanticIndex(products, HashingEmbedder(dim=dim))
+        mode = "text"
+    else:
+        embedder = HashingEmbedder(dim=dim).fit([p["name"] for p in products[:text_limit]])
+        vectors = np.random.default_rng(7).standard_normal((size, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = SemanticIndex(products, embedder, vectors=vectors)
+        mode = "random_vectors"
+    build_s = time.perf_counter() - started
+
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        index.search(QUERIES[i % len(QUERIES)], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "products": size,
+        "dim": dim,
+        "mode": mode,
+        "build_s": round(build_s, 3),
+        "matrix_mb": round(index.vectors.nbytes / 2 ** 20, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--text-limit", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = [
+        bench(int(size), args.dim, args.text_limit, args.queries, args.k)
+        for size in args.sizes.split(",")
+    ]
+    write_report("semantic_search", vars(args), results, args.out)
+
+
+if __name__ == "__main__":
+    main()
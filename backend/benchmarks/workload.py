@@ -0,0 +1,104 @@
+"""
+Synthetic catalogs and query mixes for the recommendation benchmarks.
+
+Products follow the schema of src/lib/data.py (id, name, price, imageUrl,
+artisan, category, aiHint) plus the optional description/materials/region
+fields of the Product model. Queries mix free text with price phrases,
+categories, artisans, regions and occasions in realistic proportions.
+
+Write a catalog for the HTTP load test (served via CATALOG_PATH):
+
+    python -m benchmarks.workload --size 50000 --out /tmp/catalog.json
+"""
+
+import argparse
+import json
+import random
+from typing import List
+
+CATEGORIES = {
+    "Pottery": (["vase", "kettle", "bowl", "planter", "diya", "pot"], ["terracotta", "clay", "blue glaze"]),
+    "Textiles": (["saree", "shawl", "stole", "dupatta", "rug", "cushion cover"], ["silk", "cotton", "pashmina"]),
+    "Jewelry": (["earrings", "necklace", "bangles", "pendant", "anklet"], ["silver", "brass", "beads"]),
+    "Woodwork": (["spice box", "elephant carving", "toy", "jewellery box", "coaster set"], ["sandalwood", "rosewood", "teak"]),
+    "Painting": (["scroll painting", "wall art", "miniature", "canvas"], ["natural pigments", "cloth", "paper"]),
+    "Metalwork": (["lamp", "figurine", "bell", "plate", "tortoise"], ["brass", "copper", "bronze"]),
+}
+STYLES = ["Hand-painted", "Hand-carved", "Kalamkari", "Dhokra", "Madhubani", "Pattachitra", "Blue Pottery",
+          "Filigree", "Bidri", "Block-printed", "Ikat", "Channapatna", "Warli", "Tanjore"]
+REGIONS = ["Rajasthan", "Gujarat", "Kashmir", "Odisha", "West Bengal", "Bihar", "Karnataka", "Tamil Nadu",
+           "Uttar Pradesh", "Andhra Pradesh"]
+FIRST_NAMES = ["Ritu", "Sanjay", "Mina", "Gopal", "Anika", "Ramesh", "Priya", "Yusuf", "Lakshmi", "Arjun",
+               "Farah", "Kiran", "Meera", "Vikram", "Sunita", "Imran"]
+LAST_NAMES = ["Kumar", "Chitara", "Devi", "Sharma", "Das", "Prajapati", "Soni", "Bhai", "Patel", "Naidu",
+              "Khan", "Reddy", "Iyer", "Singh", "Bose"]
+OCCASIONS = ["wedding", "diwali", "birthday", "anniversary", "housewarming", "rakhi"]
+FREE_TEXT = ["something unique for my home", "handmade decor", "traditional craft", "eco friendly gift",
+             "show me trending artisan products", "statement piece for the living room"]
+
+
+def synthetic_products(n: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    artisans = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(max(n // 40, 10))]
+    products = []
+    for i in range(n):
+        category = rng.choice(list(CATEGORIES))
+        items, materials = CATEGORIES[category]
+        item = rng.choice(items)
+        style = rng.choice(STYLES)
+        region = rng.choice(REGIONS)
+        products.append({
+            "id": str(i + 1),
+            "name": f"{style} {item.title()}",
+            # Log-uniform prices between ₹200 and ₹40,000, rounded like real listings
+            "price": int(round(200 * (200 ** rng.random()), -1)),
+            "imageUrl": f"https://picsum.photos/400/500?random={i + 1}",
+            "artisan": rng.choice(artisans),
+            "category": category,
+            "aiHint": f"{style.lower()} {item}",
+            "description": f"{style} {item} made by hand in {region} using {rng.choice(materials)}.",
+            "materials": rng.sample(materials, k=rng.randint(1, len(materials))),
+            "region": region,
+        })
+    return products
+
+
+def query_mix(n: int, catalog: List[dict], seed: int = 11) -> List[str]:
+    """Prompts roughly split between free text, category/item, price, artisan, region and occasion queries."""
+    rng = random.Random(seed)
+    artisans = sorted({p["artisan"] for p in catalog})
+    queries = []
+    for _ in range(n):
+        category = rng.choice(list(CATEGORIES))
+        item = rng.choice(CATEGORIES[category][0])
+        budget = rng.choice([500, 1000, 1500, 2000, 3000, 5000, 10000])
+        kind = rng.random()
+        if kind < 0.2:
+            query = rng.choice(FREE_TEXT)
+        elif kind < 0.4:
+            query = f"{rng.choice(STYLES).lower()} {item}"
+        elif kind < 0.6:
+            query = rng.choice([f"{item} under {budget} rupees", f"{category.lower()} between {budget // 2} and {budget}",
+                                f"{item} above ₹{budget}", f"{item} under {budget // 1000 or 1}k"])
+        elif kind < 0.7:
+            query = f"{item} by {rng.choice(artisans)}"
+        elif kind < 0.85:
+            query = f"{category.lower()} from {rng.choice(REGIONS)}"
+        else:
+            query = f"gift for a {rng.choice(OCCASIONS)} under {budget}"
+        queries.append(query)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    with open(args.out, "w") as f:
+        json.dump(synthetic_products(args.size, args.seed), f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import bpy
+import sys
+import os
+
+# ----------------------------
+# Args from command line
+# ----------------------------
+argv = sys.argv
+argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+if len(argv) < 1:
+    print("Usage: blender -b -P build_canvas_template.py -- <output_blend>")
+    sys.exit(1)
+
+output_path = argv[0]
+
+# ----------------------------
+# Start from an empty scene
+# ----------------------------
+bpy.ops.wm.read_factory_settings(use_empty=True)
+scene = bpy.context.scene
+
+# ----------------------------
+# Frame mesh: unit square face, 5 cm deep
+# ----------------------------
+# Front face at y = 0 looking down -Y (glTF +Z after export), depth behind it.
+# Jobs scale X and Z to the image's aspect ratio; the depth stays 5 cm.
+DEPTH = 0.05
+verts = [
+    (-0.5, 0, -0.5), (0.5, 0, -0.5), (0.5, 0, 0.5), (-0.5, 0, 0.5),              # front
+    (-0.5, DEPTH, -0.5), (0.5, DEPTH, -0.5), (0.5, DEPTH, 0.5), (-0.5, DEPTH, 0.5),  # back
+]
+# Counter-clockwise seen from outside, with one UV per corner. The front shows the
+# whole image, the back a mirror of it, and the edges stretch its outermost pixels.
+faces = [
+    ((0, 1, 2, 3), ((0, 0), (1, 0), (1, 1), (0, 1))),  # front
+    ((5, 4, 7, 6), ((1, 0), (0, 0), (0, 1), (1, 1))),  # back
+    ((1, 5, 6, 2), ((1, 0), (1, 0), (1, 1), (1, 1))),  # right
+    ((4, 0, 3, 7), ((0, 0), (0, 0), (0, 1), (0, 1))),  # left
+    ((3, 2, 6, 7), ((0, 1), (1, 1), (1, 1), (0, 1))),  # top
+    ((4, 5, 1, 0), ((0, 0), (1, 0), (1, 0), (0, 0))),  # bottom
+]
+
+mesh = bpy.data.meshes.new("FramedPicture")
+mesh.from_pydata(verts, [], [corners for corners, _ in faces])
+mesh.update()
+
+uv_layer = mesh.uv_layers.new(name="UVMap")
+for polygon, (_, uvs) in zip(mesh.polygons, faces):
+    for loop_index, uv in zip(polygon.loop_indices, uvs):
+        uv_layer.data[loop_index].uv = uv
+
+picture = bpy.data.objects.new("FramedPicture", mesh)
+scene.collection.objects.link(picture)
+
+# ----------------------------
+# Material with Backface Culling
+# ----------------------------
+mat = bpy.data.materials.new(name="PictureMaterial")
+mat.use_nodes = True
+mat.use_backface_culling = True  # Only render front face in AR
+
+nodes = mat.node_tree.nodes
+links = mat.node_tree.links
+
+# Clear default nodes
+for n in nodes:
+    nodes.remove(n)
+
+output_node = nodes.new("ShaderNodeOutputMaterial")
+bsdf_node = nodes.new("ShaderNodeBsdfPrincipled")
+tex_image = nodes.new("ShaderNodeTexImage")
+tex_image.name = "CanvasImage"  # jobs swap the image of this node
+tex_image.extension = "EXTEND"
+tex_image.image = bpy.data.images.new("CanvasPlaceholder", 4, 4)
+
+# Set material properties
+if "Roughness" in bsdf_node.inputs:
+    bsdf_node.inputs["Roughness"].default_value = 0.3
+if "Specular" in bsdf_node.inputs:
+    bsdf_node.inputs["Specular"].default_value = 0.2
+
+links.new(bsdf_node.inputs["Base Color"], tex_image.outputs["Color"])
+links.new(output_node.inputs["Surface"], bsdf_node.outputs["BSDF"])
+
+picture.data.materials.append(mat)
+
+# ----------------------------
+# Basic lighting (for preview only)
+# ----------------------------
+world = scene.world or bpy.data.worlds.new("World")
+world.use_nodes = True
+world.node_tree.nodes["Background"].inputs[1].default_value = 0.8
+scene.world = world
+
+# ----------------------------
+# Save the template
+# ----------------------------
+picture.select_set(True)
+bpy.context.view_layer.objects.active = picture
+
+os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+bpy.ops.wm.save_as_mainfile(filepath=output_path, compress=True)
+
+print(f"✅ Saved canvas template: {output_path}")
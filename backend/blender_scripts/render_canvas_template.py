@@ -0,0 +1,52 @@
+import bpy
+import sys
+
+# ----------------------------
+# Args from command line
+# ----------------------------
+# Runs inside the template saved by build_canvas_template.py:
+#   blender -b canvas_template.blend -P render_canvas_template.py -- <image_path> <output_glb>
+argv = sys.argv
+argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+if len(argv) < 2:
+    print("Usage: blender -b <template.blend> -P render_canvas_template.py -- <image_path> <output_glb>")
+    sys.exit(1)
+
+image_path = argv[0]
+output_path = argv[1]
+
+picture = bpy.data.objects["FramedPicture"]
+
+# ----------------------------
+# Swap in the image
+# ----------------------------
+img = bpy.data.images.load(image_path)
+picture.active_material.node_tree.nodes["CanvasImage"].image = img
+
+# ----------------------------
+# Scale the unit frame to the aspect ratio (longest side 1 m)
+# ----------------------------
+width, height = img.size
+aspect_ratio = width / height
+if aspect_ratio >= 1:
+    picture.scale = (1.0, 1.0, 1.0 / aspect_ratio)
+else:
+    picture.scale = (aspect_ratio, 1.0, 1.0)
+
+# ----------------------------
+# Export GLB
+# ----------------------------
+picture.select_set(True)
+bpy.context.view_layer.objects.active = picture
+
+bpy.ops.export_scene.gltf(
+    filepath=output_path,
+    export_format="GLB",
+    use_selection=True,
+    export_texcoords=True,
+    export_normals=True,
+    export_yup=True,
+)
+
+print(f"✅ Exported framed picture from template: {output_path}")
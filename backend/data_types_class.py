@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 
 # ------------------------
 # Catalog Product Models
@@ -140,6 +140,16 @@ class RecommendationRequest(BaseModel):
     userHistory: Optional[List[str]] = None
     maxResults: int = 5
     excludeProducts: Optional[List[str]] = None
+    userId: Optional[str] = Field(default=None, description="Enables ranking with the user's stored preference profile.")
+
+class UserEvent(BaseModel):
+    userId: str
+    productId: str
+    kind: Literal["view", "click", "favorite", "cart", "purchase"] = "view"
+    timestamp: Optional[float] = Field(
+        default=None, ge=0, allow_inf_nan=False,
+        description="Unix time of the event in seconds (milliseconds are converted); defaults to now, "
+                    "and times ahead of the server clock count as now.")
 
 # ------------------------
 # Recommendation Response Models
@@ -165,6 +175,9 @@ class SuggestedFilters(BaseModel):
     priceRange: Optional[PriceRange] = None
     categories: Optional[List[str]] = None
     artisans: Optional[List[str]] = None
+    counts: Optional[Dict[str, Dict[str, int]]] = Field(
+        default=None, description="Facet counts over matching products, keyed by facet (categories, artisans, priceBuckets)."
+    )
 
 class RecommendationResponse(BaseModel):
     products: List[Product]
@@ -172,6 +185,9 @@ class RecommendationResponse(BaseModel):
     confidence: float = Field(..., ge=0, le=1)
     categories: List[str]
     suggestedFilters: Optional[SuggestedFilters] = None
+    interpretedQuery: Optional[Dict[str, Any]] = Field(
+        default=None, description="Filters parsed from userPrompt (price bounds, categories, artisans, regions, occasions, colors)."
+    )
 
 # ------------------------
 # User Profile Models
@@ -189,3 +205,13 @@ class UserProfile(BaseModel):
     favoriteArtisans: List[str]
     recentSearches: List[str]
     demographics: Optional[Demographics] = None
+
+# ------------------------
+# Direct Upload Models
+# ------------------------
+class UploadUrlRequest(BaseModel):
+    contentType: str
+    size: Optional[int] = Field(default=None, description="Image size in bytes, checked against the upload limit.")
+
+class UploadCompleteRequest(BaseModel):
+    key: str
@@ -2,6 +2,9 @@ import firebase_admin
 from firebase_admin import credentials, firestore, storage
 import os
 import json
+from src.lib.logger import get_logger
+
+logger = get_logger("firebase")
 
 # Path to Firebase key
 FIREBASE_KEY_PATH = os.path.join(
@@ -34,9 +37,9 @@ if firebase_creds_json:
         db = firestore.client()
         bucket = storage.bucket()
         firebase_initialized = True
-        print("✅ Firebase initialized successfully (from environment variable)")
+        logger.info("Firebase initialized", extra={"source": "env"})
     except Exception as e:
-        print(f"⚠️ Firebase initialization from env var failed: {e}")
+        logger.warning("Firebase initialization from env var failed", extra={"error": str(e)})
 
 # Option 2: Try local file (for local development)
 if not firebase_initialized and os.path.exists(FIREBASE_KEY_PATH):
@@ -49,16 +52,18 @@ if not firebase_initialized and os.path.exists(FIREBASE_KEY_PATH):
         db = firestore.client()
         bucket = storage.bucket()
         firebase_initialized = True
-        print("✅ Firebase initialized successfully (from local file)")
+        logger.info("Firebase initialized", extra={"source": "file"})
     except Exception as e:
-        print(f"⚠️ Firebase initialization from file failed: {e}")
+        logger.warning("Firebase initialization from file failed", extra={"error": str(e)})
 
 # If neither worked, run without Firebase
 if not firebase_initialized:
-    print(f"⚠️ Firebase not available (no credentials found)")
-    print("📝 Checked:")
-    print(f"   - Environment variable: FIREBASE_SERVICE_ACCOUNT_JSON = {'SET' if firebase_creds_json else 'NOT SET'}")
-    print(f"   - Local file: {FIREBASE_KEY_PATH} = {'EXISTS' if os.path.exists(FIREBASE_KEY_PATH) else 'NOT FOUND'}")
-    print("📝 Backend will run with limited functionality (no Firestore/Storage)")
-    print("📝 Products will use in-memory storage, AR models saved locally")
+    logger.warning(
+        "Firebase not available; using in-memory products and local AR model storage",
+        extra={
+            "env_credentials": "SET" if firebase_creds_json else "NOT SET",
+            "key_file": FIREBASE_KEY_PATH,
+            "key_file_exists": os.path.exists(FIREBASE_KEY_PATH),
+        },
+    )
 
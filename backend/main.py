@@ -14,6 +14,11 @@ import google.generativeai as genai
 env_path = os.path.join(os.path.dirname(__file__), "env.local")
 load_dotenv(dotenv_path=env_path)
 
+# Structured logging (queue-backed, JSON by default; see src/lib/logger.py)
+from src.lib.logger import setup_logging, get_logger, RequestContextMiddleware
+setup_logging()
+logger = get_logger("main")
+
 # Configure Gemini API
 api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
@@ -39,6 +44,16 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# gzip/brotli for JSON and text responses above COMPRESSION_MIN_SIZE
+from src.lib.compression import CompressionMiddleware
+app.add_middleware(CompressionMiddleware)
+
+# Per-request stage timing (Server-Timing header, slow request reports, sampled profiles)
+from src.lib.profiling import ProfilingMiddleware
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so the request id is set for everything below it
+app.add_middleware(RequestContextMiddleware)
+
 # Import and include routes
 try:
     from routes import router as api_router
@@ -48,54 +63,43 @@ except ImportError:
 app.include_router(api_router)
 
 # Static file serving for AR models and uploaded images
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from typing import Optional
+from fastapi import Request
+from src.lib.blobstore import get_blob_store
+from src.lib.hot_assets import hot_assets
+from src.lib.lod import negotiate
+from src.lib.static_assets import AssetResolver
+from src.lib.storage import ASSET_CACHE_CONTROL
+from src.lib.uploads import upload_store
 
-ar_models_dir = os.path.join(os.path.dirname(__file__), "ar_models")
-uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
+# Only indexed names are served; anything else is a 404 without a filesystem lookup
+ar_model_assets = AssetResolver(
+    get_blob_store(os.path.join(os.path.dirname(__file__), "ar_models"), "/ar_models"),
+    {".glb": "model/gltf-binary"},
+    # "<product_id>.glb" is rewritten by every regeneration and rebuild, so keep max-age short (ETag revalidates)
+    cache_control=ASSET_CACHE_CONTROL,
+    hot_cache=hot_assets,
+)
+upload_assets = AssetResolver(
+    upload_store(),
+    {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp", ".gif": "image/gif"},
+    cache_control="public, max-age=86400",  # Cache for 1 day
+    hot_cache=hot_assets,
+)
 
-# Custom route for GLB files with proper headers
 @app.get("/ar_models/{filename}")
-async def serve_glb_file(filename: str):
-    file_path = os.path.join(ar_models_dir, filename)
-    if os.path.exists(file_path) and filename.endswith('.glb'):
-        return FileResponse(
-            file_path,
-            media_type="model/gltf-binary",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "*",
-                "Cache-Control": "public, max-age=31536000",  # Cache for 1 year
-            }
-        )
-    return {"error": "File not found"}
-
-# Custom route for uploaded images with proper headers
+async def serve_glb_file(filename: str, request: Request, lod: Optional[str] = None):
+    # ?lod=low|medium|full|<pixels>, or client hints, pick a texture-reduced variant when one exists
+    key, headers = negotiate(filename, lod, request.headers, ar_model_assets.has)
+    return await ar_model_assets.response(key, request, headers)
+
 @app.get("/uploads/{filename}")
-async def serve_uploaded_image(filename: str):
-    file_path = os.path.join(uploads_dir, filename)
-    if os.path.exists(file_path):
-        # Determine media type based on file extension
-        media_type = "image/jpeg"
-        if filename.endswith('.png'):
-            media_type = "image/png"
-        elif filename.endswith('.webp'):
-            media_type = "image/webp"
-        elif filename.endswith('.gif'):
-            media_type = "image/gif"
-        
-        return FileResponse(
-            file_path,
-            media_type=media_type,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "*",
-                "Cache-Control": "public, max-age=86400",  # Cache for 1 day
-            }
-        )
-    return {"error": "File not found"}
+async def serve_uploaded_image(filename: str, request: Request):
+    return await upload_assets.response(filename, request)
+
+@app.get("/debug/assets")
+async def debug_assets():
+    return {"ar_models": ar_model_assets.stats(), "uploads": upload_assets.stats(), "hot_cache": hot_assets.stats()}
 
 # ---------------------------
 # Uvicorn entrypoint
@@ -104,8 +108,8 @@ if __name__ == "__main__":
     try:
         port = int(os.environ.get("PORT", 9079))
     except ValueError:
-        print("Invalid PORT environment variable, using default 9079")
+        logger.warning("Invalid PORT environment variable, using default 9079")
         port = 9079
 
-    print(f"🚀 Starting Artisan Marketplace API on port {port}")
+    logger.info("Starting Artisan Marketplace API", extra={"port": port})
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Body
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Body, Depends
+from typing import List, Optional, Tuple
+import asyncio
+import datetime
+import hashlib
+import io
 import httpx
 import google.generativeai as genai
 import base64
-import subprocess
 import tempfile
 import os
 import requests
 import mimetypes
+import json
 import shutil
 from PIL import Image
 from firebase_config import db
@@ -19,7 +23,8 @@ from data_types_class import (
     ProductStorytellingInput, ProductStorytellingOutput,
     AnalyzeProductPhotoInput, AnalyzeProductPhotoOutput,
     IdentifyTechniqueInput, IdentifyTechniqueOutput,
-    RecommendationRequest, RecommendationResponse,
+    RecommendationRequest, RecommendationResponse, UserEvent,
+    UploadUrlRequest, UploadCompleteRequest,
     PriceEstimationInput, PriceEstimationOutput
 )
 from src.ai.flows.automated_product_catalog import catalog_product
@@ -29,11 +34,55 @@ from src.ai.flows.product_storytelling import generate_product_story
 from src.ai.flows.quality_assessment import analyze_product_photo
 from src.ai.flows.technique_identification import identify_technique
 from src.ai.flows.price_estimation import generate_price_estimation
-from src.lib.data import Products as products
+from src.lib.data import Products
+from src.lib.catalog import Catalog
+from src.recommendation.semantic import semantic_recommendations
+from src.recommendation.keyword import keyword_recommendations
+from src.recommendation import ann
+from src.recommendation.facets import get_facet_index
+from src.recommendation import personalization
+from src.recommendation.query_parser import get_query_parser
+from src.recommendation.rerank import RECOMMENDATION_RERANK, RERANK_TOP_N, rerank_response, rerank_stats
+from src.lib.profiling import span
+from src.lib import fastjson
+from src.lib.fastjson import FastJSONResponse, FragmentCache, RawJSON, json_array
+from src.recommendation.serialization import encode_recommendations, fragments as product_fragments
+from src.lib.http_cache import (
+    PRODUCTS_CACHE_CONTROL, RECOMMEND_CACHE_CONTROL,
+    cache_headers, catalog_version, not_modified, not_modified_response, weak_etag,
+)
+from src.lib import uploads
+from src.lib.storage import ASSET_CACHE_CONTROL, get_storage
+from src.lib.blobstore import blob_store_stats, get_blob_store, set_ref_source, track_product_assets
+from src.lib.lod import LOD_TEXTURE_SIZES, build_variants, variant_key
+from src.ar.blender import blender_stats
+from src.ar.generators import Generator, generator_for
+from src.ar.manifest import build_inputs, current_inputs, is_current, source_key, stale_reason
+from src.lib.logger import get_logger
+from src.lib.admission import admission, admission_stats
+from src.ai.llm import note_fallback, llm_stats
+from src.ai.router import generate, router_stats
+from src.ai.resilience import LLMUnavailableError
+
+logger = get_logger("routes")
+
+# Optional JSON product list used instead of the sample catalog, e.g. a
+# synthetic catalog written by `python -m benchmarks.workload`
+CATALOG_PATH = os.getenv("CATALOG_PATH")
+if CATALOG_PATH:
+    with open(CATALOG_PATH) as f:
+        Products = json.load(f)
+    logger.info("Loaded catalog", extra={"path": CATALOG_PATH, "count": len(Products)})
+# Columnar storage; rows behave like the product dicts
+products = Catalog(Products)
 
 # In-memory store for when Firebase is not available
 products_store = {}
 
+# Sharded local object stores for generated models and uploaded images
+ar_models_store = get_blob_store(os.path.join(os.path.dirname(__file__), "ar_models"), "/ar_models")
+uploads_store = uploads.upload_store()
+
 # Initialize mock products for testing
 def initialize_mock_products():
     """Initialize mock products for testing AR functionality"""
@@ -76,8 +125,9 @@ def initialize_mock_products():
     for product_id, product_data in mock_products.items():
         if product_id not in products_store:
             products_store[product_id] = product_data
+            track_product_assets(product_id, product_data)
     
-    print(f"🔥 Initialized {len(mock_products)} mock products")
+    logger.info("Initialized mock products", extra={"count": len(mock_products)})
 
 # Initialize mock products on startup
 initialize_mock_products()
@@ -95,15 +145,16 @@ router = APIRouter()
 async def health():
     return {"status": "ok"}
 
-@router.get("/debug/products")
+@router.get("/debug/products", response_class=FastJSONResponse)
 async def debug_products():
     """Debug endpoint to check loaded products"""
-    return {
+    return FastJSONResponse({
         "products_count": len(products_store),
         "product_ids": list(products_store.keys()),
         "mock_draft_1_exists": "mock_draft_1" in products_store,
-        "products_store_content": products_store
-    }
+        "products_store_content": products_store,
+        "fragment_cache": {"products": product_fragments.stats(), "listings": listing_fragments.stats()},
+    })
 
 @router.get("/debug/routes")
 async def debug_routes():
@@ -118,10 +169,36 @@ async def debug_routes():
         })
     return {"routes": routes, "total": len(routes)}
 
+@router.get("/debug/admission")
+async def debug_admission():
+    """Debug endpoint to inspect concurrency limits, queue depth and rejections"""
+    return admission_stats()
+
+@router.get("/debug/llm")
+async def debug_llm():
+    """Debug endpoint to inspect Gemini routing, retries, hedges, circuit breakers and fallbacks"""
+    return {**llm_stats(), "routing": router_stats(), "rerank": rerank_stats()}
+
+@router.get("/debug/personalization")
+async def debug_personalization():
+    """Debug endpoint to inspect the user preference profile store"""
+    return personalization.personalization_stats()
+
+@router.get("/debug/storage")
+async def debug_storage():
+    """Debug endpoint to inspect the local object stores"""
+    return {"blob_stores": blob_store_stats()}
+
+@router.get("/debug/blender")
+async def debug_blender():
+    """Debug endpoint to inspect Blender runs: limits, in-flight count, exit codes, timeouts and latency"""
+    return blender_stats()
+
 @router.post("/debug/init-products")
 async def force_init_products():
     """Force initialize mock products"""
     initialize_mock_products()
+    catalog_version.bump()
     return {
         "message": "Products initialized",
         "products_count": len(products_store),
@@ -144,7 +221,8 @@ async def generate_heritage_story_endpoint(input: HeritageStorytellingInput):
 async def generate_process_documentation_endpoint(input: GenerateProcessDocumentationInput):
     return await generate_process_documentation(input)
 
-@router.post("/generate_product_story", response_model=ProductStorytellingOutput)
+@router.post("/generate_product_story", response_model=ProductStorytellingOutput,
+             dependencies=[Depends(admission("generate_product_story"))])
 async def generate_product_story_endpoint(input: ProductStorytellingInput):
     return await generate_product_story(input)
 
@@ -156,7 +234,8 @@ async def analyze_product_photo_endpoint(input: AnalyzeProductPhotoInput):
 async def identify_technique_endpoint(input: IdentifyTechniqueInput):
     return await identify_technique(input)
 
-@router.post("/estimate_price", response_model=PriceEstimationOutput)
+@router.post("/estimate_price", response_model=PriceEstimationOutput,
+             dependencies=[Depends(admission("estimate_price"))])
 async def estimate_price_endpoint(input: PriceEstimationInput):
     return await generate_price_estimation(input)
 
@@ -166,7 +245,7 @@ async def estimate_price_endpoint(input: PriceEstimationInput):
 # -----------------------------------
 PAINTING_KEYWORDS = ["painting", "art", "canvas", "mural", "portrait"]
 
-@router.post("/classify_product")
+@router.post("/classify_product", dependencies=[Depends(admission("classify_product"))])
 async def classify_product(
     productTitle: str = Form(...),
     file: UploadFile = None
@@ -195,19 +274,41 @@ async def classify_product(
             else:
                 mime_type = 'image/jpeg'  # Default fallback
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    result = model.generate_content([
-        "Classify this product image into one of: painting, sculpture, textile, jewelry, pottery, other.",
-        {
-            "inline_data": {
-                "mime_type": mime_type,
-                "data": b64_image
+    title_check = any(kw in productTitle.lower() for kw in PAINTING_KEYWORDS)
+
+    try:
+        output = (await generate([
+            "Classify this product image into one of: painting, sculpture, textile, jewelry, pottery, other.",
+            {
+                "inline_data": {
+                    "mime_type": mime_type,
+                    "data": b64_image
+                }
             }
+        ], flow="classify_product")).lower()
+    except LLMUnavailableError:
+        # Gemini is unhealthy: classify from the title alone instead of failing
+        note_fallback("classify_product")
+        return {
+            "success": True,
+            "category": "painting" if title_check else _category_from_text(productTitle.lower()),
+            "isPainting": title_check,
+            "raw": "",
+            "degraded": True
         }
-    ])
 
-    output = result.text.lower()
+    category = _category_from_text(output)
+    is_painting = category == "painting" or title_check
 
+    return {
+        "success": True,
+        "category": category,
+        "isPainting": is_painting,
+        "raw": output
+    }
+
+
+def _category_from_text(output: str) -> str:
     category = "other"
     if "painting" in output:
         category = "painting"
@@ -219,16 +320,7 @@ async def classify_product(
         category = "jewelry"
     elif "pottery" in output:
         category = "pottery"
-
-    title_check = any(kw in productTitle.lower() for kw in PAINTING_KEYWORDS)
-    is_painting = category == "painting" or title_check
-
-    return {
-        "success": True,
-        "category": category,
-        "isPainting": is_painting,
-        "raw": output
-    }
+    return category
 
 
 # -----------------------------------
@@ -254,7 +346,9 @@ async def save_product_draft(product: dict):
             "id": product_id
         }
         
-        print(f"💾 Stored product {product_id} in memory with image_url: {product.get('image_url')}")
+        catalog_version.bump()
+        track_product_assets(product_id, products_store[product_id])
+        logger.info("Stored draft in memory", extra={"product_id": product_id, "image_url": product.get("image_url")})
         return {"id": product_id, "status": "draft_saved_without_firebase"}
         
     category = product.get("category", "other")
@@ -272,6 +366,8 @@ async def save_product_draft(product: dict):
         "status": "draft",
         "created_at": firestore.SERVER_TIMESTAMP,
     })
+    catalog_version.bump()
+    track_product_assets(doc_ref.id, product)
     return {"id": doc_ref.id, "status": "draft_saved"}
 
 
@@ -300,6 +396,11 @@ async def publish_product(product_id: str, body: dict = Body(...)):
         raise HTTPException(status_code=400, detail="Invalid price")
 
     if not db:
+        if product_id in products_store:
+            products_store[product_id].update({"status": "published", "finalPrice": user_price})
+            ann.index_product(products_store[product_id])
+            catalog_version.bump()
+            track_product_assets(product_id, products_store[product_id])
         return {"id": product_id, "status": "published_without_firebase", "finalPrice": user_price}
 
     ref = db.collection("products").document(product_id)
@@ -316,8 +417,15 @@ async def publish_product(product_id: str, body: dict = Body(...)):
         "price": ai_price,        # 👈 keep AI’s range intact
         "published_at": firestore.SERVER_TIMESTAMP,
     })
+    catalog_version.bump()
 
     updated_doc = ref.get().to_dict()
+    track_product_assets(product_id, updated_doc)
+    ann.index_product({
+        **_listing_from_doc(product_id, updated_doc),
+        "materials": updated_doc.get("materials"),
+        "technique": updated_doc.get("technique"),
+    })
     return {
         "id": product_id,
         "status": updated_doc.get("status"),
@@ -328,171 +436,278 @@ async def publish_product(product_id: str, body: dict = Body(...)):
 
 
 # -----------------------------------
-# AR Model Generation (Blender + Firebase)
+# AR Model Generation (generators + Firebase)
 # -----------------------------------
-@router.post("/generate_ar_model/{product_id}")
+# Products rebuilt at once by /ar_models/rebuild
+AR_REBUILD_CONCURRENCY = int(os.getenv("AR_REBUILD_CONCURRENCY", "2"))
+
+
+def _ar_storages():
+    """Storage for the generated models and for the normalized source photos kept for rebuilds."""
+    models = get_storage("ar_models", bucket, os.path.join(os.path.dirname(__file__), "ar_models"),
+                         gcs_prefix="products/")
+    sources = get_storage("ar_sources", bucket, os.path.join(os.path.dirname(__file__), "ar_sources"))
+    return models, sources
+
+
+async def _load_product(product_id: str) -> dict:
+    product = products_store.get(product_id, {})
+    if db:
+        doc = await asyncio.to_thread(db.collection("products").document(product_id).get)
+        if doc.exists:
+            product = doc.to_dict()
+    return product
+
+
+@router.post("/generate_ar_model/{product_id}", dependencies=[Depends(admission("generate_ar_model"))])
 async def generate_ar_model(
     product_id: str,
     request: Request,
-    file: Optional[UploadFile] = File(None)
+    file: Optional[UploadFile] = File(None),
+    force: bool = False
 ):
-    print(f"📥 AR Generation request for product {product_id}")
-    print(f"📎 File received: {file}")
-    if file:
-        print(f"📎 File details: filename={file.filename}, content_type={file.content_type}")
-    
+    logger.info(
+        "AR generation requested",
+        extra={
+            "product_id": product_id,
+            "upload_filename": file.filename if file else None,
+            "content_type": file.content_type if file else None,
+        },
+    )
+
     if not file or not file.filename:
         return {"success": False, "error": "No file uploaded"}
 
-    # Get product data from Firestore to check if it's a painting
-    if db:
-        doc = db.collection("products").document(product_id).get()
-        if doc.exists:
-            data = doc.to_dict()
-            if not data.get("isPainting", False):
-                return {"success": False, "message": "Not a painting, skipping AR generation"}
-
-    print(f"🎯 Generating AR model for product {product_id}")
-    print(f"🖼️ Using uploaded image: {file.filename}")
+    # The product's category and dimensions pick the generator and its parameters
+    product = await _load_product(product_id)
+    generator = generator_for(product)
 
-    # Use Blender for AR generation with the uploaded file
-    return await generate_with_blender_from_file(product_id, file, request)
-
-async def generate_with_blender_from_file(product_id: str, file: UploadFile, request: Request):
-    """Generate AR model using Blender with uploaded file"""
+    # Read the uploaded file content
+    with span("upload_read"):
+        content = await file.read()
+    image_sha256 = hashlib.sha256(content).hexdigest()
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            image_size = img.size
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to process image: {e}")
+    inputs = build_inputs(image_sha256, image_size, generator, generator.params(product, image_size))
+
+    # Same photo, generator version and parameters: the stored model is what a new build would produce
+    if not force and product.get("ar_model_url") and is_current(product.get("ar_manifest"), inputs):
+        logger.info("AR model up to date", extra={"product_id": product_id, "generator": generator.name})
+        return {"success": True, "ar_model_url": product["ar_model_url"],
+                "ar_model_variants": product.get("ar_model_variants", {}), "generator": generator.name,
+                "up_to_date": True}
+
+    logger.debug("Generating AR model", extra={"product_id": product_id, "upload_filename": file.filename,
+                                               "generator": generator.name})
     tmp_dir = tempfile.mkdtemp()
-    raw_image_path = os.path.join(tmp_dir, "input")
-    glb_path = os.path.join(tmp_dir, "output.glb")
-
     try:
-        # Read the uploaded file content
-        content = await file.read()
-        
-        # Save to temporary file
-        raw_jpg_path = raw_image_path + ".jpg"
+        raw_jpg_path = os.path.join(tmp_dir, "input.jpg")
         with open(raw_jpg_path, "wb") as f:
             f.write(content)
 
         # Normalize to PNG for robust glTF texturing
-        png_image_path = raw_image_path + ".png"
+        png_image_path = os.path.join(tmp_dir, "input.png")
         try:
-            with Image.open(raw_jpg_path) as img:
+            with span("png_convert"), Image.open(raw_jpg_path) as img:
                 if img.mode not in ("RGB", "RGBA"):
                     img = img.convert("RGB")
                 img.save(png_image_path, format="PNG")
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to process image: {e}")
 
-        # Platform-specific Blender executable paths
-        import platform
-        system = platform.system()
-        
-        if system == "Windows":
-            # Common Windows Blender installation paths
-            possible_paths = [
-                "C:\\Program Files\\Blender Foundation\\Blender 4.5\\blender.exe",
-                "C:\\Program Files\\Blender Foundation\\Blender 4.0\\blender.exe",
-                "C:\\Program Files\\Blender Foundation\\Blender 3.6\\blender.exe",
-                "C:\\Program Files\\Blender Foundation\\Blender\\blender.exe",
-            ]
-            blender_exe = next((p for p in possible_paths if os.path.exists(p)), None)
-            if not blender_exe:
-                which_blender = shutil.which("blender")
-                if which_blender:
-                    blender_exe = which_blender
-            if not blender_exe:
-                raise HTTPException(status_code=500, detail="Blender not found. Install Blender 4.x or add it to PATH")
-        elif system == "Darwin":  # macOS
-            blender_exe = "/Applications/Blender.app/Contents/MacOS/Blender"
-        else:  # Linux (including Docker containers)
-            # Check common Docker/Linux paths first
-            possible_linux_paths = [
-                "/usr/local/bin/blender",  # Docker symlink location
-                "/opt/blender/blender",    # Docker installation location
-                "blender"                  # System PATH
-            ]
-            blender_exe = next((p for p in possible_linux_paths if os.path.exists(p) or shutil.which(p)), None)
-            if not blender_exe:
-                blender_exe = "blender"  # Fallback to PATH
-        
-        # Use absolute path to the Blender script to avoid CWD issues
-        script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "blender_scripts", "generate_canvas_glb.py"))
-        
-        try:
-            print(f"🎯 Running Blender command: {blender_exe}")
-            print(f"📁 Script path: {script_path}")
-            print(f"🖼️ Image path (PNG): {png_image_path}")
-            print(f"📦 Output path: {glb_path}")
-            
-            result = subprocess.run(
-                [blender_exe, "-b", "-P", script_path, "--", png_image_path, glb_path],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            print("✅ Blender stdout:", result.stdout)
-            print("✅ Blender stderr:", result.stderr)
-            
-            # Verify the GLB file was actually created
-            if not os.path.exists(glb_path):
-                raise HTTPException(status_code=500, detail="GLB file was not generated by Blender")
-                
-            file_size = os.path.getsize(glb_path)
-            print(f"✅ GLB file created successfully, size: {file_size} bytes")
-            
-        except subprocess.CalledProcessError as e:
-            print("❌ Blender failed:", e.stderr)
-            print("❌ Blender stdout:", e.stdout)
-            raise HTTPException(status_code=500, detail=f"Blender failed: {e.stderr or e.stdout}")
-        except FileNotFoundError:
-            raise HTTPException(status_code=500, detail=f"Blender executable not found at: {blender_exe}")
-
+        return await build_ar_model(product_id, png_image_path, tmp_dir, generator, inputs, _backend_url(request),
+                                    new_source=True)
+    finally:
+        # Clean up temporary directory
         try:
-            if bucket:
-                blob = bucket.blob(f"products/{product_id}.glb")
-                blob.upload_from_filename(glb_path)
-                blob.make_public()
-                glb_url = blob.public_url
-            else:
-                # Firebase not available - create a local file URL for testing
-                # Copy the GLB to a static location in the backend
-                static_dir = os.path.join(os.path.dirname(__file__), "ar_models")
-                os.makedirs(static_dir, exist_ok=True)
-                static_glb_path = os.path.join(static_dir, f"{product_id}.glb")
-                shutil.copy2(glb_path, static_glb_path)
-                # Use a local URL (you'd need to serve static files)
-                # Generate URL based on environment
-                host = request.headers.get("host", "localhost:9079")
-                
-                # Force HTTPS for production deployments (Render.com, Railway, etc.)
-                if "onrender.com" in host or "railway.app" in host or "herokuapp.com" in host:
-                    backend_url = f"https://{host}"
-                else:
-                    backend_url = os.getenv("BACKEND_URL", f"http://{host}")
-                    
-                glb_url = f"{backend_url}/ar_models/{product_id}.glb"
-                print(f"⚠️ Firebase Storage not available. GLB saved locally: {static_glb_path}")
-                print(f"🔗 Generated GLB URL: {glb_url}")
+            shutil.rmtree(tmp_dir)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"File storage failed: {str(e)}")
+            logger.warning("Failed to clean up temp directory", extra={"tmp_dir": tmp_dir, "error": str(e)})
+
 
-        if db:
-            db.collection("products").document(product_id).update({
-                "ar_model_url": glb_url,
-                "status": "ar_ready",
+async def build_ar_model(product_id: str, png_image_path: str, tmp_dir: str, generator: Generator, inputs: dict,
+                         base_url: str, new_source: bool, rebuild: bool = False):
+    """Generate, store and record a product's AR model, its LOD variants and its build manifest"""
+    glb_path = os.path.join(tmp_dir, "output.glb")
+    params = inputs["params"]
+    logger.debug("Running AR generator", extra={"product_id": product_id, "generator": generator.name,
+                                                "params": params})
+    await generator.generate(png_image_path, params, glb_path)
+    file_size = os.path.getsize(glb_path)
+    logger.info("GLB generated", extra={"product_id": product_id, "generator": generator.name,
+                                        "size_bytes": file_size})
+
+    # Texture-reduced copies for phones and slow connections (see src/lib/lod.py)
+    try:
+        with span("lod_variants"):
+            variant_paths = await asyncio.to_thread(build_variants, glb_path, tmp_dir)
+    except Exception as e:
+        # The full model alone is still a working result
+        logger.warning("LOD variants failed", extra={"product_id": product_id, "error": str(e)})
+        variant_paths = {}
+
+    storage, sources = _ar_storages()
+    key = f"{product_id}.glb"
+    # The URLs are known up front, so Firestore is updated while the uploads finish
+    glb_url = storage.public_url(key, base_url)
+    variant_keys = {size: variant_key(key, size) for size in variant_paths}
+    variant_urls = {str(size): storage.public_url(k, base_url) for size, k in variant_keys.items()}
+    source = source_key(inputs["image_sha256"])
+    with open(glb_path, "rb") as f:
+        output_sha256 = hashlib.sha256(f.read()).hexdigest()
+    fields = {
+        "ar_model_url": glb_url,
+        "ar_model_variants": variant_urls,
+        "ar_manifest": {
+            **inputs,
+            "source_url": sources.public_url(source, base_url),
+            "output_sha256": output_sha256,
+            "built_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+    }
+    if not rebuild:
+        fields["status"] = "ar_ready"
+
+    def store_source():
+        # Addressed by content: a photo already kept is not uploaded again
+        if not sources.exists(source):
+            sources.put_file(source, png_image_path, "image/png", public=False)
+
+    async def upload():
+        with span("asset_upload"):
+            await asyncio.gather(
+                storage.upload_file(key, glb_path, "model/gltf-binary", ASSET_CACHE_CONTROL),
+                *(storage.upload_file(variant_keys[size], path, "model/gltf-binary", ASSET_CACHE_CONTROL)
+                  for size, path in variant_paths.items()),
+                *([asyncio.to_thread(store_source)] if new_source else []),
+            )
+
+    async def persist_url():
+        if not db:
+            logger.warning("Firebase not available, AR model URL not persisted", extra={"url": glb_url})
+            return False
+        with span("firestore_update"):
+            await asyncio.to_thread(db.collection("products").document(product_id).update, {
+                **fields,
                 "updated_at": firestore.SERVER_TIMESTAMP
             })
-        else:
-            print(f"⚠️ Firebase not available. AR model URL: {glb_url}")
+        # The product leaves the published listing (a rebuild only changes its model)
+        catalog_version.bump()
+        return True
+
+    if rebuild:
+        # The product keeps its working model until the new one is stored
+        (upload_result,), persist_result = await asyncio.gather(upload(), return_exceptions=True), None
+        if not isinstance(upload_result, BaseException):
+            (persist_result,) = await asyncio.gather(persist_url(), return_exceptions=True)
+    else:
+        upload_result, persist_result = await asyncio.gather(upload(), persist_url(), return_exceptions=True)
+    if isinstance(upload_result, BaseException):
+        if persist_result is True:
+            # Don't leave the product pointing at a model that was never stored
+            await asyncio.to_thread(db.collection("products").document(product_id).update, {
+                "ar_model_url": firestore.DELETE_FIELD,
+                "ar_model_variants": firestore.DELETE_FIELD,
+                "ar_manifest": firestore.DELETE_FIELD,
+                "status": "ar_failed",
+                "updated_at": firestore.SERVER_TIMESTAMP
+            })
+        logger.error("GLB upload failed", extra={"product_id": product_id, "backend": storage.name,
+                                                 "error": str(upload_result)})
+        raise HTTPException(status_code=500, detail=f"File storage failed: {upload_result}")
+    if isinstance(persist_result, BaseException):
+        raise persist_result
+    if not db and product_id in products_store:
+        products_store[product_id].update(fields)
+        # The local listing serves these documents as they are, AR fields included
+        catalog_version.bump()
+    for k in (key, *variant_keys.values()):
+        storage.add_ref(product_id, k)
+    sources.add_ref(product_id, source)
+    # A previous, larger image may have left variants this one does not have (missing ones just fail)
+    await asyncio.gather(*(asyncio.to_thread(storage.delete, variant_key(key, size))
+                           for size in LOD_TEXTURE_SIZES if size not in variant_keys), return_exceptions=True)
+    logger.info("GLB stored", extra={"product_id": product_id, "backend": storage.name, "url": glb_url,
+                                     "lod_sizes": sorted(variant_keys)})
+
+    return {"success": True, "ar_model_url": glb_url, "ar_model_variants": variant_urls,
+            "generator": generator.name}
+
+
+async def rebuild_ar_model(product_id: str, product: dict, base_url: str) -> dict:
+    """Rebuild a product's model from the source photo its manifest records"""
+    inputs = current_inputs(product)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        png_image_path = os.path.join(tmp_dir, "input.png")
+        _, sources = _ar_storages()
+        await sources.download_file(source_key(inputs["image_sha256"]), png_image_path)
+        return await build_ar_model(product_id, png_image_path, tmp_dir, generator_for(product), inputs, base_url,
+                                    new_source=False, rebuild=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-        return {"success": True, "ar_model_url": glb_url}
 
-    finally:
-        # Clean up temporary directory
-        try:
-            shutil.rmtree(tmp_dir)
-        except Exception as e:
-            print(f"⚠️ Failed to clean up temp directory {tmp_dir}: {e}")
+@router.post("/ar_models/rebuild", dependencies=[Depends(admission("ar_rebuild"))])
+async def rebuild_ar_models(request: Request, dry_run: bool = False, limit: Optional[int] = None):
+    """
+    Rebuild the AR models whose manifest no longer matches the current
+    generators, product parameters or LOD sizes; current models are left alone.
+    Models built before manifests existed need a fresh /generate_ar_model.
+    """
+    if db:
+        docs = await asyncio.to_thread(lambda: [(d.id, d.to_dict()) for d in db.collection("products").stream()])
+    else:
+        docs = list(products_store.items())
+
+    stale, current, unmanaged = [], 0, []
+    for product_id, product in docs:
+        if not product.get("ar_model_url"):
+            continue
+        reason = stale_reason(product)
+        if reason is None:
+            current += 1
+        elif reason == "no manifest":
+            unmanaged.append(product_id)
+        else:
+            stale.append((product_id, product, reason))
+    if limit is not None:
+        stale = stale[:limit]
+
+    base_url = _backend_url(request)
+    semaphore = asyncio.Semaphore(AR_REBUILD_CONCURRENCY)
+
+    async def rebuild(product_id: str, product: dict, reason: str) -> dict:
+        result = {"id": product_id, "reason": reason}
+        if dry_run:
+            return result
+        async with semaphore:
+            try:
+                built = await rebuild_ar_model(product_id, product, base_url)
+                result.update(success=True, generator=built["generator"])
+            except FileNotFoundError:
+                result.update(success=False, error="Source image not found")
+            except HTTPException as e:
+                result.update(success=False, error=e.detail)
+            except Exception as e:
+                logger.exception("AR rebuild failed", extra={"product_id": product_id})
+                result.update(success=False, error=str(e))
+        return result
+
+    results = await asyncio.gather(*(rebuild(*entry) for entry in stale))
+    logger.info("AR rebuild", extra={"current": current, "stale": len(stale), "unmanaged": len(unmanaged),
+                                     "dry_run": dry_run, "failed": sum(1 for r in results if r.get("success") is False)})
+    return {
+        "dry_run": dry_run,
+        "current": current,
+        "stale": len(stale),
+        "rebuilt": sum(1 for r in results if r.get("success")),
+        "unmanaged": unmanaged,
+        "results": results,
+    }
 
 
 # -----------------------------------
@@ -509,133 +724,207 @@ async def get_expensive_products():
 # -----------------------------------
 # Recommendation Endpoint
 # -----------------------------------
-@router.post("/recommend", response_model=RecommendationResponse)
-async def personalized_recommendation(req: RecommendationRequest):
-    user_prompt = req.userPrompt.lower()
-    user_preferences = req.userPreferences
-    user_history = req.userHistory or []
+# "keyword" (substring scoring) or "semantic" (embedding similarity)
+RECOMMENDATION_ENGINE = os.getenv("RECOMMENDATION_ENGINE", "keyword")
+
+@router.post("/recommend", response_model=RecommendationResponse, response_class=FastJSONResponse)
+async def recommend_endpoint(req: RecommendationRequest, request: Request, engine: Optional[str] = None,
+                             rerank: Optional[bool] = None):
+    result = await personalized_recommendation(req, engine, rerank)
+    # Products are validated and encoded once per catalog version, not per response
+    body = encode_recommendations(result, id(products))
+    # Results depend on the user's profile and the reranker, so the validator is the body itself
+    etag = weak_etag(body.data)
+    if not_modified(request, etag):
+        return not_modified_response(etag, RECOMMEND_CACHE_CONTROL)
+    return FastJSONResponse(body, headers=cache_headers(etag, RECOMMEND_CACHE_CONTROL))
+
+
+async def personalized_recommendation(req: RecommendationRequest, engine: Optional[str] = None,
+                                      rerank: Optional[bool] = None) -> dict:
+    # Price, category, artisan, region, occasion and color mentions in the prompt
+    parsed = get_query_parser(products).parse(req.userPrompt)
+    # Stored profile for userId plus the request's userHistory
+    profile = personalization.profile_for_request(req.userId, req.userHistory, get_facet_index(products).get)
+
+    # Two-stage mode: retrieve the top N, then let Gemini reorder them within a deadline
+    use_rerank = RECOMMENDATION_RERANK if rerank is None else rerank
     max_results = req.maxResults or 5
-    exclude_products = req.excludeProducts or []
-
-    available_products = [p for p in products if p["id"] not in exclude_products]
-
-    if user_preferences and user_preferences.categories:
-        available_products = [
-            p for p in available_products
-            if any(cat.lower() in p["category"].lower() for cat in user_preferences.categories)
-        ]
-
-    if user_preferences and user_preferences.priceRange:
-        min_price = user_preferences.priceRange.min
-        max_price = user_preferences.priceRange.max
-        available_products = [
-            p for p in available_products if min_price <= p["price"] <= max_price
-        ]
-
-    if user_preferences and user_preferences.preferredArtisans:
-        available_products = [
-            p for p in available_products
-            if any(artisan.lower() in p["artisan"].lower() for artisan in user_preferences.preferredArtisans)
-        ]
-
-    recommended_products = []
-    for p in available_products:
-        score = 0.6
-        if any(word in p["name"].lower() for word in user_prompt.split()):
-            score += 0.1
-        if any(word in p["category"].lower() for word in user_prompt.split()):
-            score += 0.1
-        if any(word in p.get("aiHint", "").lower() for word in user_prompt.split()):
-            score += 0.1
-        recommended_products.append({**p, "relevanceScore": min(score, 1.0)})
-
-    recommended_products = sorted(
-        recommended_products, key=lambda x: x["relevanceScore"], reverse=True
-    )[:max_results]
+    stage_req = req.model_copy(update={"maxResults": max(max_results, RERANK_TOP_N)}) if use_rerank else req
+
+    if (engine or RECOMMENDATION_ENGINE) == "semantic":
+        result = semantic_recommendations(stage_req, products, parsed, profile)
+    else:
+        result = keyword_recommendations(stage_req, products, parsed, profile)
+    if use_rerank:
+        with span("rerank"):
+            result = await rerank_response(req.userPrompt, result, max_results)
+    return result
+
+
+@router.post("/events")
+async def record_user_event(event: UserEvent):
+    """Update the user's preference profile with a view/click/favorite/cart/purchase"""
+    product = get_facet_index(products).get(event.productId) or products_store.get(event.productId)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Draft documents keep price as a {min, max} range
+    product = {**product, "price": ann.product_price(product)}
+    personalization.record_event(event.userId, product, event.kind, event.timestamp)
+    return {"status": "recorded"}
 
-    return {
-        "products": recommended_products,
-        "reasoning": "Products selected based on keyword matching and user preferences.",
-        "confidence": 0.7,
-        "categories": list({p["category"] for p in recommended_products}),
-        "suggestedFilters": {}
-    }
 
 products_store = {}  # fallback in-memory store
+listing_fragments = FragmentCache(int(os.getenv("PRODUCT_FRAGMENT_CACHE_SIZE", "50000")))
+
+@router.get("/products", response_class=FastJSONResponse)
+async def get_products(request: Request):
+    # Checked before touching Firestore, so revalidations cost no reads
+    etag = catalog_version.etag("products")
+    if not_modified(request, etag):
+        return not_modified_response(etag, PRODUCTS_CACHE_CONTROL)
+    headers = cache_headers(etag, PRODUCTS_CACHE_CONTROL)
 
-@router.get("/products")
-async def get_products():
     if not db:
-        return list(products_store.values())
+        return FastJSONResponse(list(products_store.values()), headers=headers)
 
     products_ref = db.collection("products").where("status", "==", "published")
     docs = products_ref.stream()
 
-    products = []
-    for doc in docs:
-        data = doc.to_dict()
-
-        # Handle price flexibly
-        price = None
-        if "finalPrice" in data:
-            price = data["finalPrice"]
-        elif isinstance(data.get("price"), dict):
-            price = data["price"].get("min")
-        elif isinstance(data.get("price"), (int, float)):
-            price = data["price"]
-
-        products.append({
-            "id": doc.id,
-            "name": data.get("title"),
-            "price": price,
-            "category": data.get("category"),
-            "artisan": data.get("artisan", "Unknown"),
-            "image": data.get("image_url", "/images/placeholder.png"),
-            "description": data.get("description") or data.get("story", ""),
-        })
+    # A listing is re-encoded only when its document's update_time changes
+    return FastJSONResponse(RawJSON(json_array(
+        listing_fragments.get(("listing", doc.id), doc.update_time,
+                              lambda doc=doc: fastjson.dumps(_listing_from_doc(doc.id, doc.to_dict())))
+        for doc in docs
+    )), headers=headers)
+
+
+def _listing_from_doc(product_id: str, data: dict) -> dict:
+    """Shape a Firestore product document as a marketplace listing."""
+    # Handle price flexibly
+    price = None
+    if "finalPrice" in data:
+        price = data["finalPrice"]
+    elif isinstance(data.get("price"), dict):
+        price = data["price"].get("min")
+    elif isinstance(data.get("price"), (int, float)):
+        price = data["price"]
 
-    return products
+    return {
+        "id": product_id,
+        "name": data.get("title"),
+        "price": price,
+        "category": data.get("category"),
+        "artisan": data.get("artisan", "Unknown"),
+        "image": data.get("image_url", "/images/placeholder.png"),
+        "description": data.get("description") or data.get("story", ""),
+    }
+
+
+@router.get("/products/{product_id}/similar")
+async def get_similar_products(product_id: str, k: int = 4):
+    """Nearest neighbours of a product by category, materials, techniques, price and text"""
+    similar = ann.similar_products(product_id, max(1, min(k, 50)))
+    if similar is None:
+        raise HTTPException(status_code=404, detail=f"Product {product_id} is not in the similarity index")
+    return {"productId": product_id, "products": similar}
 
 
 # -----------------------------------
 # Image Upload Endpoint (Firebase-free alternative)
 # -----------------------------------
+def _backend_url(request: Request) -> str:
+    host = request.headers.get("host", "localhost:9079")
+    if "onrender.com" in host or "railway.app" in host or "herokuapp.com" in host:
+        return f"https://{host}"
+    return os.getenv("BACKEND_URL", f"http://{host}")
+
+
+@router.post("/upload_url")
+async def create_upload_url(body: UploadUrlRequest, request: Request):
+    """
+    Time-limited URL the client PUTs the image to directly (GCS signed URL,
+    or /direct_upload without a bucket); then POST the key to /upload_complete.
+    """
+    return uploads.create_upload(bucket, _backend_url(request), body.contentType, body.size)
+
+
+@router.put("/direct_upload/{filename}")
+async def direct_upload(filename: str, request: Request, expires: int, max_bytes: int, sig: str):
+    """Local stand-in for a signed bucket URL; the body is streamed to disk."""
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    uploads.verify_local(filename, content_type, expires, max_bytes, sig)
+    with span("upload_stream"):
+        size = await uploads.receive_local(request, filename, max_bytes)
+    return {"key": filename, "size": size}
+
+
+@router.post("/upload_complete")
+async def upload_complete(body: UploadCompleteRequest, request: Request):
+    """Confirm a direct upload; the image is normalized in the background."""
+    result = await uploads.complete_upload(bucket, _backend_url(request), body.key)
+    logger.info("Direct upload completed", extra={"key": body.key, "url": result["imageUrl"]})
+    return {"success": True, **result}
+
+
 @router.post("/upload_image")
 async def upload_image(file: UploadFile, request: Request):
     """
     Upload image to backend storage (no Firebase needed)
-    Returns a URL that can be accessed via the backend
+    Returns a URL that can be accessed via the backend.
+    Prefer /upload_url for large images: they then bypass the API entirely.
     """
     try:
-        # Create uploads directory if it doesn't exist
-        uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
-        os.makedirs(uploads_dir, exist_ok=True)
-        
         # Generate unique filename
         import uuid
         file_ext = os.path.splitext(file.filename)[1]
         unique_filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = os.path.join(uploads_dir, unique_filename)
-        
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
         
-        # Generate URL
-        host = request.headers.get("host", "localhost:9079")
-        if "onrender.com" in host or "railway.app" in host or "herokuapp.com" in host:
-            backend_url = f"https://{host}"
-        else:
-            backend_url = os.getenv("BACKEND_URL", f"http://{host}")
+        # Save file (copied from the spooled upload, not read into memory)
+        tmp_path = uploads_store.temp_path()
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+        uploads_store.adopt(unique_filename, tmp_path, file.content_type)
         
-        image_url = f"{backend_url}/uploads/{unique_filename}"
+        image_url = f"{_backend_url(request)}/uploads/{unique_filename}"
         
-        print(f"✅ Image uploaded: {unique_filename}")
-        print(f"🔗 Image URL: {image_url}")
+        logger.info("Image uploaded", extra={"stored_filename": unique_filename, "url": image_url})
         
         return {"success": True, "imageUrl": image_url, "filename": unique_filename}
         
     except Exception as e:
-        print(f"❌ Image upload failed: {str(e)}")
+        logger.exception("Image upload failed")
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+
+
+def _similar_catalog() -> Tuple[List[dict], bool]:
+    """Every product /products/{id}/similar may return, and whether the list is complete."""
+    catalog = list(products) + [p for p in products_store.values() if p.get("status") == "published"]
+    if not db:
+        return catalog, True
+    try:
+        for doc in db.collection("products").where("status", "==", "published").stream():
+            data = doc.to_dict()
+            catalog.append({**_listing_from_doc(doc.id, data), "materials": data.get("materials"),
+                            "technique": data.get("technique")})
+    except Exception as e:
+        # Without Firestore's products, absent ids are not proof of deletion
+        logger.warning("Could not list published products for the similarity index", extra={"error": str(e)})
+        return catalog, False
+    return catalog, True
+
+
+# Load the persisted similar-product index and re-sync it with the catalog:
+# new and edited products are (re)featurized, deleted or unpublished ones dropped
+ann.get_similar_index(*_similar_catalog())
+
+
+def _all_products():
+    """Every product document (drafts included), to seed blob store references before GC"""
+    yield from list(products_store.items())
+    if db:
+        for doc in db.collection("products").stream():
+            yield doc.id, doc.to_dict()
+
+
+set_ref_source(_all_products)
@@ -6,6 +6,9 @@ import google.generativeai as genai
 import os
 import json
 import re
+from src.ai.llm import note_fallback
+from src.ai.router import generate
+from src.ai.resilience import LLMUnavailableError
 
 # Configure Gemini
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -37,9 +40,11 @@ async def ai_estimate_price(
     }}
     """
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
-    text = response.text.strip()
+    try:
+        text = (await generate(prompt, flow="estimate_price")).strip()
+    except LLMUnavailableError:
+        note_fallback("estimate_price")
+        return heuristic_price_estimate(input)
 
     # Clean JSON (strip ```json fences if present)
     cleaned = re.sub(r"^```(?:json)?|```$", "", text, flags=re.MULTILINE).strip()
@@ -59,6 +64,22 @@ async def ai_estimate_price(
     )
 
 
+# Fallback used while Gemini is unavailable: price the artisan's time
+HOURLY_RATE_RANGE = (150, 300)  # INR per artisan hour
+
+
+def heuristic_price_estimate(input: PriceEstimationInput) -> PriceEstimationOutput:
+    hours = max(input.artisan_hours, 1)
+    return PriceEstimationOutput(
+        minPrice=hours * HOURLY_RATE_RANGE[0],
+        maxPrice=hours * HOURLY_RATE_RANGE[1],
+        reasoning=(
+            f"Estimated from {hours} artisan hours at ₹{HOURLY_RATE_RANGE[0]}–₹{HOURLY_RATE_RANGE[1]} per hour "
+            "because the AI pricing assistant is temporarily unavailable."
+        ),
+    )
+
+
 async def generate_price_estimation(
     input: PriceEstimationInput,
 ) -> PriceEstimationOutput:
@@ -8,6 +8,9 @@ import google.generativeai as genai
 import os
 import json
 import re
+from src.ai.llm import note_fallback
+from src.ai.router import generate
+from src.ai.resilience import LLMUnavailableError
 
 # Configure Gemini
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -36,9 +39,11 @@ async def ai_generate_product_story(
     }}
     """
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
-    text = response.text.strip()
+    try:
+        text = (await generate(prompt, flow="generate_product_story")).strip()
+    except LLMUnavailableError:
+        note_fallback("generate_product_story")
+        return template_product_story(input)
 
     # Clean JSON (remove ```json fences if present)
     cleaned = re.sub(r"^```(?:json)?|```$", "", text, flags=re.MULTILINE).strip()
@@ -57,6 +62,18 @@ async def ai_generate_product_story(
     )
 
 
+# Fallback used while Gemini is unavailable, in the spirit of the mock flows
+def template_product_story(input: ProductStorytellingInput) -> ProductStorytellingOutput:
+    story = (
+        f"{input.productTitle} is handcrafted by a skilled artisan using time-honoured techniques. "
+        f"{input.productDescription} Every piece is made by hand in small batches, so no two are exactly alike, "
+        f"and your purchase directly supports the artisan and their craft community."
+    )
+    words = [w.strip(".,!?").lower() for w in input.productTitle.split() if len(w) > 3]
+    tags = list(dict.fromkeys(words + ["handmade", "artisan", "indian crafts", "sustainable"]))[:5]
+    return ProductStorytellingOutput(creativeStory=story, seoTags=tags)
+
+
 async def generate_product_story(
     input: ProductStorytellingInput,
 ) -> ProductStorytellingOutput:
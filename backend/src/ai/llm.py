@@ -1,13 +1,210 @@
 import os
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from src.ai.resilience import (
+    CircuitBreaker, LatencyTracker, LLMMetrics, LLMUnavailableError, RetryPolicy, is_retryable
+)
+from src.lib.logger import get_logger
+
 load_dotenv()
 
+logger = get_logger("llm")
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Per-attempt timeout and overall deadline (seconds) for a single generate_text call
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "20"))
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "45"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+# Hedging sends a second request once the first exceeds the model's p95 latency
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+_retry_policy = RetryPolicy(max_attempts=LLM_MAX_ATTEMPTS)
+_breakers: Dict[str, CircuitBreaker] = {}
+_model_latency: Dict[str, LatencyTracker] = {}
+_flow_metrics: Dict[str, LLMMetrics] = {}
+_model_outcomes: Dict[str, Deque[bool]] = {}  # recent attempt outcomes per model (True = ok)
+
+
 def setup_llm():
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable not set.")
     genai.configure(api_key=api_key)
-    ai = genai.GenerativeModel("gemini-2.5-flash")
-    return ai
\ No newline at end of file
+    ai = genai.GenerativeModel(DEFAULT_MODEL)
+    return ai
+
+
+def _breaker(model_name: str) -> CircuitBreaker:
+    if model_name not in _breakers:
+        _breakers[model_name] = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET_S)
+    return _breakers[model_name]
+
+
+def _latency(model_name: str) -> LatencyTracker:
+    return _model_latency.setdefault(model_name, LatencyTracker())
+
+
+def _metrics(flow: str) -> LLMMetrics:
+    return _flow_metrics.setdefault(flow, LLMMetrics())
+
+
+def _record_outcome(model_name: str, ok: bool):
+    _model_outcomes.setdefault(model_name, deque(maxlen=100)).append(ok)
+
+
+def model_health(model_name: str) -> Dict[str, Any]:
+    """Recent p95 latency, error rate and breaker state for one model."""
+    outcomes = _model_outcomes.get(model_name, ())
+    p95 = _latency(model_name).percentile(0.95)
+    breaker = _breakers.get(model_name)
+    return {
+        "samples": len(outcomes),
+        "error_rate": (outcomes.count(False) / len(outcomes)) if outcomes else 0.0,
+        "p95_ms": p95 * 1000 if p95 is not None else None,
+        "breaker_open": breaker is not None and breaker.state == CircuitBreaker.OPEN,
+    }
+
+
+def _call_model(model_name: str, contents: Any, generation_config: Optional[dict]) -> str:
+    model = genai.GenerativeModel(model_name)
+    response = model.generate_content(contents, generation_config=generation_config)
+    return response.text
+
+
+def _hedge_delay(model_name: str) -> Optional[float]:
+    tracker = _latency(model_name)
+    if not LLM_HEDGING or len(tracker) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    return tracker.percentile(0.95)
+
+
+async def _attempt(model_name: str, contents: Any, generation_config: Optional[dict], metrics: LLMMetrics,
+                   timeout: float = LLM_TIMEOUT_S) -> str:
+    """One logical attempt: the primary call, plus a hedge if it runs past p95."""
+    # The SDK is synchronous; run it off the event loop. A timed-out thread
+    # finishes in the background, but its result is discarded.
+    primary = asyncio.ensure_future(asyncio.to_thread(_call_model, model_name, contents, generation_config))
+    hedge_after = _hedge_delay(model_name)
+    if hedge_after is None or hedge_after >= timeout:
+        return await asyncio.wait_for(primary, timeout=timeout)
+
+    started = time.monotonic()
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    metrics.hedges_launched += 1
+    hedge = asyncio.ensure_future(asyncio.to_thread(_call_model, model_name, contents, generation_config))
+    pending = {primary, hedge}
+    last_error: Optional[BaseException] = None
+    while pending:
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                if task is hedge:
+                    metrics.hedges_won += 1
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            last_error = task.exception()
+    for other in pending:
+        other.cancel()
+    raise last_error or asyncio.TimeoutError()
+
+
+async def generate_text(
+    contents: Any,
+    flow: str,
+    model_name: str = DEFAULT_MODEL,
+    generation_config: Optional[dict] = None,
+) -> str:
+    """
+    Call Gemini with retries (exponential backoff + jitter), optional hedging
+    and a per-model circuit breaker. Raises LLMUnavailableError when the model
+    cannot answer in time so callers can fall back; non-retryable errors
+    (bad input, safety blocks) propagate unchanged.
+    """
+    metrics = _metrics(flow)
+    metrics.calls += 1
+    breaker = _breaker(model_name)
+    deadline = time.monotonic() + LLM_DEADLINE_S
+    last_error: Optional[BaseException] = None
+
+    for attempt in range(1, _retry_policy.max_attempts + 1):
+        # A late attempt only gets what is left of the overall deadline
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if not breaker.allow():
+            metrics.breaker_rejections += 1
+            metrics.failures += 1
+            raise LLMUnavailableError(f"{model_name} circuit breaker is open")
+
+        started = time.monotonic()
+        try:
+            text = await _attempt(model_name, contents, generation_config, metrics,
+                                  timeout=min(LLM_TIMEOUT_S, remaining))
+        except Exception as e:
+            if not is_retryable(e):
+                # The upstream answered, so it is healthy; the request itself is bad
+                breaker.record_success()
+                metrics.failures += 1
+                raise
+            breaker.record_failure()
+            _record_outcome(model_name, False)
+            last_error = e
+            delay = _retry_policy.backoff(attempt)
+            logger.warning(
+                "LLM call failed",
+                extra={"flow": flow, "model": model_name, "attempt": attempt, "error": repr(e)},
+            )
+            if attempt == _retry_policy.max_attempts or time.monotonic() + delay >= deadline:
+                break
+            metrics.retries += 1
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled (client gone, caller's deadline): no verdict on the upstream,
+            # but a half-open trial must not stay claimed forever
+            breaker.release()
+            metrics.failures += 1
+            raise
+
+        elapsed = time.monotonic() - started
+        breaker.record_success()
+        _record_outcome(model_name, True)
+        _latency(model_name).record(elapsed)
+        metrics.latency.record(elapsed)
+        metrics.successes += 1
+        return text
+
+    metrics.failures += 1
+    raise LLMUnavailableError(f"{model_name} unavailable for {flow}: {last_error!r}") from last_error
+
+
+def note_fallback(flow: str):
+    """Record that a flow served its heuristic fallback instead of an LLM answer."""
+    _metrics(flow).fallbacks += 1
+    logger.warning("Serving fallback response", extra={"flow": flow})
+
+
+def llm_stats() -> Dict[str, Any]:
+    return {
+        "flows": {flow: metrics.as_dict() for flow, metrics in _flow_metrics.items()},
+        "breakers": {
+            model: {"state": breaker.state, "consecutive_failures": breaker.consecutive_failures}
+            for model, breaker in _breakers.items()
+        },
+    }
@@ -0,0 +1,164 @@
+# backend/src/ai/resilience.py
+"""
+Resilience primitives for upstream LLM calls.
+
+- RetryPolicy: exponential backoff with full jitter for retryable errors.
+- CircuitBreaker: fast-fails calls while the upstream is unhealthy.
+- LatencyTracker: rolling latency window used for p95-based hedging delays.
+- LLMMetrics: counters exposed on /debug/llm.
+- is_retryable: classifies Gemini / transport errors.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+try:
+    from google.api_core import exceptions as gexc
+    _RETRYABLE_TYPES = (
+        gexc.TooManyRequests,
+        gexc.ResourceExhausted,
+        gexc.ServiceUnavailable,
+        gexc.InternalServerError,
+        gexc.DeadlineExceeded,
+        gexc.GatewayTimeout,
+    )
+except ImportError:  # google-api-core is pulled in by google-generativeai
+    _RETRYABLE_TYPES = ()
+
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the LLM cannot answer (breaker open, retries or deadline exhausted)."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, _RETRYABLE_TYPES):
+        return True
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_CODES
+
+
+# ---------------------------
+# Retry
+# ---------------------------
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+
+# ---------------------------
+# Circuit breaker
+# ---------------------------
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, where a single trial call decides
+    whether to close again or re-open.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """The call ended without an outcome (e.g. cancelled); let another caller take the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# ---------------------------
+# Latency & metrics
+# ---------------------------
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+
+@dataclass
+class LLMMetrics:
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    hedges_launched: int = 0
+    hedges_won: int = 0
+    breaker_rejections: int = 0
+    fallbacks: int = 0
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+
+    def as_dict(self) -> Dict[str, object]:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges_launched": self.hedges_launched,
+            "hedges_won": self.hedges_won,
+            "breaker_rejections": self.breaker_rejections,
+            "fallbacks": self.fallbacks,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
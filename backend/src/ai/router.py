@@ -0,0 +1,168 @@
+# backend/src/ai/router.py
+"""
+Model tiering for Gemini flows.
+
+- choose_model: picks the fast or heavy model for a request from the flow's
+  policy, the input size, the latency budget and the models' recent health.
+- generate: routed replacement for llm.generate_text used by the flows.
+- Shadow mode: a sampled fraction of requests also runs on the other tier in
+  the background so the two can be compared on latency and agreement.
+
+Policies can be overridden with the MODEL_POLICIES env var (JSON), e.g.
+  {"generate_product_story": {"heavy_input_chars": 800, "shadow_rate": 0.05}}
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.ai.llm import generate_text, model_health
+from src.lib.logger import get_logger
+
+logger = get_logger("router")
+
+MODEL_TIERS = {
+    "fast": os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash"),
+    "heavy": os.getenv("GEMINI_HEAVY_MODEL", "gemini-2.5-pro"),
+}
+
+
+@dataclass
+class ModelPolicy:
+    default_tier: str = "fast"
+    heavy_input_chars: Optional[int] = None    # longer inputs are promoted to the heavy tier
+    latency_budget_ms: Optional[float] = None  # skip tiers whose recent p95 exceeds this
+    max_error_rate: float = 0.25               # skip tiers failing more often than this
+    shadow_rate: float = 0.0                   # fraction of calls also run on the other tier
+
+
+DEFAULT_POLICIES: Dict[str, ModelPolicy] = {
+    "classify_product": ModelPolicy(latency_budget_ms=5000),
+    "estimate_price": ModelPolicy(latency_budget_ms=8000),
+    "generate_product_story": ModelPolicy(heavy_input_chars=1500, latency_budget_ms=10000),
+    "recommend": ModelPolicy(default_tier="heavy", latency_budget_ms=3000),
+}
+
+
+def _load_policies() -> Dict[str, ModelPolicy]:
+    policies = {name: ModelPolicy(**asdict(p)) for name, p in DEFAULT_POLICIES.items()}
+    raw = os.getenv("MODEL_POLICIES")
+    if not raw:
+        return policies
+    try:
+        for name, values in json.loads(raw).items():
+            base = asdict(policies.get(name, ModelPolicy()))
+            base.update(values)
+            policies[name] = ModelPolicy(**base)
+    except (ValueError, TypeError) as e:
+        logger.warning("Ignoring invalid MODEL_POLICIES", extra={"error": str(e)})
+    return policies
+
+
+_policies = _load_policies()
+_route_counts: Dict[str, Dict[str, int]] = {}
+_shadow_stats: Dict[str, Dict[str, float]] = {}
+_shadow_tasks: Set[asyncio.Task] = set()
+
+
+def get_policy(flow: str) -> ModelPolicy:
+    return _policies.get(flow, ModelPolicy())
+
+
+def input_size(contents: Any) -> int:
+    """Characters of text in a prompt (inline images are not counted)."""
+    if isinstance(contents, str):
+        return len(contents)
+    if isinstance(contents, (list, tuple)):
+        return sum(len(part) for part in contents if isinstance(part, str))
+    return 0
+
+
+def _other(tier: str) -> str:
+    return "heavy" if tier == "fast" else "fast"
+
+
+def choose_model(flow: str, input_chars: int = 0, latency_budget_ms: Optional[float] = None) -> Tuple[str, str]:
+    """Returns (model name, reason) for one request."""
+    policy = get_policy(flow)
+    tier = policy.default_tier
+    reason = "default"
+    if policy.heavy_input_chars and input_chars > policy.heavy_input_chars:
+        tier, reason = "heavy", "large_input"
+
+    budget = latency_budget_ms if latency_budget_ms is not None else policy.latency_budget_ms
+    for candidate in (tier, _other(tier)):
+        health = model_health(MODEL_TIERS[candidate])
+        if health["breaker_open"]:
+            reason = f"{candidate}_breaker_open"
+            continue
+        if health["samples"] >= 10 and health["error_rate"] > policy.max_error_rate:
+            reason = f"{candidate}_error_rate"
+            continue
+        if budget and health["p95_ms"] is not None and health["p95_ms"] > budget:
+            reason = f"{candidate}_over_budget"
+            continue
+        return MODEL_TIERS[candidate], reason if candidate == tier else f"fallback:{reason}"
+    # Nothing looks healthy; stay on the preferred tier and let the breaker decide
+    return MODEL_TIERS[tier], f"degraded:{reason}"
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+async def _shadow(flow: str, contents: Any, model_name: str, primary_text: str, primary_ms: float):
+    started = time.monotonic()
+    try:
+        text = await generate_text(contents, flow=f"{flow}:shadow", model_name=model_name)
+    except Exception as e:
+        logger.info("Shadow call failed", extra={"flow": flow, "model": model_name, "error": repr(e)})
+        return
+    shadow_ms = (time.monotonic() - started) * 1000
+    a, b = _tokens(primary_text), _tokens(text)
+    agreement = len(a & b) / len(a | b) if (a or b) else 1.0
+
+    stats = _shadow_stats.setdefault(flow, {"samples": 0, "primary_ms": 0.0, "shadow_ms": 0.0, "agreement": 0.0})
+    stats["samples"] += 1
+    n = stats["samples"]
+    for key, value in (("primary_ms", primary_ms), ("shadow_ms", shadow_ms), ("agreement", agreement)):
+        stats[key] += (value - stats[key]) / n  # running mean
+    logger.info(
+        "Shadow comparison",
+        extra={"flow": flow, "shadow_model": model_name, "primary_ms": round(primary_ms, 1),
+               "shadow_ms": round(shadow_ms, 1), "agreement": round(agreement, 3)},
+    )
+
+
+async def generate(contents: Any, flow: str, latency_budget_ms: Optional[float] = None,
+                   generation_config: Optional[dict] = None) -> str:
+    """Route a flow's prompt to a model tier and call it through the resilient LLM path."""
+    model_name, reason = choose_model(flow, input_size(contents), latency_budget_ms)
+    counts = _route_counts.setdefault(flow, {})
+    counts[f"{model_name} ({reason})"] = counts.get(f"{model_name} ({reason})", 0) + 1
+
+    started = time.monotonic()
+    text = await generate_text(contents, flow=flow, model_name=model_name, generation_config=generation_config)
+    primary_ms = (time.monotonic() - started) * 1000
+
+    policy = get_policy(flow)
+    if policy.shadow_rate > 0 and random.random() < policy.shadow_rate:
+        current_tier = next((t for t, m in MODEL_TIERS.items() if m == model_name), "fast")
+        task = asyncio.create_task(_shadow(flow, contents, MODEL_TIERS[_other(current_tier)], text, primary_ms))
+        _shadow_tasks.add(task)  # keep a reference until it finishes
+        task.add_done_callback(_shadow_tasks.discard)
+    return text
+
+
+def router_stats() -> Dict[str, Any]:
+    return {
+        "tiers": MODEL_TIERS,
+        "policies": {name: asdict(p) for name, p in _policies.items()},
+        "routes": _route_counts,
+        "shadow": {flow: {k: round(v, 3) for k, v in s.items()} for flow, s in _shadow_stats.items()},
+    }
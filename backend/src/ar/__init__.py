@@ -0,0 +1,2 @@
+# Make ar a package
+__version__ = "1.0.0"
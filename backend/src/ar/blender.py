@@ -0,0 +1,322 @@
+# backend/src/ar/blender.py
+"""
+Running Blender scripts headless for AR model generation.
+
+- find_blender: the Blender executable for this platform (BLENDER_PATH
+  overrides), or None when it is not installed.
+- run_blender: run a script from blender_scripts/ with arguments (inside a
+  .blend file when given) and check that it wrote its output file. Blender
+  runs as an asyncio subprocess, so the event loop keeps serving while it
+  works, and each run is bounded:
+    BLENDER_TIMEOUT_S        wall clock; on expiry the whole process group
+                             (Blender and anything it spawned) is killed
+    BLENDER_MEMORY_LIMIT_MB  address space (RLIMIT_AS)
+    BLENDER_CPU_LIMIT_S      CPU time (RLIMIT_CPU)
+    BLENDER_OUTPUT_LIMIT     bytes of stdout/stderr kept (the tail)
+  0 disables a limit. The rlimits are set on the started process with
+  prlimit (Linux); a preexec_fn is not safe in this multithreaded server.
+- blender_stats: runs, failures, timeouts, exit codes and latency per script.
+- script_version: content hash of scripts, so models built by an older
+  revision of them are detected as stale.
+- ensure_template: path of a prebuilt scene template (e.g. the canvas
+  frame with its UVs and material), building it with its build script the
+  first time. Jobs then only swap the texture and scale before export.
+  Templates are named by their build script's hash, so editing the script
+  builds a new one; `python -m src.ar.blender` prebuilds them (Dockerfile).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import platform
+import shutil
+import signal
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from src.ai.resilience import LatencyTracker
+from src.lib.logger import get_logger
+from src.lib.profiling import span
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = get_logger("blender")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+BLENDER_TIMEOUT_S = float(os.getenv("BLENDER_TIMEOUT_S", "120"))
+BLENDER_MEMORY_LIMIT_MB = int(os.getenv("BLENDER_MEMORY_LIMIT_MB", "8192"))
+BLENDER_CPU_LIMIT_S = int(os.getenv("BLENDER_CPU_LIMIT_S", "600"))  # summed over Blender's threads
+BLENDER_OUTPUT_LIMIT = int(os.getenv("BLENDER_OUTPUT_LIMIT", str(64 * 1024)))
+
+BLENDER_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                   "blender_scripts")
+BLENDER_TEMPLATE_DIR = os.getenv("BLENDER_TEMPLATE_DIR", os.path.join(BLENDER_SCRIPTS_DIR, "templates"))
+
+# template name -> script that builds it
+TEMPLATES = {"canvas": "build_canvas_template.py"}
+
+
+def find_blender() -> Optional[str]:
+    configured = os.getenv("BLENDER_PATH")
+    if configured:
+        return configured
+    system = platform.system()
+    if system == "Windows":
+        # Common Windows Blender installation paths
+        candidates = [
+            "C:\\Program Files\\Blender Foundation\\Blender 4.5\\blender.exe",
+            "C:\\Program Files\\Blender Foundation\\Blender 4.0\\blender.exe",
+            "C:\\Program Files\\Blender Foundation\\Blender 3.6\\blender.exe",
+            "C:\\Program Files\\Blender Foundation\\Blender\\blender.exe",
+        ]
+    elif system == "Darwin":  # macOS
+        candidates = ["/Applications/Blender.app/Contents/MacOS/Blender"]
+    else:  # Linux (including Docker containers)
+        candidates = [
+            "/usr/local/bin/blender",  # Docker symlink location
+            "/opt/blender/blender",    # Docker installation location
+        ]
+    found = next((p for p in candidates if os.path.exists(p)), None)
+    return found or shutil.which("blender")
+
+
+def script_version(*scripts: str) -> str:
+    digest = hashlib.sha256()
+    for script in scripts:
+        try:
+            with open(os.path.join(BLENDER_SCRIPTS_DIR, script), "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(f"missing:{script}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+@dataclass
+class BlenderMetrics:
+    runs: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    exit_codes: Counter = field(default_factory=Counter)
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+    max_s: float = 0.0
+
+    def record(self, seconds: float, returncode: Optional[int], timed_out: bool, ok: bool):
+        self.runs += 1
+        if ok:
+            self.successes += 1
+        else:
+            self.failures += 1
+        if timed_out:
+            self.timeouts += 1
+        # Negative codes are signals: -9 killed, -24 CPU limit (SIGXCPU)
+        self.exit_codes["timeout" if timed_out else str(returncode)] += 1
+        self.latency.record(seconds)
+        self.max_s = max(self.max_s, seconds)
+
+    def as_dict(self) -> Dict[str, object]:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            "runs": self.runs,
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "exit_codes": dict(self.exit_codes),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "max_ms": round(self.max_s * 1000, 1),
+        }
+
+
+_metrics: Dict[str, BlenderMetrics] = {}
+_running = 0
+
+
+def blender_stats() -> Dict[str, object]:
+    return {
+        "running": _running,
+        "limits": {"timeout_s": BLENDER_TIMEOUT_S, "memory_mb": BLENDER_MEMORY_LIMIT_MB,
+                   "cpu_s": BLENDER_CPU_LIMIT_S, "output_bytes": BLENDER_OUTPUT_LIMIT},
+        "scripts": {script: metrics.as_dict() for script, metrics in _metrics.items()},
+    }
+
+
+# ---------------------------
+# Running Blender
+# ---------------------------
+def _set_limit(pid: int, kind: int, soft: int, hard: int):
+    # Never above a hard limit inherited from the container or shell
+    _, current_hard = resource.prlimit(pid, kind)
+    if current_hard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    resource.prlimit(pid, kind, (soft, hard))
+
+
+def _limit_resources(pid: int):
+    """Apply the memory and CPU limits to a started Blender process."""
+    if not hasattr(resource, "prlimit"):
+        return  # not Linux; only the wall-clock timeout applies
+    try:
+        if BLENDER_MEMORY_LIMIT_MB > 0:
+            limit = BLENDER_MEMORY_LIMIT_MB * 1024 * 1024
+            _set_limit(pid, resource.RLIMIT_AS, limit, limit)
+        if BLENDER_CPU_LIMIT_S > 0:
+            # SIGXCPU at the soft limit, SIGKILL at the hard one
+            _set_limit(pid, resource.RLIMIT_CPU, BLENDER_CPU_LIMIT_S, BLENDER_CPU_LIMIT_S + 5)
+    except (OSError, ValueError) as e:  # already exited, or the limit was refused
+        logger.warning("Could not limit Blender resources", extra={"pid": pid, "error": str(e)})
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int) -> str:
+    """Drain a pipe, keeping only its last `limit` bytes."""
+    tail = bytearray()
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:len(tail) - limit]
+    return tail.decode("utf-8", errors="replace")
+
+
+def _kill_group(process: asyncio.subprocess.Process):
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)  # the child leads its own session
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass  # already gone
+
+
+async def run_blender(script: str, args: List[str], output_path: str, blend_file: Optional[str] = None,
+                      timeout_s: float = BLENDER_TIMEOUT_S):
+    """Run blender_scripts/<script> with `args` after "--"; raises HTTPException on failure."""
+    global _running
+    blender_exe = find_blender()
+    if not blender_exe:
+        raise HTTPException(status_code=500, detail="Blender not found. Install Blender 4.x or add it to PATH")
+    script_path = os.path.join(BLENDER_SCRIPTS_DIR, script)
+    command = [blender_exe, "-b", *([blend_file] if blend_file else []), "-P", script_path, "--", *args]
+    logger.debug("Running Blender", extra={"blender": blender_exe, "script": script_path, "blender_args": args,
+                                           "blend_file": blend_file})
+
+    posix = resource is not None
+    started = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=posix,  # own process group, so a timeout kills Blender's children too
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail=f"Blender executable not found at: {blender_exe}")
+    if posix:
+        _limit_resources(process.pid)
+
+    _running += 1
+    timed_out = False
+    readers = asyncio.gather(_read_tail(process.stdout, BLENDER_OUTPUT_LIMIT),
+                             _read_tail(process.stderr, BLENDER_OUTPUT_LIMIT))
+    try:
+        with span("blender"):
+            try:
+                await asyncio.wait_for(process.wait(), timeout=timeout_s if timeout_s > 0 else None)
+            except asyncio.TimeoutError:
+                timed_out = True
+                _kill_group(process)
+                await process.wait()
+        try:
+            # A grandchild that left the process group could hold the pipes open
+            stdout, stderr = await asyncio.wait_for(readers, timeout=5)
+        except asyncio.TimeoutError:
+            stdout, stderr = "", ""
+    except BaseException:
+        # Cancelled (client gone, shutdown): don't leave Blender running
+        _kill_group(process)
+        readers.cancel()
+        readers.add_done_callback(lambda f: f.cancelled() or f.exception())  # nothing left to read
+        raise
+    finally:
+        _running -= 1
+
+    elapsed = time.perf_counter() - started
+    ok = not timed_out and process.returncode == 0 and os.path.exists(output_path)
+    _metrics.setdefault(script, BlenderMetrics()).record(elapsed, process.returncode, timed_out, ok)
+    log_extra = {"script": script, "returncode": process.returncode, "duration_ms": round(elapsed * 1000, 1)}
+
+    if timed_out:
+        logger.error("Blender timed out", extra={**log_extra, "timeout_s": timeout_s, "stderr": stderr})
+        raise HTTPException(status_code=504, detail=f"Blender timed out after {timeout_s:g}s")
+    if process.returncode != 0:
+        logger.error("Blender failed", extra={**log_extra, "stdout": stdout, "stderr": stderr})
+        raise HTTPException(status_code=500, detail=f"Blender failed: {(stderr or stdout)[-2000:]}")
+    # Blender output is only worth keeping when debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Blender output", extra={**log_extra, "stdout": stdout, "stderr": stderr})
+    else:
+        logger.info("Blender finished", extra=log_extra)
+
+    # Verify the output file was actually created
+    if not os.path.exists(output_path):
+        raise HTTPException(status_code=500, detail="GLB file was not generated by Blender")
+
+
+# ---------------------------
+# Scene templates
+# ---------------------------
+_template_locks: Dict[str, asyncio.Lock] = {}
+
+
+def template_path(name: str) -> str:
+    return os.path.join(BLENDER_TEMPLATE_DIR, f"{name}_template-{script_version(TEMPLATES[name])}.blend")
+
+
+async def ensure_template(name: str) -> str:
+    """Path of the named template, built on first use."""
+    path = template_path(name)
+    if os.path.exists(path):
+        return path
+    async with _template_locks.setdefault(name, asyncio.Lock()):
+        if not os.path.exists(path):
+            os.makedirs(BLENDER_TEMPLATE_DIR, exist_ok=True)
+            # Built under a temporary name so other workers never open a half-written file
+            tmp_path = f"{path[:-len('.blend')]}.{os.getpid()}.tmp.blend"
+            try:
+                with span("blender_template"):
+                    await run_blender(TEMPLATES[name], [tmp_path], tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+            # Templates of earlier script revisions are no longer used
+            prefix = f"{name}_template-"
+            for entry in os.listdir(BLENDER_TEMPLATE_DIR):
+                if (entry.startswith(prefix) and entry.endswith(".blend") and not entry.endswith(".tmp.blend")
+                        and entry != os.path.basename(path)):
+                    os.unlink(os.path.join(BLENDER_TEMPLATE_DIR, entry))
+            logger.info("Blender template built", extra={"template": name, "path": path})
+    return path
+
+
+if __name__ == "__main__":
+    # Prebuild every template, e.g. at image build time
+    for template in TEMPLATES:
+        print(asyncio.run(ensure_template(template)))
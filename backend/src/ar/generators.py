@@ -0,0 +1,318 @@
+# backend/src/ar/generators.py
+"""
+AR model generators, one per product category.
+
+- Generator: turns a product photo plus parameters derived from the product
+  (dimensions, title) into a GLB. `params` is computed from the product
+  document; `generate` writes the model. Bump `version` whenever a
+  generator's output changes, so /ar_models/rebuild picks up its models.
+- Procedural generators build the mesh in Python (see mesh.py) and run in
+  milliseconds:
+    canvas - framed picture with the photo on its face (paintings)
+    lathe  - vase or bowl revolved from a profile, glazed with the photo
+             (pottery)
+    drape  - hanging cloth with soft folds (textiles, saris)
+- blender-canvas: Blender, exporting the prebuilt canvas template with the
+  photo swapped in; used for paintings when AR_PAINTING_GENERATOR selects it
+  and Blender is installed.
+- generator_for: the generator for a product; categories without their own
+  fall back to AR_DEFAULT_GENERATOR. Category names are normalized first
+  (category_key), so the catalog's "Textiles" and the classifier's
+  "textile" pick the same generator.
+- parse_dimensions: "Height: 25cm, Width: 15cm" -> {"height": 0.25, ...}.
+"""
+
+import asyncio
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from src.ar.blender import ensure_template, find_blender, run_blender, script_version
+from src.ar.mesh import Mesh, mesh_to_glb, texture_from_image
+from src.lib.profiling import span
+
+# ---------------------------
+# Configuration
+# ---------------------------
+AR_PAINTING_GENERATOR = os.getenv("AR_PAINTING_GENERATOR", "blender-canvas")
+AR_DEFAULT_GENERATOR = os.getenv("AR_DEFAULT_GENERATOR", "canvas")
+CATEGORY_GENERATORS = {"painting": AR_PAINTING_GENERATOR, "pottery": "lathe", "textile": "drape"}
+# Other words for the categories above, after singularizing
+_CATEGORY_ALIASES = {"paint": "painting", "artwork": "painting", "canvas": "painting", "ceramic": "pottery",
+                     "fabric": "textile", "sari": "textile", "saree": "textile", "shawl": "textile"}
+
+# ---------------------------
+# Dimensions
+# ---------------------------
+_UNITS = {"mm": 0.001, "cm": 0.01, "m": 1.0, "in": 0.0254, "inch": 0.0254, "inches": 0.0254, '"': 0.0254,
+          "ft": 0.3048, "feet": 0.3048}
+_NAMED = re.compile(r"\b(height|width|length|depth|diameter|dia|h|w|l|d)\s*[:=]?\s*(\d+(?:\.\d+)?)\s*"
+                    r"(mm|cm|m|inches|inch|in|ft|feet|\")?", re.IGNORECASE)
+_TRIPLE = re.compile(r"(\d+(?:\.\d+)?)\s*[x×]\s*(\d+(?:\.\d+)?)(?:\s*[x×]\s*(\d+(?:\.\d+)?))?\s*"
+                     r"(mm|cm|m|inches|inch|in|ft|feet|\")?", re.IGNORECASE)
+_ALIASES = {"h": "height", "w": "width", "l": "length", "d": "diameter", "dia": "diameter"}
+
+
+def parse_dimensions(text) -> Dict[str, float]:
+    """Named dimensions in metres; "W x H [x D] unit" is read as width, height, depth. Units default to cm."""
+    if not isinstance(text, str) or not text:
+        return {}
+    dims = {}
+    for name, value, unit in _NAMED.findall(text):
+        name = _ALIASES.get(name.lower(), name.lower())
+        dims.setdefault(name, float(value) * _UNITS.get((unit or "cm").lower(), 0.01))
+    if not dims:
+        match = _TRIPLE.search(text)
+        if match:
+            scale = _UNITS.get((match.group(4) or "cm").lower(), 0.01)
+            dims["width"] = float(match.group(1)) * scale
+            dims["height"] = float(match.group(2)) * scale
+            if match.group(3):
+                dims["depth"] = float(match.group(3)) * scale
+    return {name: value for name, value in dims.items() if value > 0}
+
+
+# ---------------------------
+# Generators
+# ---------------------------
+class Generator:
+    name = "generator"
+    version = "1"
+
+    def params(self, product: dict, image_size: Tuple[int, int]) -> dict:
+        """Parameters for this product; together with the photo they determine the model."""
+        return {}
+
+    def build(self, image: Image.Image, params: dict) -> bytes:
+        raise NotImplementedError
+
+    async def generate(self, image_path: str, params: dict, output_path: str):
+        await asyncio.to_thread(self._generate, image_path, params, output_path)
+
+    def _generate(self, image_path: str, params: dict, output_path: str):
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img)
+            with span(f"generate_{self.name}"):
+                data = self.build(img, params)
+        with open(output_path, "wb") as f:
+            f.write(data)
+
+
+class CanvasGenerator(Generator):
+    """Framed picture: the photo on the front face, edges continuing it, centred on the origin."""
+
+    name = "canvas"
+    version = "1"
+
+    def params(self, product, image_size):
+        dims = parse_dimensions(product.get("dimensions"))
+        aspect = image_size[0] / image_size[1]
+        # Same default as the Blender script: longest side 1 m
+        width = dims.get("width") or (1.0 if aspect >= 1 else aspect)
+        return {"width": round(width, 4), "height": round(width / aspect, 4),
+                "depth": round(dims.get("depth", 0.05), 4)}
+
+    def build(self, image, params):
+        w, h, d = params["width"] / 2, params["height"] / 2, params["depth"]
+        mesh = Mesh()
+        # Front (z = 0, flush when hung) and back (z = -depth, mirrored)
+        front = [mesh.vertex((x, y, 0), (0, 0, 1), (u, v))
+                 for x, y, u, v in ((-w, -h, 0, 1), (w, -h, 1, 1), (w, h, 1, 0), (-w, h, 0, 0))]
+        mesh.quad(*front)
+        back = [mesh.vertex((x, y, -d), (0, 0, -1), (u, v))
+                for x, y, u, v in ((w, -h, 1, 1), (-w, -h, 0, 1), (-w, h, 0, 0), (w, h, 1, 0))]
+        mesh.quad(*back)
+        # Edges stretch the outermost row/column of pixels
+        sides = (
+            ((1, 0, 0), [(w, -h, 0, 1, 1), (w, -h, -d, 1, 1), (w, h, -d, 1, 0), (w, h, 0, 1, 0)]),
+            ((-1, 0, 0), [(-w, -h, -d, 0, 1), (-w, -h, 0, 0, 1), (-w, h, 0, 0, 0), (-w, h, -d, 0, 0)]),
+            ((0, 1, 0), [(-w, h, 0, 0, 0), (w, h, 0, 1, 0), (w, h, -d, 1, 0), (-w, h, -d, 0, 0)]),
+            ((0, -1, 0), [(-w, -h, -d, 0, 1), (w, -h, -d, 1, 1), (w, -h, 0, 1, 1), (-w, -h, 0, 0, 1)]),
+        )
+        for normal, corners in sides:
+            mesh.quad(*[mesh.vertex((x, y, z), normal, (u, v)) for x, y, z, u, v in corners])
+        texture, mime_type = texture_from_image(image)
+        return mesh_to_glb(mesh, texture, mime_type, name="Canvas", roughness=0.7)
+
+
+# Radius along the height (0 = base, 1 = rim) as a fraction of the widest point
+PROFILES: Dict[str, List[Tuple[float, float]]] = {
+    "vase": [(0.0, 0.55), (0.08, 0.8), (0.35, 1.0), (0.62, 0.72), (0.82, 0.42), (0.94, 0.44), (1.0, 0.52)],
+    "bowl": [(0.0, 0.5), (0.15, 0.7), (0.45, 0.9), (0.75, 0.98), (1.0, 1.0)],
+}
+
+
+def _profile_radius(points: List[Tuple[float, float]], t: float) -> float:
+    # Cosine interpolation keeps the silhouette smooth between control points
+    for (t0, r0), (t1, r1) in zip(points, points[1:]):
+        if t <= t1:
+            f = (1 - math.cos(math.pi * (t - t0) / (t1 - t0))) / 2
+            return r0 + (r1 - r0) * f
+    return points[-1][1]
+
+
+class LatheGenerator(Generator):
+    """Pottery revolved from a vase or bowl profile, standing on the origin."""
+
+    name = "lathe"
+    version = "1"
+    segments = 48
+    rings = 32
+
+    def params(self, product, image_size):
+        dims = parse_dimensions(product.get("dimensions"))
+        title = f"{product.get('title', '')} {product.get('name', '')}".lower()
+        height = dims.get("height")
+        diameter = dims.get("diameter") or dims.get("width")
+        if height is None and diameter is None:
+            height = 0.25
+        if height is None:
+            height = diameter * (0.45 if any(w in title for w in ("bowl", "plate", "dish")) else 1.6)
+        if diameter is None:
+            diameter = height * image_size[0] / image_size[1]
+        bowl = any(w in title for w in ("bowl", "plate", "dish")) or height < 0.6 * diameter
+        return {"profile": "bowl" if bowl else "vase", "height": round(height, 4), "diameter": round(diameter, 4)}
+
+    def _texture(self, image: Image.Image) -> Image.Image:
+        # The middle of the photo is the pot's body; mirror it so the wrap has no seam
+        width, height = image.size
+        strip = image.crop((int(width * 0.3), 0, int(width * 0.7), height))
+        wrapped = Image.new(strip.mode, (strip.width * 2, strip.height))
+        wrapped.paste(strip, (0, 0))
+        wrapped.paste(ImageOps.mirror(strip), (strip.width, 0))
+        return wrapped
+
+    def build(self, image, params):
+        points = PROFILES[params["profile"]]
+        height, radius = params["height"], params["diameter"] / 2
+        n, m = self.segments, self.rings
+        ts = [j / m for j in range(m + 1)]
+        radii = [radius * _profile_radius(points, t) for t in ts]
+        mesh = Mesh()
+        # Outer wall, top ring first so the grid's winding faces outwards
+        for j in range(m, -1, -1):
+            lo, hi = max(j - 1, 0), min(j + 1, m)
+            slope = (radii[hi] - radii[lo]) / ((ts[hi] - ts[lo]) * height)
+            for i in range(n + 1):
+                angle = 2 * math.pi * i / n
+                # Counter-clockwise seen from above is left-to-right seen from outside
+                x, z = math.sin(angle), math.cos(angle)
+                mesh.vertex((radii[j] * x, ts[j] * height, radii[j] * z), (x, -slope, z), (i / n, 1 - ts[j]))
+        mesh.grid(m, n, 0)
+        # Base
+        center = mesh.vertex((0, 0, 0), (0, -1, 0), (0.5, 1))
+        rim = [mesh.vertex((radii[0] * math.sin(2 * math.pi * i / n), 0, radii[0] * math.cos(2 * math.pi * i / n)),
+                           (0, -1, 0), (i / n, 1)) for i in range(n + 1)]
+        for i in range(n):
+            mesh.triangle(center, rim[i + 1], rim[i])
+        texture, mime_type = texture_from_image(self._texture(image))
+        # Open top: the inside is the back of the wall
+        return mesh_to_glb(mesh, texture, mime_type, name="Pottery", double_sided=True, roughness=0.35)
+
+
+class DrapeGenerator(Generator):
+    """Cloth hanging from a rail at the top, folds deepening towards the hem."""
+
+    name = "drape"
+    version = "1"
+    cols = 64
+    rows = 24
+
+    def params(self, product, image_size):
+        dims = parse_dimensions(product.get("dimensions"))
+        width = dims.get("width") or 1.0
+        # Long textiles (saris) hang folded: show at most twice the width
+        height = dims.get("length") or dims.get("height") or width * image_size[1] / image_size[0]
+        height = min(height, 2 * width)
+        return {"width": round(width, 4), "height": round(height, 4), "folds": max(3, round(width * 6)),
+                "depth": round(min(0.06, width * 0.03), 4)}
+
+    def build(self, image, params):
+        width, height, folds, depth = params["width"], params["height"], params["folds"], params["depth"]
+        k = 2 * math.pi * folds / width
+        mesh = Mesh()
+        for row in range(self.rows + 1):
+            v = row / self.rows
+            amplitude = depth * (0.3 + 0.7 * v)
+            for col in range(self.cols + 1):
+                u = col / self.cols
+                x = -width / 2 + width * u
+                z = amplitude * math.sin(k * x)
+                dzdx = amplitude * k * math.cos(k * x)
+                dzdy = -depth * 0.7 / height * math.sin(k * x)  # amplitude grows as y falls
+                mesh.vertex((x, height * (1 - v), z), (-dzdx, -dzdy, 1), (u, v))
+        mesh.grid(self.rows, self.cols, 0)
+        texture, mime_type = texture_from_image(image)
+        return mesh_to_glb(mesh, texture, mime_type, name="Textile", double_sided=True, roughness=0.85)
+
+
+class BlenderCanvasGenerator(Generator):
+    """
+    The canvas template (blender_scripts/build_canvas_template.py) with the
+    photo swapped in and scaled to its aspect ratio by render_canvas_template.py.
+    """
+
+    name = "blender-canvas"
+    # Editing either script makes the models built with it stale
+    version = script_version("build_canvas_template.py", "render_canvas_template.py")
+
+    def params(self, product, image_size):
+        return {}
+
+    async def generate(self, image_path, params, output_path):
+        template = await ensure_template("canvas")
+        await run_blender("render_canvas_template.py", [image_path, output_path], output_path, blend_file=template)
+
+
+# ---------------------------
+# Registry
+# ---------------------------
+GENERATORS: Dict[str, Generator] = {}
+
+
+def register(generator: Generator) -> Generator:
+    GENERATORS[generator.name] = generator
+    return generator
+
+
+for _generator in (CanvasGenerator(), LatheGenerator(), DrapeGenerator(), BlenderCanvasGenerator()):
+    register(_generator)
+
+
+def get_generator(name: str) -> Optional[Generator]:
+    generator = GENERATORS.get(name)
+    if generator is not None and generator.name == "blender-canvas" and find_blender() is None:
+        return GENERATORS["canvas"]  # same model, built without Blender
+    return generator
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def category_key(category) -> Optional[str]:
+    """CATEGORY_GENERATORS key for a category name ("Textiles", "Paintings & Art"), or None."""
+    if not isinstance(category, str):
+        return None
+    for word in re.findall(r"[a-z]+", category.lower()):
+        word = _singular(word)
+        word = _CATEGORY_ALIASES.get(word, word)
+        if word in CATEGORY_GENERATORS:
+            return word
+    return None
+
+
+def generator_for(product: dict) -> Generator:
+    """Generator for a product document; unknown categories get AR_DEFAULT_GENERATOR."""
+    category = category_key(product.get("category"))
+    if product.get("isPainting") or not product:
+        category = "painting"  # no document to go by: the original painting-only behaviour
+    name = CATEGORY_GENERATORS.get(category, AR_DEFAULT_GENERATOR)
+    return get_generator(name) or GENERATORS["canvas"]
@@ -0,0 +1,62 @@
+# backend/src/ar/manifest.py
+"""
+AR build manifests: a record of what produced a product's current model.
+
+Stored on the product document as `ar_manifest`:
+  image_sha256, image_size     the photo as uploaded and its pixel size
+  source_url                   the normalized photo kept for rebuilds
+  generator, generator_version, params
+  lod_sizes                    LOD variant sizes configured at build time
+  output_sha256, built_at
+
+- build_inputs: the input half of a manifest. A model whose recorded
+  inputs equal the current ones is up to date and is not rebuilt.
+- stale_reason: which input of a product's model no longer matches the
+  current generator, its version, the product's parameters or the LOD
+  configuration (None when it is current).
+- source_key: storage key of the normalized photo, addressed by its hash.
+"""
+
+from typing import Optional, Tuple
+
+from src.ar.generators import Generator, generator_for
+from src.lib.lod import LOD_TEXTURE_SIZES
+
+INPUT_FIELDS = ("image_sha256", "generator", "generator_version", "params", "lod_sizes")
+
+
+def source_key(image_sha256: str) -> str:
+    return f"{image_sha256}.png"
+
+
+def build_inputs(image_sha256: str, image_size: Tuple[int, int], generator: Generator, params: dict) -> dict:
+    return {
+        "image_sha256": image_sha256,
+        "image_size": list(image_size),
+        "generator": generator.name,
+        "generator_version": generator.version,
+        "params": params,
+        "lod_sizes": list(LOD_TEXTURE_SIZES),
+    }
+
+
+def is_current(manifest: Optional[dict], inputs: dict) -> bool:
+    return bool(manifest) and all(manifest.get(field) == inputs[field] for field in INPUT_FIELDS)
+
+
+def current_inputs(product: dict) -> Optional[dict]:
+    """Inputs a rebuild of the product's model would use now; None without a manifest."""
+    manifest = product.get("ar_manifest")
+    if not manifest or not manifest.get("image_sha256") or not manifest.get("image_size"):
+        return None
+    generator = generator_for(product)
+    image_size = tuple(manifest["image_size"])
+    return build_inputs(manifest["image_sha256"], image_size, generator, generator.params(product, image_size))
+
+
+def stale_reason(product: dict) -> Optional[str]:
+    inputs = current_inputs(product)
+    if inputs is None:
+        return "no manifest"
+    manifest = product["ar_manifest"]
+    return next((field for field in INPUT_FIELDS if manifest.get(field) != inputs[field]), None)
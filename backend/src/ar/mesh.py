@@ -0,0 +1,142 @@
+# backend/src/ar/mesh.py
+"""
+Triangle meshes written straight to GLB, for the procedural AR generators.
+
+- Mesh: indexed vertices (position, normal, UV) and triangles, in metres,
+  Y up, front facing +Z (the glTF conventions).
+- mesh_to_glb: one textured PBR material, packed into a GLB with
+  src/lib/glb.py; no Blender or 3D library involved.
+- texture_from_image: downscale a photo to AR_TEXTURE_MAX_SIZE and encode it.
+"""
+
+import math
+import os
+import sys
+from array import array
+from typing import Sequence, Tuple
+
+from PIL import Image
+
+from src.lib.glb import encode_texture, write_glb
+
+AR_TEXTURE_MAX_SIZE = int(os.getenv("AR_TEXTURE_MAX_SIZE", "2048"))
+
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+
+class Mesh:
+    def __init__(self):
+        self.positions = array("f")
+        self.normals = array("f")
+        self.uvs = array("f")
+        self.indices = array("I")
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.positions) // 3
+
+    def vertex(self, position: Sequence[float], normal: Sequence[float], uv: Sequence[float]) -> int:
+        length = math.sqrt(sum(c * c for c in normal)) or 1.0
+        self.positions.extend(position)
+        self.normals.extend(c / length for c in normal)
+        self.uvs.extend(uv)
+        return self.vertex_count - 1
+
+    def triangle(self, a: int, b: int, c: int):
+        """Counter-clockwise seen from the front."""
+        self.indices.extend((a, b, c))
+
+    def quad(self, a: int, b: int, c: int, d: int):
+        """a-b-c-d counter-clockwise seen from the front."""
+        self.indices.extend((a, b, c, a, c, d))
+
+    def grid(self, rows: int, cols: int, first: int):
+        """Quads over a (rows + 1) x (cols + 1) vertex grid laid out row by row from `first`."""
+        for row in range(rows):
+            for col in range(cols):
+                a = first + row * (cols + 1) + col
+                c = a + cols + 1
+                self.quad(a, c, c + 1, a + 1)
+
+    def bounds(self) -> Tuple[list, list]:
+        p = self.positions
+        return ([min(p[i::3]) for i in range(3)], [max(p[i::3]) for i in range(3)])
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def texture_from_image(img: Image.Image, max_size: int = AR_TEXTURE_MAX_SIZE) -> Tuple[bytes, str]:
+    if max(img.size) > max_size:
+        img = img.copy()
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+    return encode_texture(img)
+
+
+def mesh_to_glb(mesh: Mesh, texture: bytes, mime_type: str, name: str = "Model", double_sided: bool = False,
+                roughness: float = 0.6, metallic: float = 0.0, generator: str = "artisan-marketplace") -> bytes:
+    if mesh.vertex_count < 65536:
+        indices, index_type = _little_endian(array("H", mesh.indices)), UNSIGNED_SHORT
+    else:
+        indices, index_type = _little_endian(mesh.indices), UNSIGNED_INT
+    blobs = [
+        (_little_endian(mesh.positions), ARRAY_BUFFER),
+        (_little_endian(mesh.normals), ARRAY_BUFFER),
+        (_little_endian(mesh.uvs), ARRAY_BUFFER),
+        (indices, ELEMENT_ARRAY_BUFFER),
+        (texture, None),
+    ]
+    views, parts, offset = [], [], 0
+    for data, target in blobs:
+        padding = -offset % 4
+        parts.append(b"\x00" * padding)
+        offset += padding
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        views.append(view)
+        parts.append(data)
+        offset += len(data)
+
+    count = mesh.vertex_count
+    low, high = mesh.bounds()
+    gltf = {
+        "asset": {"version": "2.0", "generator": generator},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": name}],
+        "meshes": [{"name": name, "primitives": [{
+            "attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2},
+            "indices": 3,
+            "material": 0,
+        }]}],
+        "accessors": [
+            {"bufferView": 0, "componentType": FLOAT, "count": count, "type": "VEC3", "min": low, "max": high},
+            {"bufferView": 1, "componentType": FLOAT, "count": count, "type": "VEC3"},
+            {"bufferView": 2, "componentType": FLOAT, "count": count, "type": "VEC2"},
+            {"bufferView": 3, "componentType": index_type, "count": len(mesh.indices), "type": "SCALAR"},
+        ],
+        "bufferViews": views,
+        "buffers": [{"byteLength": offset}],
+        "materials": [{
+            "name": f"{name}Material",
+            "doubleSided": double_sided,
+            "pbrMetallicRoughness": {
+                "baseColorTexture": {"index": 0},
+                "metallicFactor": metallic,
+                "roughnessFactor": roughness,
+            },
+        }],
+        "textures": [{"sampler": 0, "source": 0}],
+        "samplers": [{"magFilter": 9729, "minFilter": 9987, "wrapS": 33071, "wrapT": 33071}],
+        "images": [{"bufferView": 4, "mimeType": mime_type}],
+    }
+    return write_glb(gltf, b"".join(parts))
@@ -0,0 +1,256 @@
+# backend/src/lib/admission.py
+"""
+Admission control for expensive endpoints (Blender renders, Gemini calls).
+
+- AdmissionController: bounds concurrent executions of one endpoint with an
+  asyncio semaphore and a bounded wait queue; rejects with 503 + Retry-After
+  when the queue is full or the wait times out.
+- TokenBucketLimiter: per-client token buckets; rejects with 429 + Retry-After.
+- admission: FastAPI dependency factory combining both, e.g.
+  `@router.post("/x", dependencies=[Depends(admission("x"))])`.
+
+Limits can be overridden with the ADMISSION_LIMITS env var (JSON), e.g.
+  {"generate_ar_model": {"concurrency": 2, "queue": 4, "rate_per_minute": 6}}
+
+Clients are keyed by their socket address. X-Forwarded-For is only honoured
+behind proxies declared with TRUSTED_PROXIES (comma-separated IPs/CIDRs) or
+TRUSTED_PROXY_HOPS (number of proxies in front of the app); otherwise any
+caller could rotate the header to get a fresh bucket.
+"""
+
+import asyncio
+import ipaddress
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+
+from src.lib.logger import get_logger
+
+logger = get_logger("admission")
+
+
+def _parse_networks(raw: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    networks = []
+    for part in raw.split(","):
+        if part.strip():
+            try:
+                networks.append(ipaddress.ip_network(part.strip(), strict=False))
+            except ValueError:
+                logger.warning("Ignoring invalid TRUSTED_PROXIES entry", extra={"entry": part.strip()})
+    return networks
+
+
+TRUSTED_PROXIES = _parse_networks(os.getenv("TRUSTED_PROXIES", ""))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+
+@dataclass
+class AdmissionLimits:
+    concurrency: int = 4           # requests executing at once
+    queue: int = 16                # requests allowed to wait for a slot
+    queue_timeout: float = 10.0    # seconds a request may wait before 503
+    rate_per_minute: float = 60.0  # sustained requests per client
+    burst: int = 10                # extra requests a client may burst
+
+
+DEFAULT_LIMITS: Dict[str, AdmissionLimits] = {
+    "generate_ar_model": AdmissionLimits(concurrency=2, queue=4, queue_timeout=30.0, rate_per_minute=6, burst=3),
+    # One catalog-wide rebuild at a time; it bounds its own concurrency (AR_REBUILD_CONCURRENCY)
+    "ar_rebuild": AdmissionLimits(concurrency=1, queue=0, queue_timeout=1.0, rate_per_minute=6, burst=3),
+    "classify_product": AdmissionLimits(concurrency=8, queue=32, queue_timeout=10.0, rate_per_minute=30, burst=10),
+    "estimate_price": AdmissionLimits(concurrency=8, queue=32, queue_timeout=10.0, rate_per_minute=30, burst=10),
+    "generate_product_story": AdmissionLimits(concurrency=8, queue=32, queue_timeout=10.0, rate_per_minute=30, burst=10),
+}
+
+
+def _load_limits() -> Dict[str, AdmissionLimits]:
+    limits = {name: AdmissionLimits(**asdict(value)) for name, value in DEFAULT_LIMITS.items()}
+    raw = os.getenv("ADMISSION_LIMITS")
+    if not raw:
+        return limits
+    try:
+        overrides = json.loads(raw)
+        for name, values in overrides.items():
+            base = asdict(limits.get(name, AdmissionLimits()))
+            base.update(values)
+            limits[name] = AdmissionLimits(**base)
+    except (ValueError, TypeError) as e:
+        logger.warning("Ignoring invalid ADMISSION_LIMITS", extra={"error": str(e)})
+    return limits
+
+
+# ---------------------------
+# Concurrency limiting
+# ---------------------------
+class AdmissionController:
+    """Semaphore with a bounded wait queue and admission statistics."""
+
+    def __init__(self, name: str, limits: AdmissionLimits):
+        self.name = name
+        self.limits = limits
+        self._semaphore = asyncio.Semaphore(limits.concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._avg_service_s = 1.0  # EWMA of execution time, used for Retry-After
+
+    def retry_after(self) -> int:
+        # Rough time until the current backlog drains
+        backlog = self.waiting + self.active
+        return max(1, math.ceil(backlog * self._avg_service_s / max(self.limits.concurrency, 1)))
+
+    def _reject(self, reason: str):
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} is at capacity ({reason}), please retry later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def acquire(self):
+        # Count in-flight + queued ourselves: semaphore.locked() lags behind
+        # callers that have entered acquire() but not yet been scheduled.
+        if self.active + self.waiting >= self.limits.concurrency + self.limits.queue:
+            self.rejected_queue_full += 1
+            self._reject("queue full")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.limits.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            self._reject("queue timeout")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+
+    def release(self, service_s: float):
+        self.active -= 1
+        self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * service_s
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limits": asdict(self.limits),
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_service_s": round(self._avg_service_s, 3),
+        }
+
+
+# ---------------------------
+# Per-client rate limiting
+# ---------------------------
+class TokenBucketLimiter:
+    """Token bucket per client key, holding at most `max_clients` buckets (LRU)."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.rejected = 0
+
+    def try_acquire(self, key: str) -> Optional[float]:
+        """Take a token; returns None on success or the seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            self._buckets[key] = (tokens - 1.0, now)
+            wait = None
+        else:
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            wait = (1.0 - tokens) / self.rate if self.rate > 0 else 60.0
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_key(request: Request) -> str:
+    """The caller's address; forwarded hops count only when they were added by trusted proxies."""
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not (TRUSTED_PROXY_HOPS > 0 or _is_trusted_proxy(peer)):
+        return peer
+    # Each proxy appends the address it received the request from, so the
+    # right-most entries are the trustworthy ones and the left-most are client-supplied
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if not hops:
+        return peer
+    if TRUSTED_PROXY_HOPS > 0:
+        return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0]
+
+
+# ---------------------------
+# Registry & FastAPI dependency
+# ---------------------------
+_limits = _load_limits()
+_controllers: Dict[str, AdmissionController] = {}
+_rate_limiters: Dict[str, TokenBucketLimiter] = {}
+
+
+def get_controller(name: str) -> AdmissionController:
+    if name not in _controllers:
+        _controllers[name] = AdmissionController(name, _limits.get(name, AdmissionLimits()))
+    return _controllers[name]
+
+
+def get_rate_limiter(name: str) -> TokenBucketLimiter:
+    if name not in _rate_limiters:
+        limits = _limits.get(name, AdmissionLimits())
+        _rate_limiters[name] = TokenBucketLimiter(limits.rate_per_minute, limits.burst)
+    return _rate_limiters[name]
+
+
+def admission(name: str):
+    """Dependency that rate-limits the caller, then holds a concurrency slot for the request."""
+
+    async def dependency(request: Request):
+        wait = get_rate_limiter(name).try_acquire(client_key(request))
+        if wait is not None:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many {name} requests, please slow down",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+        controller = get_controller(name)
+        await controller.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            controller.release(time.monotonic() - started)
+
+    return dependency
+
+
+def admission_stats() -> dict:
+    return {
+        name: {**controller.stats(), "rate_limited": get_rate_limiter(name).rejected}
+        for name, controller in _controllers.items()
+    }
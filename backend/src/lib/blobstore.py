@@ -0,0 +1,386 @@
+# backend/src/lib/blobstore.py
+"""
+Local object store for uploads and generated models.
+
+- BlobStore: objects live in hash-sharded subdirectories
+  (<root>/<aa>/<bb>/<key>), so no directory grows past a few thousand
+  entries even with millions of objects. Metadata (size, sha256, content
+  type, created, last access) is kept in an SQLite index under
+  <root>/.blobstore/, which also records which products reference each
+  object.
+- set_refs / track_product_assets: reference tracking. A product's asset
+  URLs (/uploads/<key>, /ar_models/<key>) are recorded whenever it is saved.
+- set_ref_source: registers the full product list. Products saved before
+  reference tracking existed have no refs yet, so each store's GC thread
+  first seeds refs from every current product and skips collection until
+  that scan has succeeded once.
+- gc: deletes objects that no product references and that have not been
+  written or served for BLOBSTORE_RETENTION_DAYS, plus stale temp files.
+  get_blob_store starts it on a background thread every
+  BLOBSTORE_GC_INTERVAL_S.
+
+Files written before the store existed stay in the flat root and are still
+served; BLOBSTORE_IMPORT_LEGACY=1 moves them into the store (unreferenced
+ones then age out like any other object).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.lib.logger import get_logger
+
+logger = get_logger("blobstore")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+BLOBSTORE_RETENTION_DAYS = float(os.getenv("BLOBSTORE_RETENTION_DAYS", "7"))
+BLOBSTORE_GC_INTERVAL_S = float(os.getenv("BLOBSTORE_GC_INTERVAL_S", "3600"))  # 0 disables the GC thread
+BLOBSTORE_IMPORT_LEGACY = os.getenv("BLOBSTORE_IMPORT_LEGACY", "0") == "1"
+# Reads refresh last_access at most this often, so serving stays read-only
+TOUCH_INTERVAL_S = 3600
+META_DIR = ".blobstore"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    content_type TEXT,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (key, owner)
+);
+CREATE TABLE IF NOT EXISTS state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO state (id, generation) VALUES (0, 0);
+CREATE INDEX IF NOT EXISTS refs_owner ON refs (owner);
+CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access);
+"""
+
+
+def _check_key(key: str):
+    if not key or "/" in key or "\\" in key or key.startswith(".") or "\0" in key:
+        raise ValueError(f"Invalid blob key: {key!r}")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root: str, url_path: str):
+        self.root = os.path.abspath(root)
+        self.url_path = url_path.rstrip("/")
+        self.tmp_dir = os.path.join(self.root, META_DIR, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.root, META_DIR, "index.sqlite3"),
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._gc_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[str, Optional[dict]], None]] = []
+        self._touched: Dict[str, float] = {}
+        self.refs_seeded = False
+
+    # ---------------------------
+    # Paths
+    # ---------------------------
+    def shard_path(self, key: str) -> str:
+        _check_key(key)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], key)
+
+    def legacy_path(self, key: str) -> str:
+        _check_key(key)
+        return os.path.join(self.root, key)
+
+    def temp_path(self) -> str:
+        return os.path.join(self.tmp_dir, f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}")
+
+    # ---------------------------
+    # Objects
+    # ---------------------------
+    def adopt(self, key: str, tmp_path: str, content_type: Optional[str] = None) -> dict:
+        """Move a finished temp file (from temp_path) into the store and index it."""
+        path = self.shard_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {"key": key, "size": os.path.getsize(tmp_path), "sha256": _sha256_file(tmp_path),
+                "content_type": content_type}
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO objects (key, size, sha256, content_type, created, last_access) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET size=excluded.size, sha256=excluded.sha256,"
+                " content_type=COALESCE(excluded.content_type, objects.content_type), last_access=excluded.last_access",
+                (key, meta["size"], meta["sha256"], content_type, now, now),
+            )
+            self._db.execute("UPDATE state SET generation = generation + 1 WHERE id = 0")
+        self._notify(key, meta)
+        return meta
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> dict:
+        tmp_path = self.temp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return self.adopt(key, tmp_path, content_type)
+
+    def stat(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, size, sha256, content_type, created, last_access FROM objects WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("key", "size", "sha256", "content_type", "created", "last_access"), row))
+
+    def resolve(self, key: str, touch: bool = True) -> Optional[str]:
+        """Path of an object (stored or legacy flat file), or None."""
+        try:
+            meta = self.stat(key)
+        except ValueError:
+            return None
+        if meta is not None:
+            if touch:
+                self.touch(key)
+            return self.shard_path(key)
+        try:
+            legacy = self.legacy_path(key)
+        except ValueError:
+            return None
+        return legacy if os.path.isfile(legacy) else None
+
+    def touch(self, key: str):
+        """Record an access; written to the index at most once per TOUCH_INTERVAL_S per key."""
+        now = time.time()
+        if now - self._touched.get(key, 0.0) < TOUCH_INTERVAL_S:
+            return
+        self._touched[key] = now
+        with self._lock:
+            self._db.execute("UPDATE objects SET last_access = ? WHERE key = ? AND last_access < ?",
+                             (now, key, now - TOUCH_INTERVAL_S))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM objects WHERE key = ?", (key,))
+            self._db.execute("UPDATE state SET generation = generation + 1 WHERE id = 0")
+        self._touched.pop(key, None)
+        for path in (self.shard_path(key), self.legacy_path(key)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._notify(key, None)
+
+    def iter_objects(self) -> Iterator[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT key, size, sha256, content_type FROM objects").fetchall()
+        for key, size, sha256, content_type in rows:
+            yield {"key": key, "size": size, "sha256": sha256, "content_type": content_type}
+
+    def generation(self) -> int:
+        """Incremented by every write or delete, from any process."""
+        with self._lock:
+            return self._db.execute("SELECT generation FROM state WHERE id = 0").fetchone()[0]
+
+    def subscribe(self, listener: Callable[[str, Optional[dict]], None]):
+        """listener(key, meta) after each write in this process; meta is None for a delete."""
+        self._listeners.append(listener)
+
+    def _notify(self, key: str, meta: Optional[dict]):
+        for listener in self._listeners:
+            try:
+                listener(key, meta)
+            except Exception:
+                logger.exception("Blob store listener failed", extra={"key": key})
+
+    def import_legacy(self) -> int:
+        """Move flat files from the root into shards; their mtime becomes last_access."""
+        moved = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            mtime = os.path.getmtime(path)
+            self.adopt(name, path)
+            with self._lock:
+                self._db.execute("UPDATE objects SET created = ?, last_access = ? WHERE key = ?", (mtime, mtime, name))
+            moved += 1
+        if moved:
+            logger.info("Imported legacy files", extra={"root": self.root, "count": moved})
+        return moved
+
+    # ---------------------------
+    # References
+    # ---------------------------
+    def set_refs(self, owner: str, keys: Iterable[str]):
+        """Replace the set of objects referenced by owner (e.g. a product id)."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+                self._db.executemany("INSERT OR IGNORE INTO refs (key, owner) VALUES (?, ?)",
+                                     [(key, owner) for key in keys])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def add_ref(self, owner: str, key: str):
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO refs (key, owner) VALUES (?, ?)", (key, owner))
+
+    def seed_refs(self) -> bool:
+        """
+        Add refs for every product of the registered source (existing refs are
+        kept); True once this has succeeded. Until then gc must not run, or it
+        would collect the assets of products not saved since startup.
+        """
+        if self.refs_seeded:
+            return True
+        if _ref_source is None:
+            return False
+        try:
+            refs = [(key, owner) for owner, product in _ref_source() for key in self.keys_in(product)]
+        except Exception as e:
+            logger.warning("Could not list products to seed blob references", extra={"root": self.root,
+                                                                                    "error": str(e)})
+            return False
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO refs (key, owner) VALUES (?, ?)", refs)
+        self.refs_seeded = True
+        logger.info("Seeded blob references", extra={"root": self.root, "refs": len(refs)})
+        return True
+
+    def refs(self, key: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT owner FROM refs WHERE key = ?", (key,))]
+
+    def keys_in(self, value) -> List[str]:
+        """Keys of this store referenced by URLs anywhere in a (nested) product value."""
+        keys = []
+        if isinstance(value, str):
+            path = urlsplit(value).path
+            prefix = self.url_path + "/"
+            if path.startswith(prefix) and "/" not in path[len(prefix):]:
+                keys.append(path[len(prefix):])
+        elif isinstance(value, dict):
+            for item in value.values():
+                keys.extend(self.keys_in(item))
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                keys.extend(self.keys_in(item))
+        return keys
+
+    # ---------------------------
+    # Garbage collection
+    # ---------------------------
+    def gc(self, retention_s: float = BLOBSTORE_RETENTION_DAYS * 86400, now: Optional[float] = None) -> dict:
+        now = now if now is not None else time.time()
+        cutoff = now - retention_s
+        with self._lock:
+            orphans = [row[0] for row in self._db.execute(
+                "SELECT key FROM objects WHERE last_access < ? AND key NOT IN (SELECT key FROM refs)", (cutoff,)
+            )]
+        deleted, freed = 0, 0
+        for key in orphans:
+            meta = self.stat(key)
+            # Re-checked per key: a reference or access may have arrived meanwhile
+            if meta is None or meta["last_access"] >= cutoff or self.refs(key):
+                continue
+            self.delete(key)
+            deleted += 1
+            freed += meta["size"]
+        # Temp files of uploads that never finished
+        stale_tmp = 0
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.path.getmtime(path) < now - 86400:
+                    os.unlink(path)
+                    stale_tmp += 1
+            except FileNotFoundError:
+                pass
+        result = {"deleted": deleted, "freed_bytes": freed, "stale_tmp": stale_tmp}
+        if deleted or stale_tmp:
+            logger.info("Blob store GC", extra={"root": self.root, **result})
+        return result
+
+    def start_gc(self, interval_s: float = BLOBSTORE_GC_INTERVAL_S):
+        if self._gc_thread is not None or interval_s <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_s)
+                try:
+                    if not self.seed_refs():
+                        logger.info("Blob store GC skipped until product references are seeded",
+                                    extra={"root": self.root})
+                        continue
+                    self.gc()
+                except Exception:
+                    logger.exception("Blob store GC failed", extra={"root": self.root})
+
+        self._gc_thread = threading.Thread(target=run, name=f"blobstore-gc-{os.path.basename(self.root)}", daemon=True)
+        self._gc_thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+            referenced = self._db.execute("SELECT COUNT(DISTINCT key) FROM refs").fetchone()[0]
+        return {"root": self.root, "objects": count, "bytes": size, "referenced": referenced}
+
+
+# ---------------------------
+# Stores used by the API
+# ---------------------------
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+# Yields (product id, product) for every current product; see set_ref_source
+_ref_source: Optional[Callable[[], Iterable[Tuple[str, dict]]]] = None
+
+
+def set_ref_source(source: Callable[[], Iterable[Tuple[str, dict]]]):
+    """Register the full product list that each store's GC seeds its refs from before collecting."""
+    global _ref_source
+    _ref_source = source
+
+
+def get_blob_store(root: str, url_path: str) -> BlobStore:
+    root = os.path.abspath(root)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = BlobStore(root, url_path)
+            if BLOBSTORE_IMPORT_LEGACY:
+                store.import_legacy()
+            store.start_gc()
+        return store
+
+
+def track_product_assets(product_id: str, product: dict):
+    """Record which stored objects a product's fields point at."""
+    for store in list(_stores.values()):
+        store.set_refs(product_id, store.keys_in(product))
+
+
+def blob_store_stats() -> List[dict]:
+    return [store.stats() for store in list(_stores.values())]
@@ -0,0 +1,314 @@
+# backend/src/lib/catalog.py
+"""
+Columnar product catalog.
+
+- Catalog: products stored field by field in typed columns: float64 prices,
+  int32 codes into a value table for low-cardinality fields (category,
+  artisan, region), and one UTF-8 buffer plus offsets per text field.
+  Fields outside the schema are kept per row in a sparse dict.
+- ProductRow: read-only mapping view of one row. It behaves like the
+  original product dict (`p["name"]`, `p.get(...)`, `{**p}`), and
+  to_dict()/to_product() return the dict or Product shapes.
+- Catalog.filter_rows / sort_rows: vectorized filters and ordering over
+  the columns.
+
+A Catalog is a Sequence of rows, so code written against lists of product
+dicts works with it unchanged.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+_LIST_SEP = "\x1f"
+
+
+class CategoricalColumn:
+    """int32 codes into a table of distinct values; -1 marks a missing value."""
+
+    def __init__(self, values: Iterable[Optional[str]]):
+        self.values: List[str] = []
+        self._code_of: Dict[str, int] = {}
+        codes = []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            code = self._code_of.get(value)
+            if code is None:
+                code = self._code_of[value] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        code = self.codes[row]
+        return self.values[code] if code >= 0 else None
+
+    def matching_codes(self, wanted: Iterable[str]) -> np.ndarray:
+        """Codes whose value contains any wanted string (case-insensitive), scanning distinct values only."""
+        wanted = [w.lower() for w in wanted]
+        return np.asarray([code for code, value in enumerate(self.values)
+                           if any(w in value.lower() for w in wanted)], dtype=np.int32)
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(v) for v in self.values)
+
+
+class StringColumn:
+    """All values of a text field in one UTF-8 buffer, sliced by offsets."""
+
+    def __init__(self, values: Iterable[Optional[str]]):
+        encoded = []
+        present = []
+        for value in values:
+            present.append(value is not None)
+            encoded.append(value.encode("utf-8") if value is not None else b"")
+        self.present = np.asarray(present, dtype=bool)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.buffer = b"".join(encoded)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if not self.present[row]:
+            return None
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + self.present.nbytes
+
+
+class ListColumn(StringColumn):
+    """List-of-strings field stored as separator-joined text."""
+
+    def __init__(self, values: Iterable[Optional[List[str]]]):
+        super().__init__(_LIST_SEP.join(v) if v is not None else None for v in values)
+
+    def __getitem__(self, row: int) -> Optional[List[str]]:
+        text = super().__getitem__(row)
+        if text is None:
+            return None
+        return text.split(_LIST_SEP) if text else []
+
+
+# Field name -> column kind. Anything else goes to the sparse extras.
+SCHEMA = {
+    "id": "text",
+    "name": "text",
+    "price": "price",
+    "imageUrl": "text",
+    "artisan": "categorical",
+    "category": "categorical",
+    "aiHint": "text",
+    "description": "text",
+    "region": "categorical",
+    "tags": "list",
+    "materials": "list",
+    "techniques": "list",
+}
+_COLUMN_TYPES = {"text": StringColumn, "categorical": CategoricalColumn, "list": ListColumn}
+
+
+def _schema_value(field: str, value: Any) -> bool:
+    """Whether a value fits its schema column (otherwise it is kept as an extra)."""
+    kind = SCHEMA[field]
+    if kind == "price":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == "list":
+        return isinstance(value, list) and all(isinstance(v, str) for v in value)
+    return isinstance(value, str)
+
+
+class ProductRow(Mapping):
+    """Read-only dict-like view of one catalog row."""
+
+    __slots__ = ("_catalog", "_row")
+
+    def __init__(self, catalog: "Catalog", row: int):
+        self._catalog = catalog
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._catalog.value(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._catalog.fields(self._row))
+
+    def __len__(self) -> int:
+        return len(self._catalog.fields(self._row))
+
+    def __repr__(self) -> str:
+        return f"ProductRow({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def to_product(self):
+        from data_types_class import Product
+        return Product(**self.to_dict())
+
+
+class Catalog(Sequence):
+    def __init__(self, products: Iterable[Mapping]):
+        products = [p.to_dict() if isinstance(p, ProductRow) else p for p in products]
+        self._size = len(products)
+        # Key order of the first product, so serialized rows keep the source field order
+        self._field_order: List[str] = []
+        seen = set()
+        for p in products[:1]:
+            self._field_order.extend(k for k in p if k in SCHEMA)
+            seen.update(self._field_order)
+        self._field_order.extend(k for k in SCHEMA if k not in seen)
+
+        self.prices = np.full(self._size, np.nan, dtype=np.float64)
+        # Integer prices come back as ints, like the source dicts
+        self._int_price = np.zeros(self._size, dtype=bool)
+        self._extra: Dict[int, dict] = {}
+        columns: Dict[str, List[Any]] = {field: [None] * self._size for field in SCHEMA if SCHEMA[field] != "price"}
+        for row, p in enumerate(products):
+            for key, value in p.items():
+                if key in SCHEMA and _schema_value(key, value):
+                    if key == "price":
+                        self.prices[row] = value
+                        self._int_price[row] = isinstance(value, int)
+                    else:
+                        columns[key][row] = value
+                else:
+                    # Unknown fields, explicit nulls and off-schema types round-trip unchanged
+                    self._extra.setdefault(row, {})[key] = value
+        self.columns = {field: _COLUMN_TYPES[SCHEMA[field]](values) for field, values in columns.items()}
+        self._row_of: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_dicts(cls, products: Iterable[Mapping]) -> "Catalog":
+        return cls(products)
+
+    # ---------- Sequence ----------
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ProductRow(self, row) for row in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("catalog index out of range")
+        return ProductRow(self, index)
+
+    def __iter__(self) -> Iterator[ProductRow]:
+        return (ProductRow(self, row) for row in range(self._size))
+
+    # ---------- row access ----------
+    def value(self, row: int, key: str) -> Any:
+        extra = self._extra.get(row)
+        if extra is not None and key in extra:
+            return extra[key]
+        if key == "price":
+            price = self.prices[row]
+            if np.isnan(price):
+                raise KeyError(key)
+            return int(price) if self._int_price[row] else float(price)
+        column = self.columns.get(key)
+        if column is None:
+            raise KeyError(key)
+        value = column[row]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def fields(self, row: int) -> List[str]:
+        extra = self._extra.get(row, {})
+        keys = []
+        for field in self._field_order:
+            if field in extra:
+                keys.append(field)
+            elif field == "price":
+                if not np.isnan(self.prices[row]):
+                    keys.append(field)
+            elif self.columns[field][row] is not None:
+                keys.append(field)
+        keys.extend(k for k in extra if k not in SCHEMA)
+        return keys
+
+    def row_of(self, product_id: str) -> Optional[int]:
+        if self._row_of is None:
+            ids = self.columns["id"]
+            self._row_of = {ids[row]: row for row in range(self._size)}
+        return self._row_of.get(str(product_id))
+
+    def get(self, product_id: str) -> Optional[ProductRow]:
+        row = self.row_of(product_id)
+        return ProductRow(self, row) if row is not None else None
+
+    def column_values(self, field: str, rows: Iterable[int], default: Any = None) -> List[Any]:
+        """One field for many rows, without building row views."""
+        column = self.columns[field]
+        if isinstance(column, CategoricalColumn):
+            values, codes = column.values, column.codes
+            out = [values[code] if code >= 0 else default for code in codes[np.asarray(rows, dtype=np.int64)].tolist()]
+        else:
+            out = [column[row] for row in rows]
+            out = [default if value is None else value for value in out]
+        if self._extra:
+            # Rows whose value for this field is an extra (off-schema type or explicit null)
+            for i, row in enumerate(rows):
+                extra = self._extra.get(row)
+                if extra is not None and field in extra:
+                    out[i] = extra[field]
+        return out
+
+    def to_dicts(self, rows: Optional[Iterable[int]] = None) -> List[dict]:
+        rows = range(self._size) if rows is None else rows
+        return [ProductRow(self, int(row)).to_dict() for row in rows]
+
+    # ---------- vectorized queries ----------
+    def filter_mask(self, categories: Optional[List[str]] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, artisans: Optional[List[str]] = None,
+                    exclude_ids: Optional[List[str]] = None) -> np.ndarray:
+        """Same semantics as the recommendation filters: substring match on category/artisan, inclusive price range."""
+        mask = np.ones(self._size, dtype=bool)
+        if categories:
+            column = self.columns["category"]
+            mask &= np.isin(column.codes, column.matching_codes(categories))
+        if artisans:
+            column = self.columns["artisan"]
+            mask &= np.isin(column.codes, column.matching_codes(artisans))
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        if exclude_ids:
+            for product_id in exclude_ids:
+                row = self.row_of(product_id)
+                if row is not None:
+                    mask[row] = False
+        return mask
+
+    def filter_rows(self, **filters) -> np.ndarray:
+        return np.flatnonzero(self.filter_mask(**filters))
+
+    def sort_rows(self, rows: Optional[np.ndarray] = None, by: str = "price", descending: bool = False) -> np.ndarray:
+        """Rows ordered by price or by a categorical field's value."""
+        rows = np.arange(self._size) if rows is None else np.asarray(rows)
+        if by == "price":
+            keys = self.prices[rows]
+        elif isinstance(self.columns.get(by), CategoricalColumn):
+            column = self.columns[by]
+            # Rank codes by their value once, then sort rows by rank
+            rank = np.empty(len(column.values) + 1, dtype=np.int32)
+            rank[np.argsort(np.asarray(column.values + [""], dtype=object))] = np.arange(len(column.values) + 1)
+            keys = rank[column.codes[rows]]
+        else:
+            raise ValueError(f"Cannot sort by {by!r}")
+        order = np.argsort(keys, kind="stable")
+        return rows[order[::-1]] if descending else rows[order]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns (extras not included)."""
+        return self.prices.nbytes + self._int_price.nbytes + sum(column.nbytes() for column in self.columns.values())
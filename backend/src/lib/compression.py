@@ -0,0 +1,168 @@
+# backend/src/lib/compression.py
+"""
+Response compression for the FastAPI app.
+
+- CompressionMiddleware: ASGI middleware that compresses text/JSON responses
+  of at least COMPRESSION_MIN_SIZE bytes with brotli (when the `brotli`
+  package is installed and the client accepts it) or gzip. Streaming
+  responses are compressed chunk by chunk.
+- choose_encoding: Accept-Encoding negotiation (q-values and "*").
+
+Responses that already carry a Content-Encoding, binary media (images, GLB
+models) and 204/304 responses are passed through untouched. Compressible
+responses always get `Vary: Accept-Encoding`, so a CDN keeps the encodings
+apart.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+# 4-5 is the usual speed/ratio balance for dynamic responses
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported encoding for an Accept-Encoding header, or None."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) if data else b""
+        return self._gz.compress(data)
+
+    def flush(self) -> bytes:
+        """Bytes pending so far, e.g. for a streamed chunk."""
+        if self.encoding == "br":
+            return self._br.flush()
+        return self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = _header(scope.get("headers", []), b"accept-encoding")
+        encoding = choose_encoding(accept.decode("latin-1")) if accept else None
+
+        start = None           # held back until the first body chunk decides the encoding
+        compressor = None      # set while streaming a compressed body
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                # Any other message (e.g. pathsend) goes out as-is
+                passthrough = True
+                if start is not None:
+                    await send(start)
+                await send(message)
+                return
+
+            if compressor is not None:
+                data = compressor.compress(message.get("body", b""))
+                more_body = message.get("more_body", False)
+                data += compressor.flush() if more_body else compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = list(start.get("headers", []))
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+            compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+            if compressible:
+                vary = _header(headers, b"vary")
+                if vary is None:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                elif b"accept-encoding" not in vary.lower() and vary.strip() != b"*":
+                    headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+                    headers.append((b"vary", vary + b", Accept-Encoding"))
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if (encoding is None or not compressible or start["status"] in (204, 304)
+                    or _header(headers, b"content-encoding") is not None
+                    or (not more_body and len(body) < self.minimum_size)):
+                passthrough = True
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            compressor = _Compressor(encoding)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            data = compressor.compress(body)
+            if more_body:
+                data += compressor.flush()
+            else:
+                data += compressor.finish()
+                headers.append((b"content-length", str(len(data)).encode("latin-1")))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
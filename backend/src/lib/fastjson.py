@@ -0,0 +1,107 @@
+# backend/src/lib/fastjson.py
+"""
+Fast JSON encoding for large responses.
+
+- dumps: orjson when installed, otherwise the stdlib json module with
+  compact separators. Both accept datetimes and NumPy scalars/arrays.
+- FastJSONResponse: JSONResponse class that encodes with dumps and skips
+  FastAPI's jsonable_encoder pass.
+- FragmentCache: LRU of encoded JSON fragments keyed by (key, version), so
+  an unchanged product is encoded once rather than on every response.
+- json_array / splice / RawJSON: assemble a response body from cached
+  fragments and return it without re-encoding.
+"""
+
+import datetime
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):  # NumPy arrays and scalars
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class RawJSON:
+    """Already-encoded JSON body for FastJSONResponse."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+
+def json_array(fragments: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def splice(template: bytes, placeholder: bytes, data: bytes) -> bytes:
+    """Replace an encoded placeholder value (e.g. b'"__products__"') with raw JSON."""
+    return template.replace(placeholder, data, 1)
+
+
+class FastJSONResponse(JSONResponse):
+    # A JSONResponse subclass, so OpenAPI still documents the route's response_model
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, RawJSON):
+            return content.data
+        return dumps(content)
+
+
+class FragmentCache:
+    """Thread-safe LRU of encoded fragments; a new version replaces the old entry."""
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        fragment = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (version, fragment)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "encoder": "orjson" if orjson is not None else "json"}
@@ -0,0 +1,125 @@
+# backend/src/lib/glb.py
+"""
+Reading and writing binary glTF (.glb) containers in pure Python.
+
+- read_glb / write_glb: split a GLB into its JSON document and BIN chunk and
+  back (chunks padded to 4 bytes as the spec requires).
+- repack: rebuild the BIN chunk from its buffer views, replacing some of
+  them (e.g. re-encoded textures) and updating offsets and lengths.
+- encode_texture: JPEG (PNG when it has alpha) bytes and MIME type of an image.
+- downscale_textures: re-encode every embedded image so neither side
+  exceeds a pixel limit; geometry and materials are left untouched.
+"""
+
+import io
+import json
+import struct
+from typing import Dict, Tuple
+
+from PIL import Image
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+
+class GLBError(ValueError):
+    pass
+
+
+def _pad(data: bytes, fill: bytes) -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def read_glb(data: bytes) -> Tuple[dict, bytes]:
+    """(glTF JSON document, BIN chunk); the BIN chunk is empty when absent."""
+    if len(data) < 20:
+        raise GLBError("Truncated GLB")
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise GLBError("Not a glTF 2.0 binary")
+    gltf, binary = None, b""
+    offset = 12
+    while offset + 8 <= min(length, len(data)):
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON and gltf is None:
+            gltf = json.loads(chunk)
+        elif chunk_type == CHUNK_BIN and not binary:
+            binary = bytes(chunk)
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise GLBError("GLB has no JSON chunk")
+    return gltf, binary
+
+
+def write_glb(gltf: dict, binary: bytes = b"") -> bytes:
+    document = _pad(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    chunks = struct.pack("<II", len(document), CHUNK_JSON) + document
+    if binary:
+        binary = _pad(binary, b"\x00")
+        chunks += struct.pack("<II", len(binary), CHUNK_BIN) + binary
+    return struct.pack("<4sII", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+def repack(gltf: dict, binary: bytes, replacements: Dict[int, bytes]) -> bytes:
+    """
+    New BIN chunk with the buffer views in `replacements` (index -> bytes)
+    swapped in. Updates gltf's bufferViews and buffer length in place.
+    """
+    parts = []
+    size = 0
+    for index, view in enumerate(gltf.get("bufferViews", [])):
+        if view.get("buffer", 0) != 0:
+            continue  # external buffers are not part of the BIN chunk
+        start = view.get("byteOffset", 0)
+        data = replacements.get(index, binary[start:start + view["byteLength"]])
+        # Accessors need 4-byte aligned views
+        padding = -size % 4
+        parts.append(b"\x00" * padding)
+        size += padding
+        view["byteOffset"] = size
+        view["byteLength"] = len(data)
+        parts.append(data)
+        size += len(data)
+    if gltf.get("buffers"):
+        gltf["buffers"][0]["byteLength"] = size
+    return b"".join(parts)
+
+
+def encode_texture(img: Image.Image, jpeg_quality: int = 85) -> Tuple[bytes, str]:
+    # JPEG unless the texture needs its alpha channel
+    out = io.BytesIO()
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img.save(out, format="PNG", optimize=True)
+        return out.getvalue(), "image/png"
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.save(out, format="JPEG", quality=jpeg_quality, optimize=True)
+    return out.getvalue(), "image/jpeg"
+
+
+def downscale_textures(data: bytes, max_size: int, jpeg_quality: int = 85) -> Tuple[bytes, int]:
+    """
+    (GLB whose embedded images fit within max_size x max_size, number of
+    images resized). Returns the input unchanged when nothing was larger.
+    """
+    gltf, binary = read_glb(data)
+    replacements: Dict[int, bytes] = {}
+    for image in gltf.get("images", []):
+        view_index = image.get("bufferView")
+        if view_index is None:
+            continue  # external or data: URI images are left as they are
+        view = gltf["bufferViews"][view_index]
+        start = view.get("byteOffset", 0)
+        with Image.open(io.BytesIO(binary[start:start + view["byteLength"]])) as img:
+            if max(img.size) <= max_size:
+                continue
+            img.load()
+            img.thumbnail((max_size, max_size), Image.LANCZOS)
+            replacements[view_index], image["mimeType"] = encode_texture(img, jpeg_quality)
+    if not replacements:
+        return data, 0
+    binary = repack(gltf, binary, replacements)
+    return write_glb(gltf, binary), len(replacements)
@@ -0,0 +1,130 @@
+# backend/src/lib/hot_assets.py
+"""
+In-memory cache for the most requested static assets.
+
+- HotAssetCache: size-bounded cache of asset bodies with LFU admission and
+  eviction. An asset is admitted once it has been requested
+  HOT_ASSET_ADMIT_AFTER times, and only evicts entries that are requested
+  less often than itself, so one-off downloads never push popular models
+  out. Request counts are halved every HOT_ASSET_AGING_REQUESTS requests so
+  popularity follows current traffic.
+- Bodies of at least HOT_ASSET_MMAP_MIN_BYTES are memory-mapped rather than
+  copied onto the heap; either way responses send a memoryview of the cached
+  buffer (no per-request open, read or copy).
+- Entries are keyed by path and versioned by ETag, so a replaced asset is
+  reloaded and a deleted one is dropped (invalidate).
+"""
+
+import mmap
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# ---------------------------
+# Configuration
+# ---------------------------
+HOT_ASSET_CACHE_BYTES = int(os.getenv("HOT_ASSET_CACHE_BYTES", str(256 * 1024 * 1024)))  # 0 disables the cache
+HOT_ASSET_MAX_ITEM_BYTES = int(os.getenv("HOT_ASSET_MAX_ITEM_BYTES", str(32 * 1024 * 1024)))
+HOT_ASSET_MMAP_MIN_BYTES = int(os.getenv("HOT_ASSET_MMAP_MIN_BYTES", str(1024 * 1024)))
+HOT_ASSET_ADMIT_AFTER = int(os.getenv("HOT_ASSET_ADMIT_AFTER", "2"))
+HOT_ASSET_AGING_REQUESTS = int(os.getenv("HOT_ASSET_AGING_REQUESTS", "10000"))
+
+
+def _load(path: str, size: int):
+    with open(path, "rb") as f:
+        if size >= HOT_ASSET_MMAP_MIN_BYTES:
+            # The mapping outlives the descriptor; evicted maps close once no response still uses them
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), True
+        return f.read(), False
+
+
+class HotAssetCache:
+    def __init__(self, max_bytes: int = HOT_ASSET_CACHE_BYTES, max_item_bytes: int = HOT_ASSET_MAX_ITEM_BYTES,
+                 admit_after: int = HOT_ASSET_ADMIT_AFTER):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.admit_after = admit_after
+        # path -> (etag, buffer, size, mapped)
+        self._entries: Dict[str, Tuple[str, object, int, bool]] = {}
+        self._counts: Dict[str, int] = {}
+        self._bytes = 0
+        self._requests = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _age(self):
+        self._counts = {path: count // 2 for path, count in self._counts.items() if count > 1}
+
+    def lookup(self, path: str, etag: str) -> Tuple[Optional[memoryview], bool]:
+        """
+        (cached body, should_admit). Counts the request; should_admit is True
+        when the caller should load the asset and offer it with admit().
+        """
+        with self._lock:
+            self._requests += 1
+            if self._requests % HOT_ASSET_AGING_REQUESTS == 0:
+                self._age()
+            count = self._counts[path] = self._counts.get(path, 0) + 1
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == etag:
+                self.hits += 1
+                return memoryview(entry[1]), False
+            self.misses += 1
+            return None, self.max_bytes > 0 and count >= self.admit_after
+
+    def _make_room(self, size: int, count: int) -> bool:
+        # Evict least-requested entries, but only ones requested less than the candidate
+        while self._bytes + size > self.max_bytes:
+            victim = min(self._entries, key=lambda p: self._counts.get(p, 0), default=None)
+            if victim is None or self._counts.get(victim, 0) >= count:
+                return False
+            self._drop(victim)
+            self.evictions += 1
+        return True
+
+    def _drop(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def admit(self, path: str, etag: str, size: int) -> Optional[memoryview]:
+        """Load an asset into the cache if it fits; returns its body, or None when not admitted."""
+        if size > self.max_item_bytes or size > self.max_bytes:
+            return None
+        with self._lock:
+            self._drop(path)  # a stale version
+            if not self._make_room(size, self._counts.get(path, 0)):
+                return None
+        buffer, mapped = _load(path, size)  # outside the lock: file I/O
+        if len(buffer) != size:
+            return None  # changed while loading; the next request sees the new version
+        with self._lock:
+            self._drop(path)
+            if not self._make_room(size, self._counts.get(path, 0)):
+                return memoryview(buffer)
+            self._entries[path] = (etag, buffer, size, mapped)
+            self._bytes += size
+        return memoryview(buffer)
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._drop(path)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "mapped": sum(1 for entry in self._entries.values() if entry[3]),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "evictions": self.evictions,
+        }
+
+
+# One budget shared by every asset directory
+hot_assets = HotAssetCache()
@@ -0,0 +1,91 @@
+# backend/src/lib/http_cache.py
+"""
+HTTP caching helpers for the catalog endpoints.
+
+- VersionCounter / catalog_version: monotonically increasing catalog version,
+  bumped whenever a product is saved, published or changes status.
+- weak_etag: W/"..." validator built from a version or a response body.
+- not_modified: If-None-Match evaluation (weak comparison, "*" and lists).
+- cache_headers / not_modified_response: ETag + Cache-Control headers and
+  the matching 304 response.
+
+Cache-Control values are configurable so a CDN can cache listings:
+PRODUCTS_CACHE_CONTROL for GET /products and RECOMMEND_CACHE_CONTROL for
+/recommend.
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# ---------------------------
+# Configuration
+# ---------------------------
+PRODUCTS_CACHE_CONTROL = os.getenv("PRODUCTS_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+# Personalized results must not be shared by a CDN
+RECOMMEND_CACHE_CONTROL = os.getenv("RECOMMEND_CACHE_CONTROL", "private, no-cache")
+
+# Distinguishes processes, so two instances never hand out the same ETag for
+# what may be different catalog states
+_INSTANCE = uuid.uuid4().hex[:8]
+
+
+class VersionCounter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+    def etag(self, *parts) -> str:
+        return weak_etag(_INSTANCE, self._value, *parts)
+
+
+catalog_version = VersionCounter()
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match matches etag (weak comparison, RFC 9110 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(tag) == target for tag in header.split(","))
+
+
+def cache_headers(etag: str, cache_control: Optional[str]) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
+
+
+def not_modified_response(etag: str, cache_control: Optional[str]) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
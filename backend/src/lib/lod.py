@@ -0,0 +1,119 @@
+# backend/src/lib/lod.py
+"""
+Level-of-detail variants of AR models.
+
+- build_variants: from the full GLB Blender exported, write one variant per
+  LOD_TEXTURE_SIZES entry with its texture downscaled to that size
+  ("<product_id>_1024.glb"). Sizes at or above the source texture are
+  skipped; the full model already serves them.
+- choose_lod: the variant size for a request, from an explicit `lod` query
+  parameter or, failing that, client hints (Save-Data, ECT, Device-Memory,
+  viewport width x DPR). None means the full model; clients that send
+  neither get it, as before.
+- negotiate: the key to serve for a requested model name, plus the headers
+  (Vary, Accept-CH, Content-Location) the negotiated response carries.
+"""
+
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.lib.glb import downscale_textures
+
+# ---------------------------
+# Configuration
+# ---------------------------
+LOD_TEXTURE_SIZES: List[int] = sorted({
+    int(size) for size in os.getenv("LOD_TEXTURE_SIZES", "512,1024,2048").split(",") if size.strip()
+})
+LOD_JPEG_QUALITY = int(os.getenv("LOD_JPEG_QUALITY", "85"))
+
+# Hints read by choose_lod, listed in Vary; the current names are also advertised with Accept-CH
+CLIENT_HINTS = ("Save-Data", "ECT", "Device-Memory", "Sec-CH-DPR", "Sec-CH-Viewport-Width", "DPR", "Viewport-Width")
+ACCEPT_CH = "Save-Data, ECT, Device-Memory, Sec-CH-DPR, Sec-CH-Viewport-Width"
+LOD_NAMES = {"low": 0, "medium": 1}  # index into the available sizes; "full"/"high" = the full model
+
+
+def variant_key(key: str, size: int) -> str:
+    stem, ext = os.path.splitext(key)
+    return f"{stem}_{size}{ext}"
+
+
+def build_variants(glb_path: str, out_dir: str, sizes: Iterable[int] = LOD_TEXTURE_SIZES) -> Dict[int, str]:
+    """Write the texture-reduced variants of glb_path into out_dir; returns size -> path."""
+    with open(glb_path, "rb") as f:
+        data = f.read()
+    variants = {}
+    for size in sorted(sizes):
+        variant, resized = downscale_textures(data, size, LOD_JPEG_QUALITY)
+        if not resized:
+            break  # the texture is no larger than this size, so neither is it for larger ones
+        path = os.path.join(out_dir, variant_key(os.path.basename(glb_path), size))
+        with open(path, "wb") as f:
+            f.write(variant)
+        variants[size] = path
+    return variants
+
+
+# ---------------------------
+# Negotiation
+# ---------------------------
+def _hint(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value.strip().strip('"'))
+            except ValueError:
+                pass
+    return None
+
+
+def choose_lod(sizes: List[int], lod: Optional[str], headers: Mapping[str, str]) -> Optional[int]:
+    """Variant size to serve out of the available `sizes` (ascending); None for the full model."""
+    if not sizes:
+        return None
+    if lod:
+        lod = lod.strip().lower()
+        if lod in LOD_NAMES:
+            return sizes[min(LOD_NAMES[lod], len(sizes) - 1)]
+        if lod.isdigit():
+            # The smallest variant with at least the requested resolution
+            return next((size for size in sizes if size >= int(lod)), None)
+        return None  # "full", "high" or unknown
+
+    limit = math.inf
+    if headers.get("save-data", "").strip().lower() == "on":
+        limit = 0
+    ect = headers.get("ect", "").strip().lower()
+    if ect in ("slow-2g", "2g"):
+        limit = 0
+    elif ect == "3g":
+        limit = min(limit, 1024)
+    memory = _hint(headers, "device-memory")
+    if memory is not None and memory <= 1:
+        limit = min(limit, 1024)
+    width = _hint(headers, "sec-ch-viewport-width", "viewport-width")
+    if width is not None:
+        # A texture as wide as the screen in device pixels is all the display can show
+        limit = min(limit, width * (_hint(headers, "sec-ch-dpr", "dpr") or 1.0))
+    if limit == math.inf:
+        return None
+    # The smallest variant covering the limit. None left means the full model's
+    # texture is itself within it (variants are only built below that size)
+    return next((size for size in sizes if size >= limit), None)
+
+
+def negotiate(key: str, lod: Optional[str], headers: Mapping[str, str],
+              exists: Callable[[str], bool]) -> Tuple[str, Dict[str, str]]:
+    """(key to serve, extra response headers) for a request of the full model `key`."""
+    sizes = [size for size in LOD_TEXTURE_SIZES if exists(variant_key(key, size))]
+    if not sizes:
+        return key, {}
+    extra = {"Accept-CH": ACCEPT_CH, "Vary": ", ".join(CLIENT_HINTS)}
+    size = choose_lod(sizes, lod, headers)
+    if size is None:
+        return key, extra
+    served = variant_key(key, size)
+    extra["Content-Location"] = served
+    return served, extra
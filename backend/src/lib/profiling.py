@@ -0,0 +1,258 @@
+# backend/src/lib/profiling.py
+"""
+Request-level profiling for the FastAPI app.
+
+- ProfilingMiddleware: ASGI middleware that times every request, emits a
+  `Server-Timing` header with the recorded stages and reports slow requests.
+- span: context manager that records a named stage on the current request.
+- current_timings: access the timings of the request being handled.
+
+Sampling into cProfile/pyinstrument dumps is triggered per request with an
+`X-Profile` header carrying PROFILE_TOKEN (disabled while it is unset), or
+randomly via PROFILE_SAMPLE_RATE. Both profilers are process-wide, so only
+one request is profiled at a time; others that ask are served unprofiled.
+Dumps are written on a worker thread, and only the newest PROFILE_MAX_DUMPS
+are kept.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from src.lib.logger import get_logger
+
+logger = get_logger("profiling")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+PROFILE_HEADER = "x-profile"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")  # X-Profile must match it; header profiling is off while unset
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_DUMPS = int(os.getenv("PROFILE_MAX_DUMPS", "50"))
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "profiles"),
+)
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_\-.]")
+_DUMP_SUFFIXES = (".prof", ".html")
+
+
+class RequestTimings:
+    """Stages recorded for a single request, in the order they finished."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def add(self, name: str, duration_ms: float):
+        self.stages.append((name, duration_ms))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def summary(self) -> Dict[str, float]:
+        """Merge repeated stage names by summing their durations."""
+        merged: Dict[str, float] = {}
+        for name, duration in self.stages:
+            merged[name] = merged.get(name, 0.0) + duration
+        return merged
+
+    def server_timing(self) -> str:
+        parts = [
+            f"{_TOKEN_RE.sub('_', name)};dur={duration:.1f}"
+            for name, duration in self.summary().items()
+        ]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """
+    Record how long the enclosed block takes as a named stage of the current
+    request. Outside of a request this is a no-op, so it is safe to use in
+    code that also runs from scripts.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+# ---------------------------
+# Sampled profilers
+# ---------------------------
+# Held while a profiler is running; cProfile and pyinstrument can't nest
+_profiler_active = threading.Lock()
+
+
+class _Profiler:
+    """Wraps pyinstrument when installed, cProfile otherwise."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._impl = Profiler(async_mode="enabled")
+            self.kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._impl = cProfile.Profile()
+            self.kind = "cprofile"
+
+    @classmethod
+    def start(cls) -> Optional["_Profiler"]:
+        """A running profiler, or None while another request is being profiled."""
+        if not _profiler_active.acquire(blocking=False):
+            logger.debug("Profile skipped, another request is being profiled")
+            return None
+        try:
+            profiler = cls()
+            if profiler.kind == "pyinstrument":
+                profiler._impl.start()
+            else:
+                profiler._impl.enable()
+        except Exception as e:  # e.g. a profiler attached from outside the app
+            _profiler_active.release()
+            logger.warning("Could not start profiler", extra={"error": str(e)})
+            return None
+        return profiler
+
+    def stop(self):
+        try:
+            if self.kind == "pyinstrument":
+                self._impl.stop()
+            else:
+                self._impl.disable()
+        finally:
+            _profiler_active.release()
+
+    def dump(self, label: str) -> str:
+        """Write the stopped profile to PROFILE_DIR (blocking; run off the event loop)."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(PROFILE_DIR, f"{stamp}-{_TOKEN_RE.sub('_', label)}-{uuid.uuid4().hex[:6]}")
+        if self.kind == "pyinstrument":
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._impl.output_html())
+        else:
+            path = base + ".prof"
+            self._impl.dump_stats(path)
+        _prune_dumps(PROFILE_MAX_DUMPS)
+        return path
+
+
+def _prune_dumps(keep: int):
+    """Delete all but the `keep` newest dumps in PROFILE_DIR."""
+    entries = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and entry.name.endswith(_DUMP_SUFFIXES):
+            entries.append((entry.stat().st_mtime, entry.name, entry.path))
+    entries.sort(reverse=True)
+    for _, _, path in entries[max(keep, 0):]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _should_profile(headers: Dict[str, str]) -> bool:
+    value = headers.get(PROFILE_HEADER)
+    if value is not None:
+        return bool(PROFILE_TOKEN) and hmac.compare_digest(value.encode("latin-1"), PROFILE_TOKEN.encode("utf-8"))
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+# ---------------------------
+# ASGI middleware
+# ---------------------------
+class ProfilingMiddleware:
+    """
+    Times each HTTP request, adds a `Server-Timing` header built from the
+    recorded spans and logs a stage breakdown for requests slower than
+    SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, app, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope.get("method", ""), scope.get("path", ""))
+        token = _current.set(timings)
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        profiler = _Profiler.start() if _should_profile(headers) else None
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timings.server_timing().encode("latin-1")),
+                    (b"timing-allow-origin", b"*"),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if profiler:
+                profiler.stop()
+                try:
+                    dump_path = await asyncio.to_thread(profiler.dump, f"{timings.method}{timings.path}")
+                except OSError as e:
+                    logger.warning("Could not write profile", extra={"path": timings.path, "error": str(e)})
+                else:
+                    logger.info(
+                        "Request profiled",
+                        extra={"profiler": profiler.kind, "method": timings.method, "path": timings.path,
+                               "dump": dump_path},
+                    )
+            total_ms = timings.elapsed_ms()
+            if total_ms >= self.slow_request_ms:
+                breakdown = ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.summary().items())
+                logger.warning(
+                    f"Slow request {timings.method} {timings.path} [{breakdown or 'no spans'}]",
+                    extra={
+                        "method": timings.method,
+                        "path": timings.path,
+                        "status": status_code,
+                        "duration_ms": round(total_ms, 1),
+                        "stages_ms": {name: round(ms, 1) for name, ms in timings.summary().items()},
+                    },
+                )
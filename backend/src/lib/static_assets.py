@@ -0,0 +1,192 @@
+# backend/src/lib/static_assets.py
+"""
+Indexed static asset serving for /ar_models and /uploads.
+
+- AssetResolver: in-memory index of the assets a BlobStore holds (plus
+  legacy flat files in its root). A request is a dict lookup: names that are
+  not in the index are rejected without touching the filesystem, so path
+  traversal cannot reach a file. Media type, size, ETag and the stat result
+  are cached per asset.
+- The index is updated on write (BlobStore listeners) and, for writes made by
+  other worker processes, by a thread that polls the store's write
+  generation every STATIC_INDEX_POLL_S and rebuilds when it moved.
+- AssetResolver.response: 304 for a matching If-None-Match, 404 for unknown
+  names, the body from the hot-asset cache (see hot_assets.py) for popular
+  assets, and a FileResponse with cached headers otherwise. Callers that
+  negotiate between variants (see lod.py) pass their extra headers.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response
+
+from src.lib.blobstore import BlobStore
+from src.lib.hot_assets import HotAssetCache
+from src.lib.http_cache import not_modified
+from src.lib.logger import get_logger
+
+logger = get_logger("static_assets")
+
+STATIC_INDEX_POLL_S = float(os.getenv("STATIC_INDEX_POLL_S", "2"))  # 0 disables cross-process refresh
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+}
+
+
+class AssetInfo:
+    __slots__ = ("key", "path", "size", "media_type", "etag", "stat")
+
+    def __init__(self, key: str, path: str, size: int, media_type: str, etag: Optional[str],
+                 stat: Optional[os.stat_result] = None):
+        self.key = key
+        self.path = path
+        self.size = size
+        self.media_type = media_type
+        self.etag = etag
+        self.stat = stat
+
+    def ensure_stat(self) -> os.stat_result:
+        # One stat per asset and process, on its first hit
+        if self.stat is None:
+            self.stat = os.stat(self.path)
+        if self.etag is None:
+            self.etag = f'"{self.stat.st_mtime_ns:x}-{self.stat.st_size:x}"'
+        return self.stat
+
+
+class AssetResolver:
+    def __init__(self, store: BlobStore, media_types: Dict[str, str], cache_control: str,
+                 poll_s: float = STATIC_INDEX_POLL_S, hot_cache: Optional[HotAssetCache] = None):
+        """media_types maps the allowed extensions (".glb") to their media type."""
+        self.store = store
+        self.hot_cache = hot_cache
+        self.media_types = media_types
+        self.cache_control = cache_control
+        self._index: Dict[str, AssetInfo] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refresh()
+        store.subscribe(self._on_write)
+        if poll_s > 0:
+            threading.Thread(target=self._poll, args=(poll_s,), daemon=True,
+                             name=f"asset-index-{os.path.basename(store.root)}").start()
+
+    def _media_type(self, key: str, content_type: Optional[str] = None) -> Optional[str]:
+        media_type = self.media_types.get(os.path.splitext(key)[1].lower())
+        if media_type is None:
+            return None  # extension not served from this directory
+        # The type recorded at upload wins when it agrees with the family
+        if content_type and content_type.split("/")[0] == media_type.split("/")[0]:
+            return content_type
+        return media_type
+
+    def _entry(self, meta: dict) -> Optional[AssetInfo]:
+        media_type = self._media_type(meta["key"], meta.get("content_type"))
+        if media_type is None:
+            return None
+        return AssetInfo(meta["key"], self.store.shard_path(meta["key"]), meta["size"], media_type,
+                         f'"{meta["sha256"][:32]}"')
+
+    def refresh(self):
+        """Rebuild the index from the store's database and the legacy flat files."""
+        started = time.perf_counter()
+        index: Dict[str, AssetInfo] = {}
+        with os.scandir(self.store.root) as entries:
+            for entry in entries:
+                media_type = self._media_type(entry.name)
+                if media_type is None or entry.name.startswith(".") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                index[entry.name] = AssetInfo(entry.name, entry.path, stat.st_size, media_type, None, stat)
+        for meta in self.store.iter_objects():
+            info = self._entry(meta)
+            if info is not None:
+                index[info.key] = info
+        with self._lock:
+            self._index = index
+        logger.debug("Asset index rebuilt", extra={"root": self.store.root, "assets": len(index),
+                                                   "ms": round((time.perf_counter() - started) * 1000, 1)})
+
+    def _on_write(self, key: str, meta: Optional[dict]):
+        if self.hot_cache is not None:
+            self.hot_cache.invalidate(self.store.shard_path(key))
+        with self._lock:
+            if meta is None:
+                self._index.pop(key, None)
+                # A legacy file of the same name may still exist
+                legacy = self.store.legacy_path(key)
+                media_type = self._media_type(key)
+                if media_type and os.path.isfile(legacy):
+                    self._index[key] = AssetInfo(key, legacy, os.path.getsize(legacy), media_type, None)
+                return
+            info = self._entry(meta)
+            if info is not None:
+                self._index[key] = info
+
+    def _poll(self, poll_s: float):
+        version = self.store.generation()
+        while True:
+            time.sleep(poll_s)
+            try:
+                current = self.store.generation()
+                if current != version:
+                    version = current
+                    self.refresh()
+            except Exception:
+                logger.exception("Asset index refresh failed", extra={"root": self.store.root})
+
+    def lookup(self, key: str) -> Optional[AssetInfo]:
+        info = self._index.get(key)
+        if info is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return info
+
+    def has(self, key: str) -> bool:
+        return key in self._index
+
+    def headers(self, info: AssetInfo, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        return {**CORS_HEADERS, "Cache-Control": self.cache_control, "ETag": info.etag, **(extra or {})}
+
+    async def response(self, key: str, request: Request, extra_headers: Optional[Dict[str, str]] = None) -> Response:
+        info = self.lookup(key)
+        if info is None:
+            return JSONResponse({"error": "File not found"}, status_code=404)
+        try:
+            stat = info.ensure_stat()
+        except FileNotFoundError:
+            # Removed behind the index's back (e.g. by hand); forget it
+            with self._lock:
+                self._index.pop(key, None)
+            return JSONResponse({"error": "File not found"}, status_code=404)
+        self.store.touch(key)
+        if not_modified(request, info.etag):
+            return Response(status_code=304, headers=self.headers(info, extra_headers))
+
+        # Range requests go to FileResponse, which implements them
+        if self.hot_cache is not None and "range" not in request.headers:
+            body, admit = self.hot_cache.lookup(info.path, info.etag)
+            if body is None and admit:
+                body = await asyncio.to_thread(self.hot_cache.admit, info.path, info.etag, stat.st_size)
+            if body is not None:
+                headers = {**self.headers(info, extra_headers), "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+                           "Accept-Ranges": "bytes"}
+                return Response(body, media_type=info.media_type, headers=headers)
+        return FileResponse(info.path, media_type=info.media_type, headers=self.headers(info, extra_headers),
+                            stat_result=stat)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"root": self.store.root, "assets": len(self._index), "index_hits": self.hits,
+                "index_misses": self.misses, "index_hit_rate": round(self.hits / total, 4) if total else None}
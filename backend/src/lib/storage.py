@@ -0,0 +1,232 @@
+# backend/src/lib/storage.py
+"""
+Object storage for generated assets (AR models).
+
+- Storage: interface. put_file/put_bytes/get_file are blocking;
+  upload_file, upload_bytes and download_file run them in a worker thread
+  so the event loop never waits on storage round trips.
+- GCSStorage: bucket-backed. Public ACL and Cache-Control travel with the
+  upload request itself (no separate make_public call), and files above
+  STORAGE_RESUMABLE_THRESHOLD are sent as a resumable upload in
+  STORAGE_CHUNK_BYTES chunks, so a dropped connection retries one chunk
+  rather than the whole GLB.
+- LocalStorage: the sharded local blob store (see blobstore.py) behind a
+  directory served by the app (e.g. /ar_models).
+- MemoryStorage: in-process fake with the same behaviour, for tests and
+  local experiments.
+- get_storage: the backend for a namespace, chosen by STORAGE_BACKEND
+  (gcs | local | memory; default: gcs when a bucket is configured).
+
+Keys are relative to the storage's prefix/directory, e.g. "<product_id>.glb".
+"""
+
+import asyncio
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.lib.blobstore import get_blob_store
+from src.lib.logger import get_logger
+
+logger = get_logger("storage")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "")  # empty: gcs when a bucket exists, else local
+STORAGE_RESUMABLE_THRESHOLD = int(os.getenv("STORAGE_RESUMABLE_THRESHOLD", str(8 * 1024 * 1024)))
+# GCS requires resumable chunks to be a multiple of 256 KiB
+STORAGE_CHUNK_BYTES = max(1, int(os.getenv("STORAGE_CHUNK_BYTES", str(8 * 1024 * 1024))) // (256 * 1024)) * 256 * 1024
+# Keys are reused when a model is regenerated, so keep this short
+ASSET_CACHE_CONTROL = os.getenv("ASSET_CACHE_CONTROL", "public, max-age=3600")
+
+
+class Storage:
+    name = "storage"
+
+    def put_file(self, key: str, path: str, content_type: str, cache_control: Optional[str] = None,
+                 public: bool = True):
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None,
+                  public: bool = True):
+        raise NotImplementedError
+
+    def get_file(self, key: str, path: str):
+        """Copy an object to a local path; FileNotFoundError when it does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def public_url(self, key: str, base_url: str = "") -> str:
+        """URL the object is served at once uploaded; known before the upload finishes."""
+        raise NotImplementedError
+
+    def add_ref(self, owner: str, key: str):
+        """Record that owner (a product id) uses key; only local storage garbage-collects."""
+
+    async def upload_file(self, key: str, path: str, content_type: str, cache_control: Optional[str] = None,
+                          public: bool = True):
+        await asyncio.to_thread(self.put_file, key, path, content_type, cache_control, public)
+
+    async def upload_bytes(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None,
+                           public: bool = True):
+        await asyncio.to_thread(self.put_bytes, key, data, content_type, cache_control, public)
+
+    async def download_file(self, key: str, path: str):
+        await asyncio.to_thread(self.get_file, key, path)
+
+
+class GCSStorage(Storage):
+    name = "gcs"
+
+    def __init__(self, bucket, prefix: str = ""):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _blob(self, key: str, cache_control: Optional[str] = None, size: int = 0):
+        blob = self.bucket.blob(self.prefix + key)
+        # Sent as object metadata in the upload request
+        blob.cache_control = cache_control
+        if size > STORAGE_RESUMABLE_THRESHOLD:
+            blob.chunk_size = STORAGE_CHUNK_BYTES
+        return blob
+
+    def _upload_options(self, public: bool) -> dict:
+        from google.cloud.storage.retry import DEFAULT_RETRY
+        # Same key, same bytes: retrying an interrupted upload is safe
+        options = {"retry": DEFAULT_RETRY}
+        if public:
+            options["predefined_acl"] = "publicRead"
+        return options
+
+    def put_file(self, key, path, content_type, cache_control=None, public=True):
+        blob = self._blob(key, cache_control, os.path.getsize(path))
+        blob.upload_from_filename(path, content_type=content_type, **self._upload_options(public))
+
+    def put_bytes(self, key, data, content_type, cache_control=None, public=True):
+        blob = self._blob(key, cache_control, len(data))
+        blob.upload_from_string(data, content_type=content_type, **self._upload_options(public))
+
+    def get_file(self, key, path):
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(self.prefix + key).download_to_filename(path)
+        except NotFound:
+            raise FileNotFoundError(key)
+
+    def exists(self, key):
+        return self.bucket.blob(self.prefix + key).exists()
+
+    def delete(self, key):
+        self.bucket.blob(self.prefix + key).delete()
+
+    def public_url(self, key, base_url=""):
+        return self.bucket.blob(self.prefix + key).public_url
+
+
+class LocalStorage(Storage):
+    """Objects in the sharded blob store under `root`, served by the app at `url_path` (see main.py)."""
+
+    name = "local"
+
+    def __init__(self, root: str, url_path: str):
+        self.store = get_blob_store(root, url_path)
+        self.url_path = self.store.url_path
+
+    def put_file(self, key, path, content_type, cache_control=None, public=True):
+        tmp_path = self.store.temp_path()
+        try:
+            shutil.copyfile(path, tmp_path)
+            self.store.adopt(key, tmp_path, content_type)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put_bytes(self, key, data, content_type, cache_control=None, public=True):
+        self.store.put_bytes(key, data, content_type)
+
+    def get_file(self, key, path):
+        source = self.store.resolve(key)
+        if source is None:
+            raise FileNotFoundError(key)
+        shutil.copyfile(source, path)
+
+    def exists(self, key):
+        return self.store.resolve(key, touch=False) is not None
+
+    def delete(self, key):
+        self.store.delete(key)
+
+    def public_url(self, key, base_url=""):
+        return f"{base_url}{self.url_path}/{key}"
+
+    def add_ref(self, owner, key):
+        self.store.add_ref(owner, key)
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    def __init__(self, url_base: str = "memory://"):
+        self.url_base = url_base
+        self.objects: Dict[str, Tuple[bytes, str, Optional[str], bool]] = {}
+        self._lock = threading.Lock()
+
+    def put_file(self, key, path, content_type, cache_control=None, public=True):
+        with open(path, "rb") as f:
+            self.put_bytes(key, f.read(), content_type, cache_control, public)
+
+    def put_bytes(self, key, data, content_type, cache_control=None, public=True):
+        with self._lock:
+            self.objects[key] = (bytes(data), content_type, cache_control, public)
+
+    def get_file(self, key, path):
+        if key not in self.objects:
+            raise FileNotFoundError(key)
+        with open(path, "wb") as f:
+            f.write(self.objects[key][0])
+
+    def exists(self, key):
+        return key in self.objects
+
+    def delete(self, key):
+        with self._lock:
+            self.objects.pop(key, None)
+
+    def public_url(self, key, base_url=""):
+        return f"{self.url_base}{key}"
+
+
+# ---------------------------
+# Backend selection
+# ---------------------------
+_storages: Dict[str, Storage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(namespace: str, bucket=None, local_root: Optional[str] = None,
+                gcs_prefix: Optional[str] = None) -> Storage:
+    """
+    Storage for a namespace ("ar_models", ...): GCS objects under gcs_prefix
+    (default "<namespace>/") or files in local_root served at "/<namespace>".
+    """
+    with _storages_lock:
+        storage = _storages.get(namespace)
+        if storage is None:
+            kind = STORAGE_BACKEND or ("gcs" if bucket else "local")
+            if kind == "gcs" and bucket:
+                storage = GCSStorage(bucket, prefix=gcs_prefix if gcs_prefix is not None else f"{namespace}/")
+            elif kind == "memory":
+                storage = MemoryStorage(url_base=f"memory://{namespace}/")
+            else:
+                storage = LocalStorage(local_root or namespace, url_path=f"/{namespace}")
+            _storages[namespace] = storage
+            logger.info("Storage selected", extra={"namespace": namespace, "backend": storage.name})
+        return storage
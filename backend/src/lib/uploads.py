@@ -0,0 +1,246 @@
+# backend/src/lib/uploads.py
+"""
+Direct-to-storage image uploads.
+
+Clients ask for an upload URL, PUT the image bytes straight to it and then
+report completion; image bytes never pass through an API worker's memory.
+
+- create_upload: issues a time-limited upload target. With a storage bucket
+  this is a GCS V4 signed PUT URL; without one it points at the local
+  /direct_upload endpoint, authorized by an HMAC signature.
+- verify_local / receive_local: check the signature and stream the request
+  body into the uploads blob store in chunks, enforcing the size limit.
+- complete_upload: confirms the object exists and schedules normalize_image
+  (EXIF orientation, downscale to UPLOAD_MAX_DIMENSION, re-encode) off the
+  event loop.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import os
+import secrets
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from PIL import Image, ImageOps
+
+from src.lib.blobstore import BlobStore, get_blob_store
+from src.lib.logger import get_logger
+
+logger = get_logger("uploads")
+
+# ---------------------------
+# Configuration
+# ---------------------------
+UPLOADS_DIR = os.getenv(
+    "UPLOADS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads"),
+)
+UPLOAD_URL_TTL_S = int(os.getenv("UPLOAD_URL_TTL_S", "900"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_MAX_DIMENSION = int(os.getenv("UPLOAD_MAX_DIMENSION", "2048"))
+UPLOAD_WRITE_BYTES = int(os.getenv("UPLOAD_WRITE_BYTES", str(1024 * 1024)))  # body chunks are buffered to this
+
+UPLOAD_SIGNING_KEY = os.getenv("UPLOAD_SIGNING_KEY", "").encode("utf-8")
+if not UPLOAD_SIGNING_KEY:
+    # Local URLs then only verify on the process that issued them
+    UPLOAD_SIGNING_KEY = secrets.token_bytes(32)
+
+# content type -> (extension, PIL format)
+IMAGE_TYPES = {
+    "image/jpeg": (".jpg", "JPEG"),
+    "image/png": (".png", "PNG"),
+    "image/webp": (".webp", "WEBP"),
+    "image/gif": (".gif", "GIF"),
+}
+
+
+def _check_type(content_type: str) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type not in IMAGE_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported image type: {content_type or 'missing'}")
+    return content_type
+
+
+def _check_name(filename: str):
+    # Names are issued by create_upload: <hex><ext>, nothing path-like
+    stem, ext = os.path.splitext(filename)
+    if not stem or not all(c in "0123456789abcdef" for c in stem) or ext not in {e for e, _ in IMAGE_TYPES.values()}:
+        raise HTTPException(status_code=400, detail="Invalid upload name")
+
+
+# ---------------------------
+# Local HMAC-signed uploads
+# ---------------------------
+def sign_local(filename: str, content_type: str, expires: int, max_bytes: int) -> str:
+    message = f"PUT\n{filename}\n{content_type}\n{expires}\n{max_bytes}".encode("utf-8")
+    return hmac.new(UPLOAD_SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+
+def verify_local(filename: str, content_type: str, expires: int, max_bytes: int, signature: str):
+    _check_name(filename)
+    expected = sign_local(filename, content_type, expires, max_bytes)
+    if not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=403, detail="Invalid upload signature")
+    if time.time() > expires:
+        raise HTTPException(status_code=403, detail="Upload URL expired")
+
+
+def upload_store() -> BlobStore:
+    return get_blob_store(UPLOADS_DIR, "/uploads")
+
+
+async def receive_local(request: Request, filename: str, max_bytes: int) -> int:
+    """Stream the request body into the uploads blob store; returns the byte count."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    store = upload_store()
+    tmp_path = store.temp_path()
+    size = 0
+    buffer = bytearray()
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                buffer += chunk
+                # Disk writes happen on a worker thread, a few large ones per upload
+                if len(buffer) >= UPLOAD_WRITE_BYTES:
+                    await asyncio.to_thread(f.write, buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(f.write, buffer)
+        await asyncio.to_thread(store.adopt, filename, tmp_path, request.headers.get("content-type"))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return size
+
+
+# ---------------------------
+# Issuing upload targets
+# ---------------------------
+def create_upload(bucket, base_url: str, content_type: str, size: Optional[int] = None) -> dict:
+    """
+    Upload target for one image: PUT `uploadUrl` with the returned headers,
+    then POST {"key": key} to /upload_complete.
+    """
+    content_type = _check_type(content_type)
+    if size is not None and size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Images are limited to {UPLOAD_MAX_BYTES} bytes")
+
+    filename = uuid.uuid4().hex + IMAGE_TYPES[content_type][0]
+    expires = int(time.time()) + UPLOAD_URL_TTL_S
+    headers = {"Content-Type": content_type}
+
+    if bucket:
+        # GCS rejects bodies outside this range; the client must send the header
+        headers["x-goog-content-length-range"] = f"0,{UPLOAD_MAX_BYTES}"
+        upload_url = bucket.blob(f"uploads/{filename}").generate_signed_url(
+            version="v4",
+            expiration=datetime.timedelta(seconds=UPLOAD_URL_TTL_S),
+            method="PUT",
+            content_type=content_type,
+            headers={"x-goog-content-length-range": headers["x-goog-content-length-range"]},
+        )
+    else:
+        signature = sign_local(filename, content_type, expires, UPLOAD_MAX_BYTES)
+        upload_url = (f"{base_url}/direct_upload/{filename}"
+                      f"?expires={expires}&max_bytes={UPLOAD_MAX_BYTES}&sig={signature}")
+
+    return {
+        "key": filename,
+        "uploadUrl": upload_url,
+        "method": "PUT",
+        "headers": headers,
+        "expiresAt": expires,
+        "maxBytes": UPLOAD_MAX_BYTES,
+    }
+
+
+# ---------------------------
+# Completion and normalization
+# ---------------------------
+def normalize_image(src_path: str, dst_path: str, content_type: str) -> bool:
+    """
+    Apply EXIF orientation, downscale past UPLOAD_MAX_DIMENSION and re-encode
+    to dst_path (drops metadata). False when the image is kept as uploaded.
+    """
+    pil_format = IMAGE_TYPES[content_type][1]
+    with Image.open(src_path) as img:
+        if pil_format == "GIF" and getattr(img, "is_animated", False):
+            return False  # re-encoding would drop frames
+        img = ImageOps.exif_transpose(img)
+    img.thumbnail((UPLOAD_MAX_DIMENSION, UPLOAD_MAX_DIMENSION))  # only ever shrinks
+    options = {}
+    if pil_format == "JPEG":
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        options = {"quality": 90, "optimize": True}
+    img.save(dst_path, format=pil_format, **options)
+    return True
+
+
+def _normalize_local(filename: str, content_type: str):
+    store = upload_store()
+    tmp_path = store.temp_path()
+    try:
+        if normalize_image(store.resolve(filename, touch=False), tmp_path, content_type):
+            meta = store.adopt(filename, tmp_path, content_type)
+            logger.info("Upload normalized", extra={"key": filename, "size_bytes": meta["size"]})
+    except Exception as e:
+        # Not a decodable image: drop it rather than serve it
+        logger.warning("Upload rejected", extra={"key": filename, "error": str(e)})
+        store.delete(filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _normalize_blob(bucket, filename: str, content_type: str):
+    blob = bucket.blob(f"uploads/{filename}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, filename)
+            normalized_path = os.path.join(tmp_dir, "normalized")
+            blob.download_to_filename(path)
+            try:
+                if not normalize_image(path, normalized_path, content_type):
+                    normalized_path = path
+            except Exception as e:
+                logger.warning("Upload rejected", extra={"key": filename, "error": str(e)})
+                blob.delete()
+                return
+            blob.cache_control = "public, max-age=86400"
+            blob.upload_from_filename(normalized_path, content_type=content_type, predefined_acl="publicRead")
+    except Exception:
+        logger.exception("Upload normalization failed", extra={"key": filename})
+        return
+    logger.info("Upload normalized", extra={"key": filename, "bucket": bucket.name})
+
+
+async def complete_upload(bucket, base_url: str, filename: str) -> dict:
+    """Confirm an uploaded object and normalize it in the background; returns its URL."""
+    _check_name(filename)
+    content_type = next(t for t, (ext, _) in IMAGE_TYPES.items() if filename.endswith(ext))
+
+    if bucket:
+        blob = bucket.blob(f"uploads/{filename}")
+        if not await asyncio.to_thread(blob.exists):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        asyncio.get_running_loop().run_in_executor(None, _normalize_blob, bucket, filename, content_type)
+        return {"key": filename, "imageUrl": blob.public_url, "status": "processing"}
+
+    if upload_store().resolve(filename, touch=False) is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    asyncio.get_running_loop().run_in_executor(None, _normalize_local, filename, content_type)
+    return {"key": filename, "imageUrl": f"{base_url}/uploads/{filename}", "status": "processing"}
@@ -0,0 +1,365 @@
+# backend/src/recommendation/ann.py
+"""
+Approximate nearest-neighbour index for similar-product lookups.
+
+- ProductFeaturizer: fixed-size feature vector per product from category,
+  materials, techniques, price bucket and text, so products can be added one
+  at a time without refitting.
+- IVFIndex: inverted-file index over NumPy vectors. K-means centroids split
+  the catalog into lists; a query only scores the `nprobe` closest lists.
+  Supports incremental upserts, removals and save/load to a single .npz file.
+- get_similar_index / index_product / remove_product / similar_products:
+  module-level index used by the routes, persisted at ANN_INDEX_PATH. Each
+  entry keeps a fingerprint of the fields it was featurized from, so a sync
+  with the catalog re-featurizes edited products and, given the complete
+  catalog, drops deleted or unpublished ones.
+"""
+
+import atexit
+import hashlib
+import json
+import math
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.recommendation.semantic import HashingEmbedder
+from src.lib.logger import get_logger
+
+logger = get_logger("ann")
+
+ANN_INDEX_PATH = os.getenv(
+    "ANN_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "indexes", "similar_products.npz"),
+)
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "4"))
+ANN_SAVE_EVERY = int(os.getenv("ANN_SAVE_EVERY", "25"))  # upserts between automatic saves
+
+# Bump when the feature layout changes so persisted indexes are rebuilt
+FEATURIZER_VERSION = 1
+PRICE_BUCKETS = [500, 1000, 2000, 3500, 5000, 10000, 20000]  # INR upper bounds
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [str(v) for v in value]
+
+
+def product_price(product: dict) -> Optional[float]:
+    """Price of a catalog product or a Firestore product document."""
+    if isinstance(product.get("finalPrice"), (int, float)):
+        return float(product["finalPrice"])
+    price = product.get("price")
+    if isinstance(price, dict):
+        price = price.get("min")
+    return float(price) if isinstance(price, (int, float)) else None
+
+
+def product_fingerprint(product: dict) -> str:
+    """Hash of the fields ProductFeaturizer reads; changes when the product's features do."""
+    fields = [product.get(key) for key in ("name", "title", "aiHint", "description", "story", "tags", "category",
+                                           "materials", "techniques", "technique")]
+    fields.append(product_price(product))
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class ProductFeaturizer:
+    """Concatenates weighted one-hot/hashed blocks into one L2-normalized vector."""
+
+    def __init__(self, tag_dim: int = 64, text_dim: int = 256):
+        self.tag_dim = tag_dim
+        self.text = HashingEmbedder(dim=text_dim)
+        self.dim = tag_dim * 3 + len(PRICE_BUCKETS) + 1 + text_dim
+        # Relative importance of each block
+        self.weights = {"category": 1.0, "materials": 0.6, "techniques": 0.6, "price": 0.5, "text": 1.0}
+
+    def _hashed_block(self, values: Iterable[str]) -> np.ndarray:
+        block = np.zeros(self.tag_dim, dtype=np.float32)
+        for value in values:
+            block[zlib.crc32(value.lower().strip().encode("utf-8")) % self.tag_dim] = 1.0
+        norm = np.linalg.norm(block)
+        return block / norm if norm else block
+
+    def _price_block(self, price: Optional[float]) -> np.ndarray:
+        block = np.zeros(len(PRICE_BUCKETS) + 1, dtype=np.float32)
+        if price is None:
+            return block
+        bucket = next((i for i, bound in enumerate(PRICE_BUCKETS) if price <= bound), len(PRICE_BUCKETS))
+        block[bucket] = 1.0
+        # Neighbouring buckets count as partially similar
+        if bucket > 0:
+            block[bucket - 1] = 0.5
+        if bucket < len(PRICE_BUCKETS):
+            block[bucket + 1] = 0.5
+        return block / np.linalg.norm(block)
+
+    def featurize(self, product: dict) -> np.ndarray:
+        name = product.get("name") or product.get("title") or ""
+        text = " ".join([
+            name, product.get("aiHint") or "", product.get("description") or product.get("story") or "",
+            " ".join(_as_list(product.get("tags")))
+        ])
+        w = self.weights
+        vector = np.concatenate([
+            w["category"] * self._hashed_block([product.get("category") or ""]),
+            w["materials"] * self._hashed_block(_as_list(product.get("materials"))),
+            w["techniques"] * self._hashed_block(_as_list(product.get("techniques") or product.get("technique"))),
+            w["price"] * self._price_block(product_price(product)),
+            w["text"] * self.text.embed([text])[0],
+        ]).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class IVFIndex:
+    """Inverted-file ANN index with cosine similarity (vectors are unit length)."""
+
+    def __init__(self, dim: int, nprobe: int = ANN_NPROBE):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self.size = 0
+        self.centroids = np.zeros((0, dim), dtype=np.float32)
+        self.assignment = np.zeros(0, dtype=np.int32)
+        self.lists: List[List[int]] = []
+        self._trained_size = 0
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self.size]
+
+    # ---------- training ----------
+    def train(self, iterations: int = 10, seed: int = 0):
+        """(Re)cluster all vectors with spherical k-means, nlist ~ sqrt(n)."""
+        n = self.size
+        if n == 0:
+            return
+        nlist = max(1, min(n, int(math.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    norm = np.linalg.norm(mean)
+                    centroids[c] = mean / norm if norm else centroids[c]
+        self.centroids = centroids
+        self.assignment = np.argmax(self.vectors @ centroids.T, axis=1).astype(np.int32)
+        self.lists = [[] for _ in range(nlist)]
+        for row, c in enumerate(self.assignment):
+            self.lists[c].append(row)
+        self._trained_size = n
+
+    def _needs_retrain(self) -> bool:
+        return self.size >= 2 * max(self._trained_size, 8)
+
+    # ---------- updates ----------
+    def upsert(self, product_id: str, vector: np.ndarray):
+        vector = vector.astype(np.float32)
+        row = self.row_of.get(product_id)
+        if row is None:
+            if self.size == len(self._vectors):
+                grown = np.zeros((max(16, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+                grown[:self.size] = self._vectors[:self.size]
+                self._vectors = grown
+            row = self.size
+            self.size += 1
+            self.ids.append(product_id)
+            self.row_of[product_id] = row
+            self.assignment = np.append(self.assignment, -1).astype(np.int32)
+        elif len(self.centroids):
+            self.lists[self.assignment[row]].remove(row)
+        self._vectors[row] = vector
+
+        if not len(self.centroids) or self._needs_retrain():
+            self.train()
+        else:
+            c = int(np.argmax(self.centroids @ vector))
+            self.assignment[row] = c
+            self.lists[c].append(row)
+
+    def remove(self, product_id: str) -> bool:
+        """Drop a product; the last row moves into its slot so rows stay contiguous."""
+        row = self.row_of.pop(product_id, None)
+        if row is None:
+            return False
+        last = self.size - 1
+        if len(self.centroids):
+            self.lists[self.assignment[row]].remove(row)
+        if row != last:
+            moved = self.ids[last]
+            self._vectors[row] = self._vectors[last]
+            self.ids[row] = moved
+            self.row_of[moved] = row
+            if len(self.centroids):
+                members = self.lists[self.assignment[last]]
+                members[members.index(last)] = row
+            self.assignment[row] = self.assignment[last]
+        self.ids.pop()
+        self.assignment = self.assignment[:last]
+        self.size = last
+        return True
+
+    # ---------- search ----------
+    def search(self, vector: np.ndarray, k: int, exclude: Optional[set] = None) -> List[Tuple[str, float]]:
+        if self.size == 0 or k <= 0:
+            return []
+        probes = np.argsort(-(self.centroids @ vector))[:self.nprobe]
+        rows = np.fromiter((r for c in probes for r in self.lists[c]), dtype=np.int64)
+        if exclude:
+            rows = rows[[self.ids[r] not in exclude for r in rows]] if len(rows) else rows
+        if not len(rows):
+            return []
+        scores = self._vectors[rows] @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def search_id(self, product_id: str, k: int) -> List[Tuple[str, float]]:
+        row = self.row_of[product_id]
+        return self.search(self._vectors[row], k, exclude={product_id})
+
+    # ---------- persistence ----------
+    def save(self, path: str, meta: Optional[dict] = None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            vectors=self.vectors,
+            centroids=self.centroids,
+            assignment=self.assignment,
+            ids=np.asarray(json.dumps(self.ids)),
+            meta=np.asarray(json.dumps({**(meta or {}), "trained_size": self._trained_size}, default=str)),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = ANN_NPROBE) -> Tuple["IVFIndex", dict]:
+        data = np.load(path, allow_pickle=False)
+        vectors = data["vectors"]
+        index = cls(vectors.shape[1], nprobe)
+        index._vectors = vectors.copy()
+        index.size = len(vectors)
+        index.ids = json.loads(str(data["ids"]))
+        index.row_of = {pid: row for row, pid in enumerate(index.ids)}
+        index.centroids = data["centroids"]
+        index.assignment = data["assignment"].astype(np.int32)
+        index.lists = [[] for _ in range(len(index.centroids))]
+        for row, c in enumerate(index.assignment):
+            index.lists[c].append(row)
+        meta = json.loads(str(data["meta"]))
+        index._trained_size = meta.get("trained_size", index.size)
+        return index, meta
+
+
+# ---------------------------
+# Module-level index used by the API
+# ---------------------------
+_featurizer = ProductFeaturizer()
+_index: Optional[IVFIndex] = None
+_products: Dict[str, dict] = {}
+_fingerprints: Dict[str, str] = {}
+_lock = threading.Lock()
+_unsaved = 0
+
+
+def _save():
+    global _unsaved
+    if _index is not None and _unsaved:
+        # Product payloads ride along so results can be served before the catalog is re-synced
+        _index.save(ANN_INDEX_PATH, {"featurizer_version": FEATURIZER_VERSION, "products": _products,
+                                     "fingerprints": _fingerprints})
+        _unsaved = 0
+
+
+atexit.register(_save)
+
+
+def get_similar_index(catalog: Iterable[dict] = (), complete: bool = False) -> IVFIndex:
+    """
+    Load the persisted index (or create one) and sync it with `catalog`:
+    products that are missing or changed since they were indexed are
+    (re)featurized. With complete=True the catalog is every product that may
+    be recommended, and indexed products absent from it are removed.
+    """
+    global _index
+    with _lock:
+        if _index is None:
+            if os.path.exists(ANN_INDEX_PATH):
+                try:
+                    loaded, meta = IVFIndex.load(ANN_INDEX_PATH)
+                    if meta.get("featurizer_version") == FEATURIZER_VERSION and loaded.dim == _featurizer.dim:
+                        _index = loaded
+                        _products.update(meta.get("products", {}))
+                        _fingerprints.update(meta.get("fingerprints", {}))
+                        logger.info("Loaded similar-product index", extra={"path": ANN_INDEX_PATH, "size": loaded.size})
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Could not load similar-product index", extra={"error": str(e)})
+            if _index is None:
+                _index = IVFIndex(_featurizer.dim)
+    seen = set()
+    for product in catalog:
+        pid = str(product.get("id"))
+        seen.add(pid)
+        # Plain dicts, since catalog rows may be views and payloads are persisted as JSON
+        product = dict(product)
+        if pid not in _index.row_of or _fingerprints.get(pid) != product_fingerprint(product):
+            index_product(product)
+        else:
+            _products[pid] = product
+    if complete:
+        for pid in [pid for pid in _index.ids if pid not in seen]:
+            remove_product(pid)
+    return _index
+
+
+def index_product(product: dict):
+    """Insert or update one product (e.g. when it is published)."""
+    global _unsaved
+    index = _index if _index is not None else get_similar_index()
+    pid = str(product.get("id"))
+    with _lock:
+        _products[pid] = dict(product)
+        _fingerprints[pid] = product_fingerprint(product)
+        index.upsert(pid, _featurizer.featurize(product))
+        _unsaved += 1
+        if _unsaved >= ANN_SAVE_EVERY:
+            _save()
+
+
+def remove_product(product_id: str) -> bool:
+    """Drop a deleted or unpublished product from the index."""
+    global _unsaved
+    index = _index if _index is not None else get_similar_index()
+    with _lock:
+        _products.pop(product_id, None)
+        _fingerprints.pop(product_id, None)
+        if not index.remove(product_id):
+            return False
+        _unsaved += 1
+        if _unsaved >= ANN_SAVE_EVERY:
+            _save()
+    return True
+
+
+def similar_products(product_id: str, k: int = 4) -> Optional[List[dict]]:
+    """Products most similar to product_id, or None if it is not indexed."""
+    index = get_similar_index()
+    if product_id not in index.row_of:
+        return None
+    results = []
+    for pid, score in index.search_id(product_id, k):
+        product = _products.get(pid, {"id": pid})
+        results.append({**product, "similarityScore": round(max(score, 0.0), 4)})
+    return results
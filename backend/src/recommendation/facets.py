@@ -0,0 +1,256 @@
+# backend/src/recommendation/facets.py
+"""
+Precomputed facets for recommendation filters.
+
+- FacetIndex: normalized category/artisan keys, price-sorted rows per
+  category (range filters via bisect) and row sets per artisan, so a filter
+  costs O(distinct keys + matching rows) instead of a scan of the catalog.
+- ColumnarFacetIndex: the same interface over a columnar Catalog. Rows are
+  grouped by category code and sorted by price within each group, so a
+  filter is a searchsorted slice per matching category plus work on the
+  matching rows only. Missing prices sort last and fail any price bound,
+  as in Catalog.filter_mask.
+- get_facet_index: cached facet index per product list.
+- request_candidates: candidate rows for a request, combining its explicit
+  preferences with filters parsed from the prompt.
+- suggested_filters: facet counts for the filtered candidates, used to fill
+  `suggestedFilters` in recommendation responses.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.lib.catalog import Catalog
+from src.recommendation.query_parser import ParsedQuery, merge_filters
+
+# Upper bounds (INR) of the price buckets reported in suggestedFilters
+PRICE_BUCKETS = [1000, 2500, 5000, 10000]
+
+
+def normalize_key(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def price_bucket_label(price: float) -> str:
+    lower = 0
+    for bound in PRICE_BUCKETS:
+        if price <= bound:
+            return f"{lower}-{bound}"
+        lower = bound
+    return f"{lower}+"
+
+
+class BaseFacetIndex:
+    """Interface shared by the facet indexes; subclasses set `products` and `prices`."""
+
+    products: Sequence[dict]
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def filter_rows(self, categories: Optional[List[str]] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, artisans: Optional[List[str]] = None,
+                    exclude_ids: Optional[List[str]] = None) -> List[int]:
+        """Row numbers (in catalog order) of products matching every given filter."""
+        raise NotImplementedError
+
+    def get(self, product_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def value_counts(self, field: str, rows: List[int]) -> Counter:
+        raise NotImplementedError
+
+    def filter_products(self, *args, **kwargs) -> List[dict]:
+        return [self.products[r] for r in self.filter_rows(*args, **kwargs)]
+
+
+class FacetIndex(BaseFacetIndex):
+    def __init__(self, products: Sequence[dict]):
+        self.products = products
+        self.ids = [str(p.get("id")) for p in products]
+        self.row_of = {pid: row for row, pid in enumerate(self.ids)}
+        self.prices = [float(p.get("price") or 0) for p in products]
+        self.category_keys = [normalize_key(p.get("category")) for p in products]
+        self.artisan_keys = [normalize_key(p.get("artisan")) for p in products]
+
+        # category key -> (sorted prices, rows in the same order)
+        self._by_category: Dict[str, tuple] = {}
+        for key in set(self.category_keys):
+            rows = sorted((r for r, k in enumerate(self.category_keys) if k == key), key=self.prices.__getitem__)
+            self._by_category[key] = ([self.prices[r] for r in rows], rows)
+        all_rows = sorted(range(len(products)), key=self.prices.__getitem__)
+        self._all = ([self.prices[r] for r in all_rows], all_rows)
+
+        self._by_artisan: Dict[str, set] = {}
+        for row, key in enumerate(self.artisan_keys):
+            self._by_artisan.setdefault(key, set()).add(row)
+
+    def _matching_keys(self, keys, wanted: List[str]) -> List[str]:
+        # Same semantics as the original filters: the requested value is a
+        # substring of the product's value. Only distinct keys are scanned.
+        wanted = [normalize_key(w) for w in wanted]
+        return [key for key in keys if any(w in key for w in wanted)]
+
+    @staticmethod
+    def _price_slice(prices: List[float], rows: List[int], lo: Optional[float], hi: Optional[float]) -> List[int]:
+        start = bisect_left(prices, lo) if lo is not None else 0
+        end = bisect_right(prices, hi) if hi is not None else len(prices)
+        return rows[start:end]
+
+    def filter_rows(self, categories: Optional[List[str]] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, artisans: Optional[List[str]] = None,
+                    exclude_ids: Optional[List[str]] = None) -> List[int]:
+        if categories:
+            rows: List[int] = []
+            for key in self._matching_keys(self._by_category.keys(), categories):
+                prices, cat_rows = self._by_category[key]
+                rows.extend(self._price_slice(prices, cat_rows, min_price, max_price))
+        else:
+            rows = list(self._price_slice(*self._all, min_price, max_price))
+
+        if artisans:
+            allowed = set()
+            for key in self._matching_keys(self._by_artisan.keys(), artisans):
+                allowed |= self._by_artisan[key]
+            rows = [r for r in rows if r in allowed]
+        if exclude_ids:
+            excluded = set(exclude_ids)
+            rows = [r for r in rows if self.ids[r] not in excluded]
+        rows.sort()
+        return rows
+
+    def get(self, product_id: str) -> Optional[dict]:
+        row = self.row_of.get(str(product_id))
+        return self.products[row] if row is not None else None
+
+    def value_counts(self, field: str, rows: List[int]) -> Counter:
+        return Counter(v for v in (self.products[r].get(field) for r in rows) if v)
+
+
+class ColumnarFacetIndex(BaseFacetIndex):
+    def __init__(self, catalog: Catalog):
+        self.products = catalog
+        self.prices = np.nan_to_num(catalog.prices)
+        self._categories = catalog.columns["category"]
+        self._artisans = catalog.columns["artisan"]
+
+        # Rows grouped by category code (-1 = none first), price-sorted within a group; NaN sorts last
+        self._order = np.lexsort((catalog.prices, self._categories.codes))
+        self._sorted_prices = catalog.prices[self._order]
+        codes = self._categories.codes[self._order]
+        # Group of code c is _order[_bounds[c + 1]:_bounds[c + 2]]
+        self._bounds = np.searchsorted(codes, np.arange(-1, len(self._categories.values) + 1))
+        self._by_price = np.argsort(catalog.prices, kind="stable")
+        self._all_prices = catalog.prices[self._by_price]
+
+    def get(self, product_id: str) -> Optional[dict]:
+        return self.products.get(product_id)
+
+    @staticmethod
+    def _price_slice(prices: np.ndarray, start: int, end: int, lo: Optional[float],
+                     hi: Optional[float]) -> Tuple[int, int]:
+        if lo is None and hi is None:
+            return start, end  # rows without a price only pass when no bound is given
+        group = prices[start:end]
+        # inf sorts before NaN, so an open upper bound still stops at the missing prices
+        first = np.searchsorted(group, -np.inf if lo is None else lo, side="left")
+        last = np.searchsorted(group, np.inf if hi is None else hi, side="right")
+        return start + int(first), start + int(last)
+
+    def filter_rows(self, categories: Optional[List[str]] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, artisans: Optional[List[str]] = None,
+                    exclude_ids: Optional[List[str]] = None) -> List[int]:
+        if categories:
+            wanted = self._categories.matching_codes([normalize_key(c) for c in categories])
+            parts = []
+            for code in wanted.tolist():
+                start, end = self._price_slice(self._sorted_prices, int(self._bounds[code + 1]),
+                                               int(self._bounds[code + 2]), min_price, max_price)
+                parts.append(self._order[start:end])
+            rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        else:
+            start, end = self._price_slice(self._all_prices, 0, len(self._all_prices), min_price, max_price)
+            rows = self._by_price[start:end]
+
+        if artisans:
+            wanted = self._artisans.matching_codes([normalize_key(a) for a in artisans])
+            rows = rows[np.isin(self._artisans.codes[rows], wanted)]
+        if exclude_ids:
+            excluded = [row for row in map(self.products.row_of, exclude_ids) if row is not None]
+            if excluded:
+                rows = rows[~np.isin(rows, excluded)]
+        return np.sort(rows).tolist()
+
+    def value_counts(self, field: str, rows: List[int]) -> Counter:
+        column = self.products.columns[field]
+        codes = column.codes[np.asarray(rows, dtype=np.int64)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(column.values))
+        return Counter({column.values[code]: int(n) for code, n in enumerate(counts) if n and column.values[code]})
+
+
+_lock = threading.Lock()
+# id(products) -> (size when built, index); the index shares the list, so its own len() tracks appends
+_cache: Dict[int, Tuple[int, BaseFacetIndex]] = {}
+
+
+def get_facet_index(products: Sequence[dict]) -> BaseFacetIndex:
+    """Facets for a product list, rebuilt when the list changes size."""
+    key = id(products)
+    cached = _cache.get(key)
+    if cached is None or cached[0] != len(products):
+        with _lock:
+            cached = _cache.get(key)
+            if cached is None or cached[0] != len(products):
+                index = ColumnarFacetIndex(products) if isinstance(products, Catalog) else FacetIndex(products)
+                _cache.clear()
+                _cache[key] = cached = (len(products), index)
+    return cached[1]
+
+
+def filters_from_request(req) -> dict:
+    prefs = req.userPreferences
+    return {
+        "categories": prefs.categories if prefs else None,
+        "min_price": prefs.priceRange.min if prefs and prefs.priceRange else None,
+        "max_price": prefs.priceRange.max if prefs and prefs.priceRange else None,
+        "artisans": prefs.preferredArtisans if prefs else None,
+        "exclude_ids": req.excludeProducts,
+    }
+
+
+def request_candidates(req, products: Sequence[dict],
+                       parsed: Optional[ParsedQuery] = None) -> Tuple[BaseFacetIndex, List[int]]:
+    """Facet index and matching rows for a request."""
+    index = get_facet_index(products)
+    filters = filters_from_request(req)
+    if parsed is None or parsed.is_empty():
+        return index, index.filter_rows(**filters)
+    rows = index.filter_rows(**merge_filters(filters, parsed))
+    if not rows:
+        # Filters inferred from the prompt matched nothing; keep only the explicit ones
+        rows = index.filter_rows(**filters)
+    return index, rows
+
+
+def suggested_filters(index: BaseFacetIndex, rows: List[int], top: int = 5) -> dict:
+    """Facet values and counts over the candidate rows, in SuggestedFilters shape."""
+    if not rows:
+        return {}
+    categories = index.value_counts("category", rows)
+    artisans = index.value_counts("artisan", rows)
+    prices = [float(index.prices[r]) for r in rows]
+    buckets = Counter(price_bucket_label(p) for p in prices)
+    return {
+        "priceRange": {"min": min(prices), "max": max(prices)},
+        "categories": [c for c, _ in categories.most_common(top)],
+        "artisans": [a for a, _ in artisans.most_common(top)],
+        "counts": {
+            "categories": dict(categories.most_common(top)),
+            "artisans": dict(artisans.most_common(top)),
+            "priceBuckets": dict(sorted(buckets.items(), key=lambda item: float(item[0].split("-")[0].rstrip("+")))),
+        },
+    }
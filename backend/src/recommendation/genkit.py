@@ -1,6 +1,8 @@
 import google.generativeai as genai
 import os
 
+from src.ai.router import MODEL_TIERS
+
 # Load your API key from environment variables
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -10,9 +12,12 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 
 
-# Configure Gemini 1.5 Pro for better reasoning
+# Configure the heavy tier (Gemini 1.5 Pro by default) for better reasoning.
+# /recommend itself routes between the tiers per request through the
+# "recommend" flow of src.ai.router (see src/recommendation/rerank.py).
 class RecommendationAI:
-    def __init__(self, model_name: str = "gemini-1.5-pro"):
+    def __init__(self, model_name: str = MODEL_TIERS["heavy"]):
+        self.model_name = model_name
         self.model = genai.GenerativeModel(model_name)
 
     def generate(self, prompt: str, temperature: float = 0.7, top_p: float = 0.9, max_output_tokens: int = 2048):
@@ -30,9 +35,9 @@ class RecommendationAI:
 # Alternative config for faster responses
 class FastRecommendationAI(RecommendationAI):
     def __init__(self):
-        super().__init__(model_name="gemini-2.5-flash")
+        super().__init__(model_name=MODEL_TIERS["fast"])
 
 
 # Usage example
-recommendation_ai = RecommendationAI()          # Gemini 1.5 Pro
-fast_recommendation_ai = FastRecommendationAI() # Gemini 1.5 Flash
+recommendation_ai = RecommendationAI()          # Heavy tier (Gemini 1.5 Pro)
+fast_recommendation_ai = FastRecommendationAI() # Fast tier (Gemini 2.5 Flash)
@@ -0,0 +1,69 @@
+# backend/src/recommendation/keyword.py
+"""
+Keyword engine for /recommend: products passing the request's filters are
+scored by prompt words found in their name, category and aiHint, plus a
+boost when their region, name, aiHint or description mentions a region,
+occasion or color parsed from the prompt.
+"""
+
+import heapq
+from typing import List, Optional
+
+from src.lib.catalog import Catalog
+from src.recommendation.facets import request_candidates, suggested_filters
+from src.recommendation.personalization import UserAffinity, blend_weight
+from src.recommendation.query_parser import ParsedQuery
+
+# Added once per product matching any parsed region, occasion or color
+SCORING_TERM_BOOST = 0.1
+
+
+def _field_values(products, field: str, rows: List[int]) -> List[str]:
+    if isinstance(products, Catalog):
+        return [value or "" for value in products.column_values(field, rows, "")]
+    return [products[row].get(field) or "" for row in rows]
+
+
+def keyword_recommendations(req, products: List[dict], parsed: Optional[ParsedQuery] = None,
+                            profile: Optional[UserAffinity] = None) -> dict:
+    words = req.userPrompt.lower().split()
+    max_results = req.maxResults or 5
+
+    # Category, price range, artisan and exclusion filters from precomputed facets
+    facets, candidate_rows = request_candidates(req, products, parsed)
+
+    # Each field is read once per product (columnar catalogs decode whole columns), not once per prompt word
+    names, categories, hints = (_field_values(products, field, candidate_rows) for field in ("name", "category", "aiHint"))
+    terms = parsed.scoring_terms() if parsed else []
+    if terms:
+        regions, descriptions = (_field_values(products, field, candidate_rows) for field in ("region", "description"))
+    else:
+        regions = descriptions = [""] * len(candidate_rows)
+    scored = []
+    for row, name, category, hint, region, description in zip(candidate_rows, names, categories, hints, regions,
+                                                              descriptions):
+        name, hint = name.lower(), hint.lower()
+        score = 0.6
+        for text in (name, category.lower(), hint):
+            if any(word in text for word in words):
+                score += 0.1
+        if terms and any(term in text for text in (region.lower(), name, hint, description.lower()) for term in terms):
+            score += SCORING_TERM_BOOST
+        scored.append((min(score, 1.0), row))
+
+    beta = blend_weight(profile)
+    if beta:
+        scored = [(round((1 - beta) * score + beta * profile.score(products[row]), 4), row) for score, row in scored]
+    # Only the returned products are copied out of the catalog
+    top = heapq.nlargest(max_results, scored, key=lambda item: item[0])
+    recommended_products = [{**products[row], "relevanceScore": score} for score, row in top]
+
+    return {
+        "products": recommended_products,
+        "reasoning": "Products selected based on keyword matching and user preferences."
+                     + (" Ranking adjusted for your browsing history." if profile else ""),
+        "confidence": 0.7,
+        "categories": list({p["category"] for p in recommended_products}),
+        "suggestedFilters": suggested_filters(facets, candidate_rows),
+        "interpretedQuery": parsed.to_dict() if parsed else None,
+    }
@@ -0,0 +1,289 @@
+# backend/src/recommendation/personalization.py
+"""
+Per-user preference profiles for /recommend.
+
+- UserAffinity: exponentially decayed category/artisan affinities and a
+  decayed mean of log price. Decay is applied lazily (weights are stored
+  relative to a reference time), so recording an event is O(1).
+- ProfileStore: bounded in-memory store (LRU) of profiles, optionally
+  persisted to PERSONALIZATION_PATH. Periodic saves run on a background
+  thread, since events are recorded from the event loop.
+- event_time: an event's client timestamp in server time (millisecond
+  values converted, future ones clamped to now).
+- record_event / profile_for_request: update and read profiles.
+- personalize: blends profile affinity into the first-stage relevance scores.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from src.lib.logger import get_logger
+
+logger = get_logger("personalization")
+
+PERSONALIZATION_PATH = os.getenv("PERSONALIZATION_PATH", "")  # empty: in-memory only
+PERSONALIZATION_HALF_LIFE_DAYS = float(os.getenv("PERSONALIZATION_HALF_LIFE_DAYS", "14"))
+PERSONALIZATION_WEIGHT = float(os.getenv("PERSONALIZATION_WEIGHT", "0.3"))  # share of the final score
+PERSONALIZATION_MAX_USERS = int(os.getenv("PERSONALIZATION_MAX_USERS", "100000"))
+PERSONALIZATION_SAVE_EVERY = int(os.getenv("PERSONALIZATION_SAVE_EVERY", "500"))
+
+EVENT_WEIGHTS = {"view": 1.0, "click": 2.0, "favorite": 3.0, "cart": 4.0, "purchase": 6.0}
+
+# Seconds after which an event's weight has decayed by e
+_TAU = PERSONALIZATION_HALF_LIFE_DAYS * 86400 / math.log(2)
+# Rebase stored weights before exp() growth loses precision
+_MAX_EXPONENT = 50.0
+# Larger timestamps are JavaScript-style milliseconds (1e11 s is the year 5138)
+_MS_TIMESTAMP = 1e11
+# Client clocks may run this far ahead before an event counts as "now"
+_MAX_CLOCK_SKEW_S = 300.0
+
+
+def event_time(ts: Optional[float], now: Optional[float] = None) -> float:
+    """
+    A client-supplied event time as server Unix seconds. A future reference
+    time would make every later decay factor exp((ref - now) / tau) explode,
+    so milliseconds are converted and anything still ahead of the server clock
+    (or not a number) counts as now.
+    """
+    now = now if now is not None else time.time()
+    if ts is None or not math.isfinite(ts):
+        return now
+    if ts > _MS_TIMESTAMP:
+        ts /= 1000.0
+    return ts if ts <= now + _MAX_CLOCK_SKEW_S else now
+
+
+def _decay(elapsed: float) -> float:
+    """exp(-elapsed / tau); a reference time in the future never grows weights."""
+    return math.exp(-max(elapsed, 0.0) / _TAU)
+
+
+class UserAffinity:
+    """
+    Weights are stored multiplied by exp((t - ref) / tau); the decayed value at
+    time `now` is stored / exp((now - ref) / tau). Adding an event therefore
+    touches only the keys of that event.
+    """
+
+    __slots__ = ("ref", "categories", "artisans", "price_sum", "price_weight", "total", "updated")
+
+    def __init__(self, ref: Optional[float] = None):
+        self.ref = ref if ref is not None else time.time()
+        self.categories: Dict[str, float] = {}
+        self.artisans: Dict[str, float] = {}
+        self.price_sum = 0.0     # sum of weight * log(price)
+        self.price_weight = 0.0  # sum of weight for events with a price
+        self.total = 0.0
+        self.updated = self.ref
+
+    def _rebase(self, now: float):
+        factor = _decay(now - self.ref)
+        for table in (self.categories, self.artisans):
+            for key in table:
+                table[key] *= factor
+        self.price_sum *= factor
+        self.price_weight *= factor
+        self.total *= factor
+        self.ref = now
+
+    def add(self, category: Optional[str], artisan: Optional[str], price: Optional[float],
+            weight: float = 1.0, ts: Optional[float] = None):
+        now = event_time(ts)
+        exponent = (now - self.ref) / _TAU
+        if exponent > _MAX_EXPONENT:
+            self._rebase(now)
+            exponent = 0.0
+        w = weight * math.exp(exponent)
+        if category:
+            key = category.lower()
+            self.categories[key] = self.categories.get(key, 0.0) + w
+        if artisan:
+            key = artisan.lower()
+            self.artisans[key] = self.artisans.get(key, 0.0) + w
+        if price and price > 0:
+            self.price_sum += w * math.log(price)
+            self.price_weight += w
+        self.total += w
+        self.updated = max(self.updated, now)
+
+    def strength(self, now: Optional[float] = None) -> float:
+        """Decayed total event weight, i.e. how much evidence the profile holds."""
+        now = now if now is not None else time.time()
+        return self.total * _decay(now - self.ref)
+
+    def score(self, product: dict) -> float:
+        """Affinity in [0, 1] of this profile for a product."""
+        if self.total <= 0:
+            return 0.0
+        category = self.categories.get(str(product.get("category") or "").lower(), 0.0) / self.total
+        artisan = self.artisans.get(str(product.get("artisan") or "").lower(), 0.0) / self.total
+        price_fit = 0.0
+        price = product.get("price")
+        if self.price_weight > 0 and isinstance(price, (int, float)) and price > 0:
+            # 1.0 at the user's typical price, ~0.6 at 2x or 0.5x
+            distance = math.log(price) - self.price_sum / self.price_weight
+            price_fit = math.exp(-distance * distance)
+        return 0.5 * category + 0.3 * artisan + 0.2 * price_fit
+
+    def copy(self) -> "UserAffinity":
+        clone = UserAffinity(self.ref)
+        clone.categories = dict(self.categories)
+        clone.artisans = dict(self.artisans)
+        clone.price_sum, clone.price_weight = self.price_sum, self.price_weight
+        clone.total, clone.updated = self.total, self.updated
+        return clone
+
+    def to_dict(self) -> dict:
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        # Copied so a snapshot can be serialized while the profile keeps changing
+        data["categories"], data["artisans"] = dict(self.categories), dict(self.artisans)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserAffinity":
+        profile = cls(data.get("ref"))
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(profile, slot, data[slot])
+        # Profiles saved before timestamps were validated may sit in the future
+        now = time.time()
+        profile.ref, profile.updated = min(profile.ref, now), min(profile.updated, now)
+        return profile
+
+
+class ProfileStore:
+    def __init__(self, max_users: int = PERSONALIZATION_MAX_USERS, path: str = PERSONALIZATION_PATH):
+        self.max_users = max_users
+        self.path = path
+        self._profiles: "OrderedDict[str, UserAffinity]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the file at a time
+        self._saver: Optional[threading.Thread] = None
+        self._unsaved = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self, user_id: str) -> Optional[UserAffinity]:
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None:
+                self._profiles.move_to_end(user_id)
+            return profile
+
+    def record(self, user_id: str, product: dict, kind: str = "view", ts: Optional[float] = None):
+        weight = EVENT_WEIGHTS.get(kind, 1.0)
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is None:
+                profile = self._profiles[user_id] = UserAffinity(event_time(ts))
+                if len(self._profiles) > self.max_users:
+                    self._profiles.popitem(last=False)
+            else:
+                self._profiles.move_to_end(user_id)
+            profile.add(product.get("category"), product.get("artisan"), product.get("price"), weight, ts)
+            self._unsaved += 1
+            if self.path and self._unsaved >= PERSONALIZATION_SAVE_EVERY and \
+                    (self._saver is None or not self._saver.is_alive()):
+                self._saver = threading.Thread(target=self._save_in_background, name="personalization-save",
+                                               daemon=True)
+                self._saver.start()
+
+    def _save_in_background(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning("Could not save user profiles", extra={"path": self.path, "error": str(e)})
+
+    def save(self):
+        """Write all profiles to `path` (blocking; record() calls it on a worker thread)."""
+        if not self.path or not self._unsaved:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = {user_id: profile.to_dict() for user_id, profile in self._profiles.items()}
+                self._unsaved = 0
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load user profiles", extra={"path": self.path, "error": str(e)})
+            return
+        with self._lock:
+            for user_id, values in list(data.items())[-self.max_users:]:
+                self._profiles[user_id] = UserAffinity.from_dict(values)
+        logger.info("Loaded user profiles", extra={"path": self.path, "count": len(self._profiles)})
+
+
+# ---------------------------
+# Module-level store used by the API
+# ---------------------------
+store = ProfileStore()
+atexit.register(store.save)
+
+
+def record_event(user_id: str, product: dict, kind: str = "view", ts: Optional[float] = None):
+    store.record(user_id, product, kind, ts)
+
+
+def profile_for_request(user_id: Optional[str], history: Optional[List[str]],
+                        lookup: Callable[[str], Optional[dict]]) -> Optional[UserAffinity]:
+    """
+    The stored profile for user_id, plus the request's userHistory product ids
+    as views (later entries count as more recent). History is folded into a
+    copy, so stateless callers never write to the store.
+    """
+    stored = store.get(user_id) if user_id else None
+    if not history:
+        return stored
+    profile = stored.copy() if stored is not None else UserAffinity()
+    now = time.time()
+    for age, product_id in enumerate(reversed(history)):
+        product = lookup(product_id)
+        if product:
+            # One hour apart per position, so ordering matters without dominating decay
+            profile.add(product.get("category"), product.get("artisan"), product.get("price"),
+                        EVENT_WEIGHTS["view"], now - age * 3600)
+    return profile if profile.total > 0 else stored
+
+
+def blend_weight(profile: Optional[UserAffinity]) -> float:
+    """Share of the final score given to the profile; grows with its evidence, up to PERSONALIZATION_WEIGHT."""
+    if profile is None or PERSONALIZATION_WEIGHT <= 0:
+        return 0.0
+    strength = profile.strength()
+    return PERSONALIZATION_WEIGHT * strength / (strength + 3.0)
+
+
+def personalize(scored: List[dict], profile: Optional[UserAffinity], key: str = "relevanceScore") -> List[dict]:
+    """Blend profile affinity into each item's score and re-sort (best first)."""
+    beta = blend_weight(profile)
+    if not beta or not scored:
+        return scored
+    for item in scored:
+        item[key] = round((1 - beta) * item[key] + beta * profile.score(item), 4)
+    scored.sort(key=lambda item: item[key], reverse=True)
+    return scored
+
+
+def personalization_stats() -> dict:
+    return {"users": len(store), "persisted": bool(store.path), "half_life_days": PERSONALIZATION_HALF_LIFE_DAYS,
+            "weight": PERSONALIZATION_WEIGHT}
@@ -0,0 +1,202 @@
+# backend/src/recommendation/query_parser.py
+"""
+Query understanding for /recommend prompts, without an LLM round trip.
+
+- QueryParser: compiles one regex alternation of price phrases and every
+  vocabulary term (category synonyms, regions, occasions, colors, artisan
+  names) and extracts all of them in a single finditer pass.
+- ParsedQuery: structured result (price bounds and canonical values).
+- get_query_parser: parser for a catalog, adding its artisan names to the
+  built-in vocabulary; rebuilt when the catalog changes size.
+- merge_filters: combines parsed values with a request's explicit filters.
+- expand_query: the prompt plus the canonical regions, occasions and colors
+  it mentions. Those have no facet filter, so the engines score on them
+  instead (see scoring_terms).
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Canonical value -> phrases that refer to it. Phrases are matched on word boundaries.
+CATEGORY_SYNONYMS: Dict[str, List[str]] = {
+    "Pottery": ["pottery", "pot", "pots", "potter", "ceramic", "ceramics", "terracotta", "clay",
+                "vase", "vases", "kettle", "blue pottery", "earthenware", "stoneware"],
+    "Textiles": ["textile", "textiles", "saree", "sarees", "sari", "shawl", "shawls", "stole", "dupatta",
+                 "fabric", "weave", "handloom", "kalamkari", "ikat", "pashmina", "rug", "rugs"],
+    "Jewelry": ["jewelry", "jewellery", "earrings", "earring", "necklace", "necklaces", "bangle", "bangles",
+                "bracelet", "ring", "rings", "pendant", "filigree", "dhokra", "anklet"],
+    "Woodwork": ["woodwork", "wooden", "wood", "carving", "carved", "sandalwood", "rosewood",
+                 "spice box", "toy", "toys", "channapatna"],
+    "Painting": ["painting", "paintings", "madhubani", "pattachitra", "warli", "miniature painting",
+                 "tanjore", "canvas", "wall art"],
+    "Metalwork": ["metalwork", "brass", "copper", "bronze", "bidri", "metal"],
+}
+
+REGIONS: Dict[str, List[str]] = {
+    "Rajasthan": ["rajasthan", "rajasthani", "jaipur", "jodhpur", "udaipur"],
+    "Gujarat": ["gujarat", "gujarati", "kutch", "kutchi"],
+    "Kashmir": ["kashmir", "kashmiri", "srinagar"],
+    "Odisha": ["odisha", "orissa", "odia"],
+    "West Bengal": ["bengal", "bengali", "kolkata", "bankura"],
+    "Bihar": ["bihar", "mithila"],
+    "Andhra Pradesh": ["andhra", "kalahasti", "machilipatnam"],
+    "Karnataka": ["karnataka", "mysore", "mysuru", "channapatna"],
+    "Tamil Nadu": ["tamil nadu", "tanjore", "thanjavur", "kanchipuram"],
+    "Uttar Pradesh": ["uttar pradesh", "varanasi", "banaras", "lucknow", "moradabad"],
+    "Kerala": ["kerala"],
+}
+
+OCCASIONS: Dict[str, List[str]] = {
+    "wedding": ["wedding", "weddings", "marriage", "bride", "bridal", "shaadi"],
+    "diwali": ["diwali", "deepavali"],
+    "birthday": ["birthday", "bday"],
+    "anniversary": ["anniversary"],
+    "housewarming": ["housewarming", "house warming", "griha pravesh", "new home"],
+    "raksha bandhan": ["rakhi", "raksha bandhan"],
+    "festival": ["festival", "festive", "holi", "eid", "christmas", "pongal", "onam"],
+    "gift": ["gift", "gifts", "gifting", "present"],
+}
+
+COLORS: Dict[str, List[str]] = {
+    color: [color] for color in (
+        "red", "blue", "green", "yellow", "orange", "pink", "purple", "black", "white",
+        "gold", "golden", "silver", "brown", "maroon", "indigo", "turquoise", "beige",
+    )
+}
+
+_CURRENCY = r"(?:₹|inr|rs\.?|rupees?|ruppees)"
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|lakh|lakhs)?"
+
+# Each price phrase is one named alternative of the combined pattern
+_PRICE_PATTERNS = [
+    ("between", rf"\b(?:between|from)\s*{_CURRENCY}?\s*{_AMOUNT}\s*(?:and|to|-)\s*{_CURRENCY}?\s*{_AMOUNT}"),
+    ("range", rf"{_CURRENCY}\s*{_AMOUNT}\s*(?:-|to)\s*{_CURRENCY}?\s*{_AMOUNT}"),
+    ("max", rf"\b(?:under|below|less than|upto|up to|within|max(?:imum)?|not more than|budget(?: of)?|cheaper than)"
+            rf"\s*{_CURRENCY}?\s*{_AMOUNT}"),
+    ("min", rf"\b(?:above|over|more than|at least|min(?:imum)?|starting at|starting from)\s*{_CURRENCY}?\s*{_AMOUNT}"),
+]
+
+_MULTIPLIERS = {"k": 1000, "thousand": 1000, "lakh": 100000, "lakhs": 100000}
+
+
+def _amount(number: str, unit: Optional[str]) -> int:
+    value = float(number.replace(",", ""))
+    return int(value * _MULTIPLIERS.get((unit or "").lower(), 1))
+
+
+@dataclass
+class ParsedQuery:
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    categories: List[str] = field(default_factory=list)
+    artisans: List[str] = field(default_factory=list)
+    regions: List[str] = field(default_factory=list)
+    occasions: List[str] = field(default_factory=list)
+    colors: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not any(asdict(self).values())
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value not in (None, [])}
+
+    def scoring_terms(self) -> List[str]:
+        """Lowercased regions, occasions and colors; matching products are ranked higher, not filtered."""
+        return [value.lower() for value in self.regions + self.occasions + self.colors]
+
+
+class QueryParser:
+    def __init__(self, categories: Dict[str, List[str]] = CATEGORY_SYNONYMS, regions: Dict[str, List[str]] = REGIONS,
+                 occasions: Dict[str, List[str]] = OCCASIONS, colors: Dict[str, List[str]] = COLORS,
+                 artisans: Iterable[str] = ()):
+        # phrase -> (kind, canonical value)
+        self.vocabulary: Dict[str, Tuple[str, str]] = {}
+        for kind, table in (("colors", colors), ("occasions", occasions), ("regions", regions),
+                            ("categories", categories)):
+            for canonical, phrases in table.items():
+                for phrase in phrases:
+                    self.vocabulary[phrase.lower()] = (kind, canonical)
+        for name in artisans:
+            if name:
+                self.vocabulary[name.lower()] = ("artisans", name)
+
+        # Longest phrases first so "blue pottery" wins over "blue"
+        terms = sorted(self.vocabulary, key=len, reverse=True)
+        price = "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PRICE_PATTERNS)
+        words = "|".join(re.escape(term).replace(r"\ ", r"\s+") for term in terms)
+        self.pattern = re.compile(rf"{price}|(?P<term>\b(?:{words})\b)", re.IGNORECASE)
+        # Group index of the first amount in each price alternative
+        self._price_groups = {name: self.pattern.groupindex[name] for name, _ in _PRICE_PATTERNS}
+
+    def parse(self, text: str) -> ParsedQuery:
+        parsed = ParsedQuery()
+        seen = set()
+        for match in self.pattern.finditer(text or ""):
+            kind = match.lastgroup
+            if kind == "term":
+                hit = self.vocabulary.get(" ".join(match.group("term").lower().split()))
+                if hit and hit not in seen:
+                    seen.add(hit)
+                    getattr(parsed, hit[0]).append(hit[1])
+                continue
+            g = self._price_groups[kind]
+            first = _amount(match.group(g + 1), match.group(g + 2))
+            if kind in ("between", "range"):
+                second = _amount(match.group(g + 3), match.group(g + 4))
+                parsed.min_price, parsed.max_price = min(first, second), max(first, second)
+            elif kind == "max":
+                parsed.max_price = first
+            else:
+                parsed.min_price = first
+        return parsed
+
+
+_lock = threading.Lock()
+_parsers: Dict[int, Tuple[int, QueryParser]] = {}
+_default_parser: Optional[QueryParser] = None
+
+
+def get_query_parser(products: Optional[Sequence[dict]] = None) -> QueryParser:
+    """Parser with the built-in vocabulary plus the catalog's artisan names."""
+    global _default_parser
+    if products is None:
+        if _default_parser is None:
+            _default_parser = QueryParser()
+        return _default_parser
+    key = id(products)
+    cached = _parsers.get(key)
+    if cached is None or cached[0] != len(products):
+        with _lock:
+            cached = _parsers.get(key)
+            if cached is None or cached[0] != len(products):
+                parser = QueryParser(artisans={p.get("artisan") for p in products if p.get("artisan")})
+                _parsers.clear()
+                _parsers[key] = cached = (len(products), parser)
+    return cached[1]
+
+
+def merge_filters(filters: dict, parsed: ParsedQuery) -> dict:
+    """
+    Fill facet filters (see facets.filters_from_request) from a parsed prompt.
+    Explicit categories/artisans take precedence; price bounds are intersected.
+    """
+    merged = dict(filters)
+    if not merged.get("categories") and parsed.categories:
+        merged["categories"] = parsed.categories
+    if not merged.get("artisans") and parsed.artisans:
+        merged["artisans"] = parsed.artisans
+    if parsed.min_price is not None:
+        current = merged.get("min_price")
+        merged["min_price"] = parsed.min_price if current is None else max(current, parsed.min_price)
+    if parsed.max_price is not None:
+        current = merged.get("max_price")
+        merged["max_price"] = parsed.max_price if current is None else min(current, parsed.max_price)
+    return merged
+
+
+def expand_query(text: str, parsed: Optional[ParsedQuery]) -> str:
+    """Prompt text for similarity scoring, with the parsed scoring terms appended."""
+    terms = parsed.scoring_terms() if parsed else []
+    return f"{text} {' '.join(terms)}" if terms else text
@@ -0,0 +1,168 @@
+# backend/src/recommendation/rerank.py
+"""
+Second-stage LLM reranking for /recommend.
+
+- rerank_response: sends the first-stage top-N candidates to the "recommend"
+  flow of the model router and reorders them by the model's ranking, with
+  its explanation as the reasoning. If the model does not answer within
+  RERANK_DEADLINE_MS (or fails), the first-stage ranking is returned.
+- Results are cached per (query, candidate set). A call that misses the
+  deadline keeps running in the background and fills the cache, and
+  concurrent requests for the same key share one in-flight call.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.ai.router import generate
+from src.lib.logger import get_logger
+
+logger = get_logger("rerank")
+
+RECOMMENDATION_RERANK = os.getenv("RECOMMENDATION_RERANK", "false").lower() in ("1", "true", "yes")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+RERANK_DEADLINE_MS = float(os.getenv("RERANK_DEADLINE_MS", "1500"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "1024"))
+RERANK_CACHE_TTL_S = float(os.getenv("RERANK_CACHE_TTL_S", "900"))
+
+RERANK_PROMPT = """You are a shopping assistant for a marketplace of handmade Indian artisan products.
+Rank the candidate products by how well they match the shopper's request.
+
+Shopper request: {query}
+
+Candidates (JSON):
+{candidates}
+
+Respond with only a JSON object of the form
+{{"ranking": ["<product id>", ...], "reasoning": "<one or two sentences for the shopper>"}}
+listing the ids of the best matches first. Use only ids from the candidates."""
+
+# key -> (stored at, ranked ids, reasoning)
+_cache: "OrderedDict[str, Tuple[float, List[str], str]]" = OrderedDict()
+_inflight: Dict[str, asyncio.Task] = {}
+_background: Set[asyncio.Task] = set()
+_stats = {"requests": 0, "cache_hits": 0, "reranked": 0, "deadline_exceeded": 0, "errors": 0}
+
+
+def cache_key(query: str, candidate_ids: List[str]) -> str:
+    # Candidate order does not change the question asked, only the set does
+    normalized = " ".join(query.lower().split())
+    payload = json.dumps([normalized, sorted(candidate_ids)])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Tuple[List[str], str]]:
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    stored_at, ranking, reasoning = entry
+    if time.monotonic() - stored_at > RERANK_CACHE_TTL_S:
+        _cache.pop(key, None)
+        return None
+    _cache.move_to_end(key)
+    return ranking, reasoning
+
+
+def _cache_put(key: str, ranking: List[str], reasoning: str):
+    _cache[key] = (time.monotonic(), ranking, reasoning)
+    _cache.move_to_end(key)
+    while len(_cache) > RERANK_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _prompt(query: str, candidates: List[dict]) -> str:
+    compact = [
+        {key: c.get(key) for key in ("id", "name", "category", "artisan", "price", "aiHint", "description")
+         if c.get(key) not in (None, "")}
+        for c in candidates
+    ]
+    return RERANK_PROMPT.format(query=query, candidates=json.dumps(compact, ensure_ascii=False))
+
+
+def parse_ranking(text: str, candidate_ids: List[str]) -> Tuple[List[str], str]:
+    """Ranked ids (unknown ids dropped, missing ones appended in first-stage order) and reasoning."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object in rerank response")
+    data = json.loads(match.group(0))
+    known = set(candidate_ids)
+    ranking: List[str] = []
+    for pid in data.get("ranking", []):
+        pid = str(pid)
+        if pid in known and pid not in ranking:
+            ranking.append(pid)
+    if not ranking:
+        raise ValueError("Rerank response ranked none of the candidates")
+    ranking.extend(pid for pid in candidate_ids if pid not in ranking)
+    return ranking, str(data.get("reasoning") or "").strip()
+
+
+async def _call(key: str, query: str, candidates: List[dict], candidate_ids: List[str]) -> Tuple[List[str], str]:
+    try:
+        text = await generate(_prompt(query, candidates), flow="recommend", latency_budget_ms=RERANK_DEADLINE_MS,
+                              generation_config={"temperature": 0.2, "response_mime_type": "application/json"})
+        ranking, reasoning = parse_ranking(text, candidate_ids)
+        _cache_put(key, ranking, reasoning)
+        return ranking, reasoning
+    finally:
+        _inflight.pop(key, None)
+
+
+def _log_background_failure(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.info("Background rerank failed", extra={"error": repr(task.exception())})
+
+
+async def rerank_response(query: str, response: dict, max_results: int) -> dict:
+    """Rerank a first-stage response's products, truncating to max_results."""
+    candidates = response.get("products") or []
+    _stats["requests"] += 1
+    if len(candidates) < 2:
+        return {**response, "products": candidates[:max_results]}
+
+    candidate_ids = [str(c["id"]) for c in candidates]
+    key = cache_key(query, candidate_ids)
+    cached = _cache_get(key)
+    if cached is not None:
+        _stats["cache_hits"] += 1
+        ranking, reasoning = cached
+    else:
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(_call(key, query, candidates, candidate_ids))
+            _inflight[key] = task
+        try:
+            # shield: a call that misses the deadline still completes and fills the cache
+            ranking, reasoning = await asyncio.wait_for(asyncio.shield(task), RERANK_DEADLINE_MS / 1000)
+        except asyncio.TimeoutError:
+            _stats["deadline_exceeded"] += 1
+            if task not in _background:
+                _background.add(task)
+                task.add_done_callback(_log_background_failure)
+            return {**response, "products": candidates[:max_results]}
+        except Exception as e:
+            _stats["errors"] += 1
+            logger.warning("Rerank failed; keeping first-stage ranking", extra={"error": repr(e)})
+            return {**response, "products": candidates[:max_results]}
+
+    _stats["reranked"] += 1
+    by_id = {str(c["id"]): c for c in candidates}
+    products = [by_id[pid] for pid in ranking[:max_results]]
+    return {
+        **response,
+        "products": products,
+        "reasoning": reasoning or response.get("reasoning", ""),
+        "categories": list({p["category"] for p in products}),
+    }
+
+
+def rerank_stats() -> dict:
+    return {**_stats, "cache_size": len(_cache), "inflight": len(_inflight), "enabled": RECOMMENDATION_RERANK,
+            "top_n": RERANK_TOP_N, "deadline_ms": RERANK_DEADLINE_MS}
@@ -0,0 +1,189 @@
+# backend/src/recommendation/semantic.py
+"""
+Semantic retrieval engine for /recommend.
+
+- HashingEmbedder: local, dependency-free text embedder (hashed word and
+  character n-gram features with TF-IDF weighting, L2-normalized).
+- Embedder: interface for plugging in model embeddings instead.
+- SemanticIndex: product embeddings in one contiguous float32 matrix; a query
+  is embedded once and scored against every product with a single matmul,
+  then the top K are selected with argpartition.
+- semantic_recommendations: builds a RecommendationResponse for a request;
+  the query embedded is the prompt expanded with its parsed regions,
+  occasions and colors (query_parser.expand_query).
+"""
+
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.recommendation.facets import request_candidates, suggested_filters
+from src.recommendation.query_parser import ParsedQuery, expand_query
+from src.recommendation.personalization import UserAffinity, personalize
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+PRODUCT_TEXT_FIELDS = ("name", "category", "artisan", "aiHint", "description", "region")
+PRODUCT_LIST_FIELDS = ("tags", "materials", "techniques")
+
+
+def product_text(product: dict) -> str:
+    parts = [str(product.get(field) or "") for field in PRODUCT_TEXT_FIELDS]
+    for field in PRODUCT_LIST_FIELDS:
+        parts.extend(str(v) for v in (product.get(field) or []))
+    return " ".join(parts)
+
+
+class Embedder:
+    """Maps texts to an (n, dim) float32 matrix of L2-normalized rows."""
+
+    dim: int
+
+    def fit(self, texts: Sequence[str]) -> "Embedder":
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """
+    Feature-hashed bag of words plus character trigrams of each word, so that
+    related word forms ("potter", "pottery") share features. IDF weights are
+    learned from the catalog in fit().
+    """
+
+    def __init__(self, dim: int = 1024, char_ngram: int = 3):
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._feature_cache: Dict[str, List[int]] = {}
+
+    def _word_features(self, word: str) -> List[int]:
+        cached = self._feature_cache.get(word)
+        if cached is not None:
+            return cached
+        grams = [word]
+        padded = f"<{word}>"
+        n = self.char_ngram
+        if len(padded) > n:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        # crc32 is stable across processes, unlike hash()
+        features = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        if len(self._feature_cache) < 200000:
+            self._feature_cache[word] = features
+        return features
+
+    def _hashed_counts(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows: List[int] = []
+        cols: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(texts):
+            for word in _WORD_RE.findall(text.lower()):
+                for h in self._word_features(word):
+                    rows.append(row)
+                    cols.append(h % self.dim)
+                    signs.append(1.0 if h & 0x80000000 else -1.0)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+        return matrix
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbedder":
+        counts = self._hashed_counts(texts)
+        doc_freq = np.count_nonzero(counts, axis=0).astype(np.float32)
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = self._hashed_counts(texts)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+
+class SemanticIndex:
+    """Contiguous embedding matrix over a product list."""
+
+    def __init__(self, products: List[dict], embedder: Optional[Embedder] = None,
+                 vectors: Optional[np.ndarray] = None):
+        self.products = products
+        self.embedder = embedder or HashingEmbedder()
+        if vectors is None:
+            texts = [product_text(p) for p in products]
+            self.embedder.fit(texts)
+            vectors = self.embedder.embed(texts)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[tuple]:
+        """Top-k (row, cosine score) pairs, best first, among rows where mask is True."""
+        if not len(self) or k <= 0:
+            return []
+        q = self.embedder.embed([query])[0]
+        scores = self.vectors @ q
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+# ---------------------------
+# Index cache & engine entry point
+# ---------------------------
+_index_lock = threading.Lock()
+# id(products) -> (size when built, index); the index shares the list, so its own len() tracks appends
+_index_cache: Dict[int, Tuple[int, SemanticIndex]] = {}
+
+
+def get_index(products: List[dict]) -> SemanticIndex:
+    """Build (once) the index for a product list; rebuilt when the list changes size."""
+    key = id(products)
+    cached = _index_cache.get(key)
+    if cached is None or cached[0] != len(products):
+        with _index_lock:
+            cached = _index_cache.get(key)
+            if cached is None or cached[0] != len(products):
+                _index_cache.clear()
+                _index_cache[key] = cached = (len(products), SemanticIndex(products))
+    return cached[1]
+
+
+# Extra candidates ranked per result when a user profile can reorder them
+PERSONALIZATION_OVERFETCH = 4
+
+
+def semantic_recommendations(req, products: List[dict], parsed: Optional[ParsedQuery] = None,
+                             profile: Optional[UserAffinity] = None) -> dict:
+    """Recommend products for a RecommendationRequest by embedding similarity."""
+    index = get_index(products)
+    # Preference filters are resolved on the facet index; only matching rows are ranked
+    facets, candidate_rows = request_candidates(req, products, parsed)
+    mask = np.zeros(len(index), dtype=bool)
+    mask[candidate_rows] = True
+    max_results = req.maxResults or 5
+    hits = index.search(expand_query(req.userPrompt, parsed), max_results * (PERSONALIZATION_OVERFETCH if profile else 1), mask)
+    recommended = [
+        {**index.products[row], "relevanceScore": round(min(max(score, 0.0), 1.0), 4)}
+        for row, score in hits
+    ]
+    recommended = personalize(recommended, profile)[:max_results]
+    top_score = recommended[0]["relevanceScore"] if recommended else 0.0
+    return {
+        "products": recommended,
+        "reasoning": "Products ranked by semantic similarity between your request and product descriptions."
+                     + (" Ranking adjusted for your browsing history." if profile else ""),
+        "confidence": round(min(0.5 + top_score / 2, 1.0), 3),
+        "categories": list({p["category"] for p in recommended}),
+        "suggestedFilters": suggested_filters(facets, candidate_rows),
+        "interpretedQuery": parsed.to_dict() if parsed else None,
+    }
@@ -0,0 +1,50 @@
+# backend/src/recommendation/serialization.py
+"""
+Response encoding for recommendation results.
+
+Each product is validated against the Product model and encoded once per
+(product id, version); responses are then assembled from the cached
+fragments plus the per-request relevanceScore, so large results skip the
+per-request response_model validation and jsonable_encoder pass while
+keeping the RecommendationResponse shape.
+"""
+
+import os
+from typing import Hashable, Mapping
+
+from data_types_class import Product, RecommendationResponse
+from src.lib.fastjson import FragmentCache, RawJSON, dumps, json_array, splice
+
+PRODUCT_FRAGMENT_CACHE_SIZE = int(os.getenv("PRODUCT_FRAGMENT_CACHE_SIZE", "50000"))
+
+fragments = FragmentCache(PRODUCT_FRAGMENT_CACHE_SIZE)
+
+_PLACEHOLDER = "__products__"
+
+
+def product_fragment(product: Mapping, version: Hashable) -> bytes:
+    """Encoded Product without relevanceScore and without the closing brace."""
+    def build() -> bytes:
+        model = Product.model_validate({k: v for k, v in product.items() if k != "relevanceScore"})
+        return dumps(model.model_dump(mode="json", exclude={"relevanceScore"}))[:-1]
+    return fragments.get(("product", str(product.get("id"))), version, build)
+
+
+def encode_product(product: Mapping, version: Hashable) -> bytes:
+    score = product.get("relevanceScore", 0.0)
+    if score is not None and not 0 <= score <= 1:
+        # Same constraint the Product model enforces
+        raise ValueError(f"relevanceScore out of range: {score}")
+    # A float field, so integer scores are written as 0.0 / 1.0 like the model does
+    score = float(score) if score is not None else None
+    return product_fragment(product, version) + b',"relevanceScore":' + dumps(score) + b"}"
+
+
+def encode_recommendations(result: dict, version: Hashable) -> RawJSON:
+    """Encode an engine result as a RecommendationResponse body."""
+    envelope = RecommendationResponse.model_validate({**result, "products": []}).model_dump(mode="json")
+    envelope["products"] = _PLACEHOLDER
+    # "products" is the first field of the model, so the first occurrence is the placeholder
+    body = splice(dumps(envelope), dumps(_PLACEHOLDER),
+                  json_array(encode_product(p, version) for p in result.get("products", [])))
+    return RawJSON(body)
@@ -4,7 +4,10 @@ from backend.data_types_class import RecommendationRequest, RecommendationRespon
 
 class RecommendationService:
     @staticmethod
-    async def get_recommendations(request: RecommendationRequest) -> RecommendationResponse:
+    async def get_recommendations(request: RecommendationRequest, engine: Optional[str] = None) -> RecommendationResponse:
+        """
+        engine: "keyword" or "semantic"; defaults to the RECOMMENDATION_ENGINE setting.
+        """
         # Extract price range from user prompt and set in userPreferences
         if request.userPrompt:
             price_range = extract_price_range(request.userPrompt)
@@ -29,7 +32,7 @@ class RecommendationService:
             from backend.routes import personalized_recommendation
             
             # Create a mock request object for routes.py
-            result = await personalized_recommendation(request)
+            result = await personalized_recommendation(request, engine=engine)
             return result
         except Exception as e:
             print("Error getting recommendations:", e)
@@ -41,6 +44,7 @@ class RecommendationService:
             userPrompt=prompt,
             userPreferences=user_profile.preferences,
             userHistory=user_profile.purchaseHistory,
+            userId=user_profile.id,
             maxResults=max_results
         )
         return await RecommendationService.get_recommendations(request)
@@ -89,6 +93,24 @@ class RecommendationService:
 
     @staticmethod
     async def get_similar_products(product_id: str, prompt: Optional[str] = None, max_results: int = 4) -> RecommendationResponse:
+        # Use the similar-product ANN index when the product is indexed
+        if not prompt:
+            from src.recommendation.ann import similar_products
+            similar = similar_products(product_id, max_results)
+            if similar:
+                products = [
+                    {**{k: v for k, v in item.items() if k != "similarityScore"},
+                     "relevanceScore": item.get("similarityScore", 0.0)}
+                    for item in similar
+                ]
+                return RecommendationResponse(
+                    products=products,
+                    reasoning=f"Products closest to {product_id} by category, materials, techniques, price and description.",
+                    confidence=0.8,
+                    categories=list({p["category"] for p in products if p.get("category")}),
+                    suggestedFilters=None,
+                )
+
         user_prompt = prompt or f"Show me products similar to product ID {product_id}"
         request = RecommendationRequest(
             userPrompt=user_prompt,
@@ -0,0 +1,8 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Modules import each other as `src.…`, relative to backend/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
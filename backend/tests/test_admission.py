@@ -0,0 +1,118 @@
+# backend/tests/test_admission.py
+import asyncio
+import ipaddress
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from src.lib import admission as adm
+from src.lib.admission import AdmissionController, AdmissionLimits, TokenBucketLimiter, client_key
+
+
+def _request(peer: str, forwarded: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+
+# ---------------------------
+# Token bucket
+# ---------------------------
+def test_token_bucket_allows_burst_then_rejects(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(adm.time, "monotonic", lambda: clock[0])
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=3)
+    assert [limiter.try_acquire("a") for _ in range(3)] == [None, None, None]
+    wait = limiter.try_acquire("a")
+    assert wait == pytest.approx(1.0)
+    assert limiter.try_acquire("b") is None   # buckets are per client
+    clock[0] += 1.0
+    assert limiter.try_acquire("a") is None   # refilled at 1 token/s
+    assert limiter.rejected == 1
+
+
+def test_token_bucket_is_bounded_lru():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=1, max_clients=2)
+    for key in ("a", "b", "c"):
+        limiter.try_acquire(key)
+    assert list(limiter._buckets) == ["b", "c"]
+
+
+# ---------------------------
+# Client keys
+# ---------------------------
+def test_forwarded_for_ignored_without_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(adm, "TRUSTED_PROXIES", [])
+    monkeypatch.setattr(adm, "TRUSTED_PROXY_HOPS", 0)
+    assert client_key(_request("203.0.113.7", "1.2.3.4")) == "203.0.113.7"
+    assert client_key(_request("203.0.113.7", "5.6.7.8")) == "203.0.113.7"
+
+
+def test_forwarded_for_behind_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(adm, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+    monkeypatch.setattr(adm, "TRUSTED_PROXY_HOPS", 0)
+    # The client-supplied left-most entry is skipped; the first untrusted hop from the right wins
+    assert client_key(_request("10.0.0.2", "6.6.6.6, 198.51.100.9, 10.0.0.5")) == "198.51.100.9"
+    # An untrusted peer's header is ignored
+    assert client_key(_request("198.51.100.1", "6.6.6.6")) == "198.51.100.1"
+
+
+def test_forwarded_for_with_hop_count(monkeypatch):
+    monkeypatch.setattr(adm, "TRUSTED_PROXIES", [])
+    monkeypatch.setattr(adm, "TRUSTED_PROXY_HOPS", 1)
+    assert client_key(_request("10.0.0.2", "6.6.6.6, 198.51.100.9")) == "198.51.100.9"
+    assert client_key(_request("10.0.0.2")) == "10.0.0.2"
+
+
+def test_parse_networks_skips_invalid_entries():
+    networks = adm._parse_networks("10.0.0.0/8, nonsense, 2001:db8::1")
+    assert [str(n) for n in networks] == ["10.0.0.0/8", "2001:db8::1/128"]
+
+
+# ---------------------------
+# Concurrency
+# ---------------------------
+def test_controller_rejects_when_queue_full():
+    async def scenario():
+        controller = AdmissionController("t", AdmissionLimits(concurrency=1, queue=1, queue_timeout=5.0))
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as excinfo:
+            await controller.acquire()
+        assert excinfo.value.status_code == 503 and "Retry-After" in excinfo.value.headers
+        controller.release(0.1)
+        await waiter
+        assert controller.active == 1 and controller.rejected_queue_full == 1
+
+    asyncio.run(scenario())
+
+
+def test_controller_rejects_after_queue_timeout():
+    async def scenario():
+        controller = AdmissionController("t", AdmissionLimits(concurrency=1, queue=1, queue_timeout=0.05))
+        await controller.acquire()
+        with pytest.raises(HTTPException):
+            await controller.acquire()
+        assert controller.rejected_timeout == 1 and controller.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_dependency_rate_limits_per_client(monkeypatch):
+    monkeypatch.setattr(adm, "_limits", {"t": AdmissionLimits(rate_per_minute=1, burst=2)})
+    monkeypatch.setattr(adm, "_controllers", {})
+    monkeypatch.setattr(adm, "_rate_limiters", {})
+    app = FastAPI()
+
+    @app.get("/t", dependencies=[Depends(adm.admission("t"))])
+    async def endpoint():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/t").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/t", headers={"X-Forwarded-For": "9.9.9.9"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert adm.admission_stats()["t"]["rate_limited"] == 1
@@ -0,0 +1,90 @@
+# backend/tests/test_ann.py
+import numpy as np
+import pytest
+
+from src.recommendation import ann
+from src.recommendation.ann import IVFIndex, ProductFeaturizer, product_fingerprint
+
+CATEGORIES = ["Pottery", "Textiles", "Jewelry"]
+
+
+def _catalog(n: int = 60):
+    return [{"id": str(i), "name": f"item {i}", "category": CATEGORIES[i % 3], "price": 100 * i, "tags": ["handmade"]}
+            for i in range(n)]
+
+
+def _assert_consistent(index: IVFIndex):
+    assert sorted(r for members in index.lists for r in members) == list(range(index.size))
+    for row, c in enumerate(index.assignment):
+        assert row in index.lists[c]
+    for pid, row in index.row_of.items():
+        assert index.ids[row] == pid
+
+
+@pytest.fixture
+def fresh_index(tmp_path, monkeypatch):
+    """The module-level index, persisted under tmp_path; call it again to simulate a restart."""
+    monkeypatch.setattr(ann, "ANN_INDEX_PATH", str(tmp_path / "similar.npz"))
+
+    def restart():
+        ann._save()
+        monkeypatch.setattr(ann, "_index", None)
+        monkeypatch.setattr(ann, "_products", {})
+        monkeypatch.setattr(ann, "_fingerprints", {})
+        monkeypatch.setattr(ann, "_unsaved", 0)
+
+    restart()
+    return restart
+
+
+def test_search_ranks_same_category_first():
+    featurizer = ProductFeaturizer()
+    index = IVFIndex(featurizer.dim, nprobe=8)
+    for product in _catalog():
+        index.upsert(product["id"], featurizer.featurize(product))
+    _assert_consistent(index)
+    results = index.search_id("3", 5)
+    assert "3" not in [pid for pid, _ in results]
+    assert all(int(pid) % 3 == 0 for pid, _ in results)
+
+
+def test_remove_keeps_rows_contiguous():
+    featurizer = ProductFeaturizer()
+    index = IVFIndex(featurizer.dim)
+    for product in _catalog(40):
+        index.upsert(product["id"], featurizer.featurize(product))
+    for pid in ("0", "39", "17", "missing"):
+        index.remove(pid)
+    assert index.size == 37 and len(index.ids) == 37
+    assert not {"0", "39", "17"} & set(index.row_of)
+    _assert_consistent(index)
+    assert np.allclose(index.vectors[index.row_of["38"]], featurizer.featurize(_catalog(40)[38]))
+
+
+def test_fingerprint_tracks_featurized_fields():
+    product = _catalog(1)[0]
+    assert product_fingerprint(product) == product_fingerprint(dict(product, image="/other.png"))
+    assert product_fingerprint(product) != product_fingerprint(dict(product, description="brass lamp"))
+    assert product_fingerprint(product) != product_fingerprint(dict(product, price=999))
+
+
+def test_sync_refeaturizes_edits_and_drops_removed_products(fresh_index):
+    catalog = _catalog()
+    assert ann.get_similar_index(catalog, complete=True).size == 60
+
+    fresh_index()
+    edited = [dict(p) for p in catalog if p["id"] not in ("5", "30", "59")]
+    edited[0]["description"] = "hand-beaten brass lamp"
+    index = ann.get_similar_index(edited, complete=True)
+
+    assert index.size == 57
+    assert not {"5", "30", "59"} & set(index.row_of)
+    assert np.allclose(index.vectors[index.row_of["0"]], ann._featurizer.featurize(edited[0]))
+    _assert_consistent(index)
+    assert all(p["id"] not in ("5", "30", "59") for p in ann.similar_products("1", 10))
+
+
+def test_partial_sync_keeps_unlisted_products(fresh_index):
+    ann.get_similar_index(_catalog(), complete=True)
+    index = ann.get_similar_index(_catalog(10))
+    assert index.size == 60
@@ -0,0 +1,99 @@
+# backend/tests/test_ar_blender.py
+import asyncio
+import logging
+import os
+import stat
+
+import pytest
+from fastapi import HTTPException
+
+from src.ar import blender
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="fake Blender is a shell script")
+
+
+def _fake_blender(tmp_path, body: str) -> str:
+    path = tmp_path / "blender"
+    path.write_text("#!/bin/sh\n" + body)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+WRITES_OUTPUT = 'for a; do last=$a; done\necho fake > "$last"\n'
+
+
+def test_run_blender_writes_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("BLENDER_PATH", _fake_blender(tmp_path, WRITES_OUTPUT))
+    output = tmp_path / "out.glb"
+    asyncio.run(blender.run_blender("render_canvas_template.py", ["in.png", str(output)], str(output)))
+    assert output.read_text().strip() == "fake"
+
+
+def test_run_blender_logs_at_debug_level(tmp_path, monkeypatch):
+    # Every key passed through `extra=` must stay clear of LogRecord's own attributes
+    monkeypatch.setenv("BLENDER_PATH", _fake_blender(tmp_path, WRITES_OUTPUT))
+    previous = blender.logger.level
+    blender.logger.setLevel(logging.DEBUG)
+    try:
+        output = tmp_path / "out.glb"
+        asyncio.run(blender.run_blender("render_canvas_template.py", ["in.png", str(output)], str(output)))
+    finally:
+        blender.logger.setLevel(previous)
+    assert output.exists()
+
+
+def test_run_blender_failure_keeps_output_tail(tmp_path, monkeypatch):
+    script = "python3 -c \"print('x' * 500000)\"\necho TAILMARK >&2\nexit 3\n"
+    monkeypatch.setenv("BLENDER_PATH", _fake_blender(tmp_path, script))
+    output = tmp_path / "out.glb"
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(blender.run_blender("x.py", [str(output)], str(output)))
+    assert excinfo.value.status_code == 500
+    assert "TAILMARK" in excinfo.value.detail
+    assert len(excinfo.value.detail) <= 2100
+
+
+def test_run_blender_timeout_kills_process_group(tmp_path, monkeypatch):
+    pid_file = tmp_path / "child.pid"
+    monkeypatch.setenv("BLENDER_PATH", _fake_blender(tmp_path, f"sleep 300 &\necho $! > {pid_file}\nsleep 300\n"))
+    output = tmp_path / "out.glb"
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(blender.run_blender("hang.py", [str(output)], str(output), timeout_s=0.5))
+    assert excinfo.value.status_code == 504
+
+    child = int(pid_file.read_text())
+    try:
+        os.kill(child, 0)
+        with open(f"/proc/{child}/stat") as f:
+            alive = f.read().split()[2] != "Z"
+    except (ProcessLookupError, FileNotFoundError):
+        alive = False
+    assert not alive
+    assert blender.blender_stats()["scripts"]["hang.py"]["timeouts"] >= 1
+
+
+@pytest.mark.skipif(not hasattr(blender.resource, "prlimit"), reason="prlimit is Linux only")
+def test_run_blender_limits_started_process(tmp_path, monkeypatch):
+    # The limits are applied right after spawn, so read them after a moment
+    script = 'for a; do last=$a; done\nsleep 0.3\necho "$(ulimit -v) $(ulimit -t)" > "$last"\n'
+    monkeypatch.setenv("BLENDER_PATH", _fake_blender(tmp_path, script))
+    monkeypatch.setattr(blender, "BLENDER_MEMORY_LIMIT_MB", 4096)
+    monkeypatch.setattr(blender, "BLENDER_CPU_LIMIT_S", 60)
+    spawned = []
+    real_exec = asyncio.create_subprocess_exec
+
+    async def spy(*args, **kwargs):
+        spawned.append(kwargs)
+        return await real_exec(*args, **kwargs)
+
+    monkeypatch.setattr(blender.asyncio, "create_subprocess_exec", spy)
+    output = tmp_path / "out.glb"
+    asyncio.run(blender.run_blender("export.py", [str(output)], str(output)))
+    assert output.read_text().split() == [str(4096 * 1024), "60"]
+    assert "preexec_fn" not in spawned[0] and spawned[0]["start_new_session"]
+
+
+def test_limits_on_exited_process_are_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger=blender.logger.name):
+        blender._limit_resources(2 ** 22 + 12345)  # no such pid
+    assert not hasattr(blender.resource, "prlimit") or "Could not limit" in caplog.text
@@ -0,0 +1,56 @@
+# backend/tests/test_ar_generators.py
+import asyncio
+
+import pytest
+from PIL import Image
+
+from src.ar import generators
+from src.ar.generators import GENERATORS, category_key, generator_for, parse_dimensions
+from src.lib.glb import read_glb
+
+
+@pytest.mark.parametrize("category, key", [
+    ("Textiles", "textile"),
+    ("textile", "textile"),
+    ("Sarees", "textile"),
+    ("Pottery", "pottery"),
+    ("Ceramics", "pottery"),
+    ("Paintings", "painting"),
+    ("Paintings & Art", "painting"),
+    ("Jewelry", None),
+    ("Woodwork", None),
+    ("", None),
+    (None, None),
+])
+def test_category_key(category, key):
+    assert category_key(category) == key
+
+
+def test_generator_for_catalog_categories(monkeypatch):
+    monkeypatch.delenv("BLENDER_PATH", raising=False)
+    monkeypatch.setattr(generators, "find_blender", lambda: None)
+    assert generator_for({"category": "Textiles"}).name == "drape"
+    assert generator_for({"category": "Pottery"}).name == "lathe"
+    assert generator_for({"category": "Jewelry"}).name == generators.AR_DEFAULT_GENERATOR
+    # Paintings use Blender only when it is installed
+    assert generator_for({"category": "Paintings"}).name == "canvas"
+    assert generator_for({}).name == "canvas"
+
+
+def test_parse_dimensions():
+    assert parse_dimensions("Height: 25cm, Width: 15cm") == {"height": 0.25, "width": 0.15}
+    assert parse_dimensions("Diameter: 20cm, Height: 8cm") == {"diameter": 0.2, "height": 0.08}
+    assert parse_dimensions("Round 20cm") == {}
+    assert parse_dimensions(None) == {}
+
+
+@pytest.mark.parametrize("name", ["canvas", "lathe", "drape"])
+def test_procedural_generators_write_glb(tmp_path, name):
+    image = tmp_path / "input.png"
+    Image.new("RGB", (120, 80), "teal").save(image)
+    output = tmp_path / "model.glb"
+    generator = GENERATORS[name]
+    params = generator.params({"title": "Vase", "dimensions": "Height: 30cm"}, (120, 80))
+    asyncio.run(generator.generate(str(image), params, str(output)))
+    gltf, binary = read_glb(output.read_bytes())
+    assert gltf["meshes"] and gltf["images"] and binary
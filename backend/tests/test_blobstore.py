@@ -0,0 +1,113 @@
+# backend/tests/test_blobstore.py
+import os
+import time
+
+import pytest
+
+from src.lib import blobstore
+from src.lib.blobstore import BlobStore
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobstore, "_ref_source", None)
+    return BlobStore(str(tmp_path / "ar_models"), "/ar_models")
+
+
+def test_objects_are_sharded_and_indexed(store):
+    meta = store.put_bytes("a.glb", b"glb", "model/gltf-binary")
+    path = store.resolve("a.glb")
+    assert path == store.shard_path("a.glb") and open(path, "rb").read() == b"glb"
+    assert os.path.relpath(path, store.root).count(os.sep) == 2
+    assert store.stat("a.glb")["sha256"] == meta["sha256"]
+    with pytest.raises(ValueError):
+        store.shard_path("../escape")
+
+
+def test_keys_in_finds_urls_of_this_store(store):
+    product = {"image": "http://host/uploads/x.png", "ar_model_url": "https://api/ar_models/p1.glb",
+               "ar_model_variants": {"512": "/ar_models/p1_512.glb"}, "other": ["/ar_models/nested/no.glb"]}
+    assert sorted(store.keys_in(product)) == ["p1.glb", "p1_512.glb"]
+
+
+def test_gc_keeps_referenced_and_recent_objects(store):
+    for key in ("kept.glb", "orphan.glb", "recent.glb"):
+        store.put_bytes(key, b"x")
+    store.set_refs("p1", ["kept.glb"])
+    later = time.time() + 10 * DAY
+    store.touch("recent.glb")
+    store._db.execute("UPDATE objects SET last_access = ? WHERE key = 'recent.glb'", (later - DAY,))
+
+    result = store.gc(retention_s=7 * DAY, now=later)
+    assert result["deleted"] == 1
+    assert store.stat("orphan.glb") is None and not os.path.exists(store.shard_path("orphan.glb"))
+    assert store.stat("kept.glb") and store.stat("recent.glb")
+
+
+def test_set_refs_replaces_an_owners_refs(store):
+    store.set_refs("p1", ["a.glb", "b.glb"])
+    store.set_refs("p1", ["b.glb"])
+    assert store.refs("a.glb") == [] and store.refs("b.glb") == ["p1"]
+
+
+def test_import_legacy_keeps_mtime_as_last_access(store):
+    legacy = os.path.join(store.root, "old.glb")
+    with open(legacy, "wb") as f:
+        f.write(b"old")
+    os.utime(legacy, (1_000_000, 1_000_000))
+    assert store.import_legacy() == 1
+    assert not os.path.exists(legacy)
+    assert store.stat("old.glb")["last_access"] == 1_000_000
+
+
+def test_seed_refs_requires_a_product_source(store):
+    assert not store.seed_refs()
+
+
+def test_seeded_refs_protect_legacy_assets_from_gc(store, monkeypatch):
+    for key in ("old.glb", "gone.glb"):
+        path = os.path.join(store.root, key)
+        with open(path, "wb") as f:
+            f.write(b"old")
+        os.utime(path, (1_000_000, 1_000_000))
+    store.import_legacy()
+    store.add_ref("p2", "already.glb")
+
+    products = [("p1", {"ar_model_url": "http://host/ar_models/old.glb"})]
+    monkeypatch.setattr(blobstore, "_ref_source", lambda: iter(products))
+    assert store.seed_refs() and store.refs_seeded
+    assert store.refs("old.glb") == ["p1"] and store.refs("already.glb") == ["p2"]
+
+    store.gc()
+    assert store.stat("old.glb") is not None
+    assert store.stat("gone.glb") is None
+
+
+def test_failed_product_scan_leaves_store_unseeded(store, monkeypatch):
+    def failing():
+        yield "p1", {}
+        raise ConnectionError("firestore down")
+
+    monkeypatch.setattr(blobstore, "_ref_source", failing)
+    assert not store.seed_refs()
+    assert not store.refs_seeded
+
+
+def test_gc_thread_waits_for_seeded_refs(store, monkeypatch):
+    path = os.path.join(store.root, "old.glb")
+    with open(path, "wb") as f:
+        f.write(b"old")
+    os.utime(path, (1_000_000, 1_000_000))
+    store.import_legacy()
+
+    store.start_gc(interval_s=0.02)
+    time.sleep(0.1)
+    assert store.stat("old.glb") is not None   # no source registered: nothing collected
+
+    monkeypatch.setattr(blobstore, "_ref_source", lambda: iter([]))
+    deadline = time.time() + 2
+    while store.stat("old.glb") is not None and time.time() < deadline:
+        time.sleep(0.02)
+    assert store.stat("old.glb") is None
@@ -0,0 +1,114 @@
+# backend/tests/test_catalog.py
+import json
+import math
+
+import numpy as np
+import pytest
+
+from data_types_class import Product
+from src.lib.catalog import Catalog, ProductRow
+
+PRODUCTS = [
+    {"id": "1", "name": "Blue vase", "price": 1200, "imageUrl": "/v.jpg", "artisan": "Anil Das",
+     "category": "Pottery", "aiHint": "vase", "tags": ["blue", "glazed"], "materials": [], "rating": 4.5},
+    {"id": "2", "name": "Kalamkari saree", "price": 6400.5, "imageUrl": "/s.jpg", "artisan": "Lakshmi Devi",
+     "category": "Textiles", "aiHint": "saree", "region": "Andhra Pradesh", "description": None},
+    {"id": "3", "name": "Clay lamp", "imageUrl": "/l.jpg", "artisan": "Anil Das", "category": "Pottery Lamps",
+     "aiHint": "lamp"},
+    {"id": "4", "name": "Silver anklet", "price": 2200, "imageUrl": "/a.jpg", "artisan": "Meera Rao",
+     "category": "Jewelry", "aiHint": "anklet", "tags": "not-a-list", "availability": True},
+    {"id": "5", "name": "Ikat stole", "price": 300, "imageUrl": "/i.jpg", "artisan": "lakshmi devi",
+     "category": "textiles", "aiHint": "stole"},
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return Catalog(PRODUCTS)
+
+
+def test_rows_round_trip_to_source_dicts(catalog):
+    assert len(catalog) == len(PRODUCTS)
+    for row, product in zip(catalog, PRODUCTS):
+        assert isinstance(row, ProductRow)
+        assert row.to_dict() == product
+        assert {**row} == product
+    # Serialized rows keep the source key order (taken from the first product)
+    assert json.dumps(catalog[0].to_dict()) == json.dumps(PRODUCTS[0])
+    # Integer prices stay ints, float prices stay floats
+    assert type(catalog[0]["price"]) is int and type(catalog[1]["price"]) is float
+    assert catalog.to_dicts([4, 0]) == [PRODUCTS[4], PRODUCTS[0]]
+
+
+def test_missing_and_off_schema_values(catalog):
+    lamp = catalog[2]
+    assert "price" not in lamp and lamp.get("price") is None
+    with pytest.raises(KeyError):
+        lamp["price"]
+    # Explicit nulls and values of the wrong type come back unchanged
+    assert "description" in catalog[1] and catalog[1]["description"] is None
+    assert catalog[3]["tags"] == "not-a-list"
+    assert catalog[0]["materials"] == []
+
+
+def test_to_product_matches_pydantic_model(catalog):
+    assert catalog[0].to_product() == Product(**PRODUCTS[0])
+    assert catalog[1].to_product().model_dump() == Product(**PRODUCTS[1]).model_dump()
+
+
+def test_sequence_access(catalog):
+    assert catalog[-1]["id"] == "5"
+    assert [row["id"] for row in catalog[1:3]] == ["2", "3"]
+    with pytest.raises(IndexError):
+        catalog[5]
+    assert Catalog(catalog).to_dicts() == PRODUCTS
+    assert len(Catalog([])) == 0
+
+
+def test_get(catalog):
+    assert catalog.get("4")["name"] == "Silver anklet"
+    assert catalog.get(4).row == 3
+    assert catalog.get("missing") is None
+    assert catalog.row_of("5") == 4
+
+
+def test_column_values(catalog):
+    assert catalog.column_values("category", [0, 2, 4]) == ["Pottery", "Pottery Lamps", "textiles"]
+    assert catalog.column_values("region", [0, 1], default="") == ["", "Andhra Pradesh"]
+    assert catalog.column_values("tags", [0, 3]) == [["blue", "glazed"], "not-a-list"]
+
+
+@pytest.mark.parametrize("filters, ids", [
+    ({}, ["1", "2", "3", "4", "5"]),
+    ({"categories": ["pottery"]}, ["1", "3"]),
+    ({"categories": ["TEXTILE"]}, ["2", "5"]),
+    ({"categories": ["lamp", "jewel"]}, ["3", "4"]),
+    ({"artisans": ["lakshmi"]}, ["2", "5"]),
+    ({"artisans": ["das"], "categories": ["pottery"]}, ["1", "3"]),
+    # A missing price fails any price bound
+    ({"min_price": 0}, ["1", "2", "4", "5"]),
+    ({"max_price": 2200}, ["1", "4", "5"]),
+    ({"min_price": 1200, "max_price": 2200}, ["1", "4"]),
+    ({"categories": ["pottery"], "max_price": math.inf}, ["1"]),
+    ({"exclude_ids": ["2", "missing", "4"]}, ["1", "3", "5"]),
+    ({"categories": ["woodwork"]}, []),
+])
+def test_filter_mask(catalog, filters, ids):
+    mask = catalog.filter_mask(**filters)
+    assert mask.dtype == bool and mask.shape == (len(catalog),)
+    assert [catalog[int(r)]["id"] for r in catalog.filter_rows(**filters)] == ids
+
+
+def test_sort_rows_by_price(catalog):
+    # The row without a price sorts last
+    assert catalog.sort_rows(by="price").tolist() == [4, 0, 3, 1, 2]
+    assert catalog.sort_rows(np.array([0, 1, 3]), by="price", descending=True).tolist() == [1, 3, 0]
+
+
+def test_sort_rows_by_categorical_field(catalog):
+    assert catalog.column_values("category", catalog.sort_rows(by="category").tolist()) == \
+        ["Jewelry", "Pottery", "Pottery Lamps", "Textiles", "textiles"]
+    # Rows without a value rank with the empty string, ahead of every value
+    assert catalog.sort_rows(by="region").tolist()[-1] == 1
+    with pytest.raises(ValueError):
+        catalog.sort_rows(by="name")
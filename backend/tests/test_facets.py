@@ -0,0 +1,138 @@
+# backend/tests/test_facets.py
+from types import SimpleNamespace
+
+import pytest
+
+from src.lib.catalog import Catalog
+from src.recommendation.facets import (
+    ColumnarFacetIndex,
+    FacetIndex,
+    get_facet_index,
+    price_bucket_label,
+    request_candidates,
+    suggested_filters,
+)
+from src.recommendation.query_parser import ParsedQuery
+
+PRODUCTS = [
+    {"id": "1", "name": "Blue vase", "price": 1200, "category": "Pottery", "artisan": "Anil Das"},
+    {"id": "2", "name": "Kalamkari saree", "price": 6400, "category": "Textiles", "artisan": "Lakshmi Devi"},
+    {"id": "3", "name": "Terracotta pot", "price": 450, "category": "pottery ", "artisan": "Anil Das"},
+    {"id": "4", "name": "Silver anklet", "price": 2200, "category": "Jewelry", "artisan": "Meera Rao"},
+    {"id": "5", "name": "Ikat stole", "price": 1800.5, "category": "Textiles", "artisan": "Lakshmi Devi"},
+    {"id": "6", "name": "Clay lamp", "price": 300, "category": "Pottery", "artisan": "Meera Rao"},
+]
+
+
+def _scan(products, categories=None, min_price=None, max_price=None, artisans=None, exclude_ids=None):
+    """The plain per-product filter the indexes replace."""
+    rows = []
+    for row, p in enumerate(products):
+        price = float(p.get("price") or 0)
+        if categories and not any(c.lower() in p["category"].lower() for c in categories):
+            continue
+        if min_price is not None and price < min_price:
+            continue
+        if max_price is not None and price > max_price:
+            continue
+        if artisans and not any(a.lower() in p["artisan"].lower() for a in artisans):
+            continue
+        if exclude_ids and p["id"] in exclude_ids:
+            continue
+        rows.append(row)
+    return rows
+
+
+FILTERS = [
+    {},
+    {"categories": ["pottery"]},
+    {"categories": ["Pottery"], "max_price": 1000},
+    {"categories": ["textile", "jewel"], "min_price": 2000},
+    {"min_price": 450, "max_price": 2200},
+    {"artisans": ["anil"]},
+    {"categories": ["Textiles"], "artisans": ["Meera"]},
+    {"exclude_ids": ["1", "6"]},
+    {"categories": ["Woodwork"]},
+]
+
+
+@pytest.mark.parametrize("index_type", [FacetIndex, ColumnarFacetIndex])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filter_rows_matches_scan(index_type, filters):
+    products = Catalog(PRODUCTS) if index_type is ColumnarFacetIndex else PRODUCTS
+    assert index_type(products).filter_rows(**filters) == _scan(PRODUCTS, **filters)
+
+
+def test_get_and_filter_products():
+    index = FacetIndex(PRODUCTS)
+    assert index.get("4")["name"] == "Silver anklet"
+    assert index.get("missing") is None
+    assert [p["id"] for p in index.filter_products(categories=["pottery"], min_price=400)] == ["1", "3"]
+
+
+def test_get_facet_index_is_cached_and_rebuilt_on_growth():
+    products = list(PRODUCTS)
+    index = get_facet_index(products)
+    assert get_facet_index(products) is index
+    products.append({"id": "7", "price": 900, "category": "Woodwork", "artisan": "Ravi"})
+    rebuilt = get_facet_index(products)
+    assert rebuilt is not index and len(rebuilt) == 7
+    assert isinstance(get_facet_index(Catalog(PRODUCTS)), ColumnarFacetIndex)
+
+
+@pytest.mark.parametrize("price, label", [
+    (0, "0-1000"), (1000, "0-1000"), (1000.5, "1000-2500"), (5000, "2500-5000"), (10001, "10000+"),
+])
+def test_price_bucket_label(price, label):
+    assert price_bucket_label(price) == label
+
+
+@pytest.mark.parametrize("products", [PRODUCTS, Catalog(PRODUCTS)], ids=["dicts", "catalog"])
+def test_suggested_filters(products):
+    index = get_facet_index(products)
+    suggested = suggested_filters(index, index.filter_rows(min_price=1000))
+    assert suggested["priceRange"] == {"min": 1200.0, "max": 6400.0}
+    assert suggested["categories"][0] == "Textiles"
+    assert suggested["counts"]["categories"] == {"Textiles": 2, "Pottery": 1, "Jewelry": 1}
+    assert suggested["counts"]["artisans"]["Lakshmi Devi"] == 2
+    assert list(suggested["counts"]["priceBuckets"]) == ["1000-2500", "5000-10000"]
+    assert suggested_filters(index, []) == {}
+
+
+def _request(categories=None, price_range=None, exclude=None):
+    prefs = SimpleNamespace(categories=categories, priceRange=price_range, preferredArtisans=None)
+    return SimpleNamespace(userPreferences=prefs, excludeProducts=exclude)
+
+
+def test_request_candidates_merges_parsed_prompt():
+    req = _request(exclude=["6"])
+    _, rows = request_candidates(req, PRODUCTS, ParsedQuery(max_price=1500, categories=["Pottery"]))
+    assert [PRODUCTS[r]["id"] for r in rows] == ["1", "3"]
+
+
+def test_request_candidates_falls_back_to_explicit_filters():
+    req = _request(price_range=SimpleNamespace(min=2000, max=None))
+    # Nothing is both a Woodwork item and >= 2000, so the prompt filters are dropped
+    _, rows = request_candidates(req, PRODUCTS, ParsedQuery(categories=["Woodwork"]))
+    assert [PRODUCTS[r]["id"] for r in rows] == ["2", "4"]
+    _, rows = request_candidates(_request(), PRODUCTS, ParsedQuery())
+    assert len(rows) == len(PRODUCTS)
+
+
+def test_columnar_index_shared_interface():
+    index = ColumnarFacetIndex(Catalog(PRODUCTS))
+    assert len(index) == len(PRODUCTS)
+    assert [p["id"] for p in index.filter_products(categories=["pottery"], min_price=400)] == ["1", "3"]
+    assert index.get("4")["name"] == "Silver anklet"
+    assert index.value_counts("artisan", [0, 2, 3]) == {"Anil Das": 2, "Meera Rao": 1}
+
+
+def test_columnar_slices_match_catalog_mask():
+    products = [dict(p) for p in PRODUCTS]
+    del products[2]["price"]
+    products.append({"id": "7", "category": "Woodwork", "artisan": "Ravi"})
+    products.append({"id": "8", "price": 700, "artisan": "Ravi"})
+    catalog = Catalog(products)
+    index = ColumnarFacetIndex(catalog)
+    for filters in FILTERS + [{"min_price": 0}, {"categories": ["wood"], "max_price": 10 ** 6}]:
+        assert index.filter_rows(**filters) == catalog.filter_rows(**filters).tolist(), filters
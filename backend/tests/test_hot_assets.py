@@ -0,0 +1,120 @@
+# backend/tests/test_hot_assets.py
+import pytest
+
+from src.lib import hot_assets
+from src.lib.hot_assets import HotAssetCache
+
+
+@pytest.fixture
+def files(tmp_path):
+    def make(name, size, fill=b"x"):
+        path = tmp_path / name
+        path.write_bytes(fill * size)
+        return str(path)
+    return make
+
+
+def _get(cache, path, etag="v1"):
+    """One request the way AssetResolver makes it: lookup, then admit when asked to."""
+    body, admit = cache.lookup(path, etag)
+    if body is None and admit:
+        with open(path, "rb") as f:
+            size = len(f.read())
+        cache.admit(path, etag, size)
+    return body
+
+
+def test_admitted_after_n_requests(files):
+    cache = HotAssetCache(max_bytes=1000, admit_after=3)
+    path = files("a.glb", 100)
+    assert _get(cache, path) is None
+    assert _get(cache, path) is None
+    assert _get(cache, path) is None  # third request loads it
+    body = _get(cache, path)
+    assert isinstance(body, memoryview) and bytes(body) == b"x" * 100
+    assert cache.stats()["entries"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_eviction_only_removes_less_requested_entries(files):
+    cache = HotAssetCache(max_bytes=250, admit_after=1)
+    popular, other, newcomer = files("p.glb", 100), files("o.glb", 100), files("n.glb", 100)
+    for _ in range(5):
+        _get(cache, popular)
+    for _ in range(2):
+        _get(cache, other)
+    # One request: "other" (2) and "popular" (5) are requested more, so nothing is evicted
+    _get(cache, newcomer)
+    assert _get(cache, newcomer) is None
+    assert cache.stats()["evictions"] == 0
+    # Now requested 3 times: evicts "other" (2) but never "popular"
+    _get(cache, newcomer)
+    assert cache.stats()["evictions"] == 1
+    assert _get(cache, newcomer) is not None
+    assert _get(cache, popular) is not None
+    # "other" (3 requests) can't displace entries requested more often
+    assert _get(cache, other) is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 2
+
+
+def test_oversized_items_are_never_admitted(files):
+    cache = HotAssetCache(max_bytes=1000, max_item_bytes=50, admit_after=1)
+    path = files("big.glb", 100)
+    assert cache.admit(path, "v1", 100) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_reload_when_etag_changes(files):
+    cache = HotAssetCache(max_bytes=1000, admit_after=1)
+    path = files("a.glb", 10, b"1")
+    _get(cache, path, "v1")
+    assert bytes(_get(cache, path, "v1")) == b"1" * 10
+    files("a.glb", 12, b"2")
+    assert _get(cache, path, "v2") is None  # stale entry is a miss and is reloaded
+    assert bytes(_get(cache, path, "v2")) == b"2" * 12
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 12
+
+
+def test_changed_while_loading_is_not_cached(files):
+    cache = HotAssetCache(max_bytes=1000, admit_after=1)
+    path = files("a.glb", 10)
+    assert cache.admit(path, "v1", 20) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate(files):
+    cache = HotAssetCache(max_bytes=1000, admit_after=1)
+    path = files("a.glb", 10)
+    _get(cache, path)
+    cache.invalidate(path)
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+    assert _get(cache, path) is None
+
+
+def test_counts_are_halved_when_aging(files, monkeypatch):
+    monkeypatch.setattr(hot_assets, "HOT_ASSET_AGING_REQUESTS", 10)
+    cache = HotAssetCache(max_bytes=1000, admit_after=100)
+    a, b = files("a.glb", 10), files("b.glb", 10)
+    for _ in range(7):
+        cache.lookup(a, "v1")
+    cache.lookup(b, "v1")
+    assert cache._counts == {a: 7, b: 1}
+    cache.lookup(a, "v1")
+    # The 10th request halves the counts (8 -> 4, single requests forgotten) before counting itself
+    cache.lookup(a, "v1")
+    assert cache._counts == {a: 5}
+
+
+def test_large_bodies_are_memory_mapped(files, monkeypatch):
+    monkeypatch.setattr(hot_assets, "HOT_ASSET_MMAP_MIN_BYTES", 64)
+    cache = HotAssetCache(max_bytes=1000, admit_after=1)
+    small, large = files("s.glb", 63), files("l.glb", 64, b"L")
+    _get(cache, small)
+    _get(cache, large)
+    assert cache.stats()["mapped"] == 1
+    assert bytes(_get(cache, large)) == b"L" * 64
+    assert isinstance(cache._entries[small][1], bytes)
+
+
+def test_disabled_cache_never_admits(files):
+    cache = HotAssetCache(max_bytes=0, admit_after=1)
+    assert cache.lookup(files("a.glb", 10), "v1") == (None, False)
@@ -0,0 +1,163 @@
+# backend/tests/test_http_cache.py
+import asyncio
+import gzip
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.lib import compression
+from src.lib.compression import CompressionMiddleware, choose_encoding
+from src.lib.http_cache import cache_headers, catalog_version, not_modified, not_modified_response
+
+
+# ---------------------------
+# Accept-Encoding negotiation
+# ---------------------------
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", "gzip"),
+    ("*;q=0, gzip;q=0.5", "gzip"),
+    ("deflate, gzip;q=0.2", "gzip"),
+    ("gzip;q=bogus", None),
+])
+def test_choose_encoding_gzip_only(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+    assert choose_encoding("br;q=0, *") == "gzip"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    big = {"items": ["handmade"] * 200}
+
+    @app.get("/json")
+    async def json_body():
+        return JSONResponse(big, headers={"Vary": "Origin"})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\0" * 5000, media_type="model/gltf-binary")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f"chunk {i} ".encode() * 50
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def test_compresses_json_and_merges_vary(client):
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+    assert response.json()["items"][0] == "handmade"   # httpx decodes gzip
+
+
+def test_identity_still_varies_on_accept_encoding(client):
+    response = client.get("/json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_small_and_binary_responses_pass_through(client):
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers and "vary" not in response.headers
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == b"".join(f"chunk {i} ".encode() * 50 for i in range(5))
+
+
+# ---------------------------
+# ETags
+# ---------------------------
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_not_modified_uses_weak_comparison():
+    etag = catalog_version.etag("products")
+    assert not not_modified(_request(), etag)
+    assert not_modified(_request(etag), etag)
+    assert not_modified(_request(etag[2:]), etag)              # strong form of the same tag
+    assert not_modified(_request(f'"other", {etag}'), etag)
+    assert not_modified(_request("*"), etag)
+    assert not not_modified(_request('W/"other"'), etag)
+    response = not_modified_response(etag, "public, max-age=60")
+    assert response.status_code == 304 and response.headers["etag"] == etag
+    assert cache_headers(etag, None) == {"ETag": etag}
+
+
+def test_bump_changes_the_etag():
+    before = catalog_version.etag("products")
+    catalog_version.bump()
+    assert catalog_version.etag("products") != before
+
+
+def test_local_ar_build_invalidates_product_listing(tmp_path, monkeypatch):
+    import main
+    import routes
+    from src.ar.generators import get_generator
+    from src.ar.manifest import build_inputs
+    from src.lib import storage
+
+    if routes.db:
+        pytest.skip("exercises the local (no Firestore) path")
+    monkeypatch.setattr(storage, "_storages", {
+        "ar_models": storage.MemoryStorage(url_base="memory://ar_models/"),
+        "ar_sources": storage.MemoryStorage(url_base="memory://ar_sources/"),
+    })
+    monkeypatch.setitem(routes.products_store, "t040", {"id": "t040", "title": "Test", "category": "Paintings",
+                                                         "status": "published"})
+    client = TestClient(main.app)
+    first = client.get("/products")
+    etag = first.headers["etag"]
+    assert client.get("/products", headers={"If-None-Match": etag}).status_code == 304
+
+    image = tmp_path / "input.png"
+    Image.new("RGB", (64, 48), "teal").save(image)
+    generator = get_generator("canvas")
+    inputs = build_inputs(hashlib.sha256(image.read_bytes()).hexdigest(), (64, 48), generator,
+                          generator.params(routes.products_store["t040"], (64, 48)))
+    asyncio.run(routes.build_ar_model("t040", str(image), str(tmp_path), generator, inputs,
+                                      "http://testserver", new_source=True))
+
+    second = client.get("/products", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    listed = next(p for p in second.json() if p["id"] == "t040")
+    assert listed["status"] == "ar_ready" and listed["ar_model_url"]
+
+
+def test_ar_models_are_not_cached_for_a_year():
+    import main
+    from src.lib.storage import ASSET_CACHE_CONTROL
+
+    # Model keys are reused on regeneration, so they must be revalidated
+    assert main.ar_model_assets.cache_control == ASSET_CACHE_CONTROL
+    assert "31536000" not in main.ar_model_assets.cache_control
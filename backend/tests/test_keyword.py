@@ -0,0 +1,33 @@
+# backend/tests/test_keyword.py
+import pytest
+
+from data_types_class import RecommendationRequest
+from src.lib.catalog import Catalog
+from src.recommendation.keyword import keyword_recommendations
+from src.recommendation.query_parser import QueryParser
+
+PRODUCTS = [
+    {"id": "1", "name": "Silk saree", "price": 4000, "category": "Textiles", "artisan": "A", "aiHint": "saree"},
+    {"id": "2", "name": "Silk saree", "price": 4200, "category": "Textiles", "artisan": "B", "aiHint": "saree",
+     "region": "Tamil Nadu"},
+    {"id": "3", "name": "Cotton saree", "price": 900, "category": "Textiles", "artisan": "C", "aiHint": "saree",
+     "description": "Woven in red for the Diwali season"},
+    {"id": "4", "name": "Brass lamp", "price": 700, "category": "Metalwork", "artisan": "D", "aiHint": "lamp"},
+]
+
+
+@pytest.mark.parametrize("products", [PRODUCTS, Catalog(PRODUCTS)], ids=["dicts", "catalog"])
+def test_parsed_regions_occasions_colors_boost_matches(products):
+    parser = QueryParser()
+
+    def top_ids(prompt):
+        req = RecommendationRequest(userPrompt=prompt, maxResults=3)
+        return [p["id"] for p in keyword_recommendations(req, products, parser.parse(prompt))["products"]]
+
+    # The region is not a filter: other sarees are still returned, ranked below
+    assert top_ids("saree from kanchipuram") == ["2", "1", "3"]
+    assert top_ids("saree for diwali") == ["3", "1", "2"]
+    result = keyword_recommendations(RecommendationRequest(userPrompt="red saree"), products,
+                                     parser.parse("red saree"))
+    assert result["products"][0]["id"] == "3"
+    assert result["interpretedQuery"] == {"categories": ["Textiles"], "colors": ["red"]}
@@ -0,0 +1,112 @@
+# backend/tests/test_lod.py
+import io
+
+import pytest
+from PIL import Image
+from starlette.datastructures import Headers
+
+from src.lib.glb import read_glb, write_glb
+from src.lib.lod import ACCEPT_CH, build_variants, choose_lod, negotiate, variant_key
+
+SIZES = [512, 1024, 2048]
+
+
+@pytest.mark.parametrize("lod, size", [
+    ("low", 512),
+    ("MEDIUM", 1024),
+    ("full", None),
+    ("high", None),
+    ("600", 1024),
+    ("2048", 2048),
+    ("4096", None),
+    ("bogus", None),
+])
+def test_choose_lod_query_parameter(lod, size):
+    assert choose_lod(SIZES, lod, {}) == size
+
+
+@pytest.mark.parametrize("headers, size", [
+    ({}, None),
+    ({"save-data": "on"}, 512),
+    ({"ect": "2g"}, 512),
+    ({"ect": "3g"}, 1024),
+    ({"ect": "4g"}, None),
+    ({"device-memory": "0.5"}, 1024),
+    ({"device-memory": "8"}, None),
+    ({"sec-ch-viewport-width": "400", "sec-ch-dpr": "2"}, 1024),
+    ({"viewport-width": "390"}, 512),
+    ({"sec-ch-viewport-width": "1920", "sec-ch-dpr": "2"}, None),
+    ({"sec-ch-viewport-width": "nonsense"}, None),
+    # The tightest hint wins
+    ({"ect": "3g", "viewport-width": "300"}, 512),
+])
+def test_choose_lod_client_hints(headers, size):
+    assert choose_lod(SIZES, None, headers) == size
+
+
+def test_choose_lod_query_overrides_hints():
+    assert choose_lod(SIZES, "full", {"save-data": "on"}) is None
+    assert choose_lod([1024], "low", {}) == 1024
+    assert choose_lod([], "low", {"save-data": "on"}) is None
+
+
+def test_negotiate_without_variants_serves_full_model():
+    assert negotiate("p1.glb", "low", Headers({"save-data": "on"}), lambda key: False) == ("p1.glb", {})
+
+
+def test_negotiate_serves_variant_with_headers():
+    available = {"p1.glb", "p1_512.glb", "p1_1024.glb"}
+    key, headers = negotiate("p1.glb", None, Headers({"Save-Data": "on"}), available.__contains__)
+    assert key == "p1_512.glb"
+    assert headers["Content-Location"] == "p1_512.glb"
+    assert headers["Accept-CH"] == ACCEPT_CH
+    assert "Save-Data" in headers["Vary"] and "Sec-CH-Viewport-Width" in headers["Vary"]
+
+    # 2048 was not built, so a request above 1024 gets the full model
+    key, headers = negotiate("p1.glb", "2048", Headers({}), available.__contains__)
+    assert key == "p1.glb"
+    assert "Content-Location" not in headers and "Vary" in headers
+
+
+def _textured_glb(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (180, 90, 40)).save(buffer, format="PNG")
+    png = buffer.getvalue()
+    gltf = {
+        "asset": {"version": "2.0"},
+        "buffers": [{"byteLength": len(png)}],
+        "bufferViews": [{"buffer": 0, "byteOffset": 0, "byteLength": len(png)}],
+        "images": [{"bufferView": 0, "mimeType": "image/png"}],
+    }
+    return write_glb(gltf, png)
+
+
+def _texture_size(path: str):
+    with open(path, "rb") as f:
+        gltf, binary = read_glb(f.read())
+    view = gltf["bufferViews"][gltf["images"][0]["bufferView"]]
+    start = view.get("byteOffset", 0)
+    with Image.open(io.BytesIO(binary[start:start + view["byteLength"]])) as img:
+        return img.size
+
+
+def test_variant_key():
+    assert variant_key("p1.glb", 512) == "p1_512.glb"
+    assert variant_key("p1", 512) == "p1_512"
+
+
+def test_build_variants_downscales_below_the_source_texture(tmp_path):
+    source = tmp_path / "p1.glb"
+    source.write_bytes(_textured_glb(1500, 750))
+    variants = build_variants(str(source), str(tmp_path), SIZES)
+    # 2048 is above the 1500px source texture, so no variant is written for it
+    assert variants == {512: str(tmp_path / "p1_512.glb"), 1024: str(tmp_path / "p1_1024.glb")}
+    assert _texture_size(variants[512]) == (512, 256)
+    assert _texture_size(variants[1024]) == (1024, 512)
+    assert not (tmp_path / "p1_2048.glb").exists()
+
+
+def test_build_variants_skips_small_textures(tmp_path):
+    source = tmp_path / "p2.glb"
+    source.write_bytes(_textured_glb(256, 256))
+    assert build_variants(str(source), str(tmp_path), SIZES) == {}
@@ -0,0 +1,79 @@
+# backend/tests/test_manifest.py
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ar import generators, manifest
+from src.ar.generators import generator_for
+from src.ar.manifest import build_inputs, current_inputs, is_current, stale_reason
+
+IMAGE_SHA = "ab" * 32
+IMAGE_SIZE = (640, 480)
+
+
+def _built(product: dict) -> dict:
+    """The product as it is after a build with the current generators."""
+    generator = generator_for(product)
+    inputs = build_inputs(IMAGE_SHA, IMAGE_SIZE, generator, generator.params(product, IMAGE_SIZE))
+    return {**product, "ar_model_url": "memory://ar_models/p.glb",
+            "ar_manifest": {**inputs, "output_sha256": "cd" * 32, "built_at": 0}}
+
+
+@pytest.fixture
+def vase():
+    return _built({"id": "p1", "title": "Blue vase", "category": "Pottery", "dimensions": "Height: 30cm"})
+
+
+def test_fresh_build_is_current(vase):
+    assert stale_reason(vase) is None
+    assert is_current(vase["ar_manifest"], current_inputs(vase))
+    assert current_inputs(vase)["image_size"] == list(IMAGE_SIZE)
+
+
+def test_missing_manifest():
+    assert stale_reason({"id": "p2", "ar_model_url": "x"}) == "no manifest"
+    assert stale_reason({"ar_manifest": {"image_sha256": IMAGE_SHA}}) == "no manifest"
+    assert not is_current(None, {})
+    assert not is_current({}, {})
+
+
+def test_changed_dimensions_change_params(vase):
+    assert stale_reason({**vase, "dimensions": "Height: 45cm"}) == "params"
+
+
+def test_changed_category_changes_generator(vase):
+    assert stale_reason({**vase, "category": "Textiles"}) == "generator"
+
+
+def test_generator_version_bump(vase, monkeypatch):
+    monkeypatch.setattr(generators.GENERATORS["lathe"], "version", "2")
+    assert stale_reason(vase) == "generator_version"
+
+
+def test_lod_configuration_change(vase, monkeypatch):
+    monkeypatch.setattr(manifest, "LOD_TEXTURE_SIZES", [256, 1024])
+    assert stale_reason(vase) == "lod_sizes"
+
+
+def test_new_photo_is_not_current(vase):
+    generator = generator_for(vase)
+    inputs = build_inputs("ef" * 32, IMAGE_SIZE, generator, generator.params(vase, IMAGE_SIZE))
+    assert not is_current(vase["ar_manifest"], inputs)
+    # Output-only fields do not take part in the comparison
+    assert is_current({**vase["ar_manifest"], "output_sha256": "00"}, current_inputs(vase))
+
+
+def test_rebuild_dry_run_lists_stale_models(monkeypatch, vase):
+    import main
+    import routes
+
+    if routes.db:
+        pytest.skip("exercises the local (no Firestore) path")
+    monkeypatch.setitem(routes.products_store, "t048-current", {**vase, "id": "t048-current"})
+    monkeypatch.setitem(routes.products_store, "t048-stale", {**vase, "id": "t048-stale", "dimensions": "H 10cm"})
+    monkeypatch.setitem(routes.products_store, "t048-legacy", {"id": "t048-legacy", "ar_model_url": "x"})
+
+    body = TestClient(main.app).post("/ar_models/rebuild", params={"dry_run": "true"}).json()
+    assert body["dry_run"] is True and body["rebuilt"] == 0
+    assert {"id": "t048-stale", "reason": "params"} in body["results"]
+    assert all(r["id"] != "t048-current" for r in body["results"])
+    assert "t048-legacy" in body["unmanaged"]
@@ -0,0 +1,92 @@
+# backend/tests/test_personalization.py
+import json
+import math
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from data_types_class import UserEvent
+from src.recommendation import personalization
+from src.recommendation.personalization import ProfileStore, UserAffinity, blend_weight, event_time
+
+POTTERY = {"category": "Pottery", "artisan": "Asha", "price": 1200.0}
+TEXTILE = {"category": "Textiles", "artisan": "Ravi", "price": 800.0}
+
+
+def test_event_time_normalizes_client_timestamps():
+    now = 1_700_000_000.0
+    assert event_time(None, now) == now
+    assert event_time(now - 60, now) == now - 60
+    assert event_time(now * 1000, now) == now          # JavaScript Date.now()
+    assert event_time(now + 86400 * 365, now) == now   # future
+    assert event_time(1e18, now) == now
+    assert event_time(float("nan"), now) == now
+
+
+@pytest.mark.parametrize("ts", [time.time() * 1000, time.time() + 10 ** 9, 1e300])
+def test_bad_timestamp_does_not_break_profile(ts):
+    store = ProfileStore(path="")
+    store.record("u1", POTTERY, "purchase", ts=ts)
+    store.record("u1", TEXTILE, "view")
+    profile = store.get("u1")
+    strength = profile.strength()
+    assert math.isfinite(strength) and strength > 0
+    assert 0 < blend_weight(profile) <= personalization.PERSONALIZATION_WEIGHT
+    assert profile.score(POTTERY) > profile.score(TEXTILE)
+
+
+def test_future_reference_from_saved_profile_is_clamped():
+    saved = UserAffinity(time.time() * 1000).to_dict()
+    saved.update(categories={"pottery": 1.0}, total=1.0)
+    profile = UserAffinity.from_dict(saved)
+    assert profile.ref <= time.time()
+    assert math.isfinite(profile.strength())
+
+
+def test_weights_halve_every_half_life():
+    now = time.time()
+    half_life = personalization.PERSONALIZATION_HALF_LIFE_DAYS * 86400
+    profile = UserAffinity(now - half_life)
+    profile.add("Pottery", None, None, weight=1.0, ts=now - half_life)
+    assert profile.strength(now) == pytest.approx(0.5)
+    profile.add("Textiles", None, None, weight=1.0, ts=now)
+    assert profile.strength(now) == pytest.approx(1.5)
+    assert profile.score({"category": "Textiles"}) == pytest.approx(0.5 * 2 / 3)
+
+
+def test_user_event_rejects_non_finite_and_negative_timestamps():
+    with pytest.raises(ValidationError):
+        UserEvent(userId="u", productId="p", timestamp=float("inf"))
+    with pytest.raises(ValidationError):
+        UserEvent(userId="u", productId="p", timestamp=-1)
+    assert UserEvent(userId="u", productId="p", timestamp=1.7e12).timestamp == 1.7e12
+
+
+def test_periodic_save_runs_off_the_calling_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(personalization, "PERSONALIZATION_SAVE_EVERY", 3)
+    path = tmp_path / "profiles.json"
+    store = ProfileStore(path=str(path))
+    writers = []
+    real_dump = personalization.json.dump
+
+    def dump(data, f):
+        writers.append(threading.current_thread())
+        real_dump(data, f)
+
+    monkeypatch.setattr(personalization.json, "dump", dump)
+    for _ in range(3):
+        store.record("u1", POTTERY, "view")
+    store._saver.join(5)
+    assert writers and threading.current_thread() not in writers
+    saved = json.loads(path.read_text())
+    assert saved["u1"]["categories"] == pytest.approx(store.get("u1").categories)
+
+    # The snapshot does not share tables with the live profile
+    snapshot = store.get("u1").to_dict()
+    store.record("u1", TEXTILE, "view")
+    assert "textiles" not in snapshot["categories"]
+
+    reloaded = ProfileStore(path=str(path))
+    assert reloaded.get("u1").score(POTTERY) > 0
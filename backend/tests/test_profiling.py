@@ -0,0 +1,91 @@
+# backend/tests/test_profiling.py
+import asyncio
+import os
+
+from src.lib import profiling
+from src.lib.profiling import ProfilingMiddleware, span
+
+
+def _app(delay: float = 0.0):
+    async def app(scope, receive, send):
+        with span("work"):
+            await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def _call(middleware, headers=()):
+    scope = {"type": "http", "method": "GET", "path": "/p", "headers": list(headers)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent
+
+
+def test_server_timing_header_lists_spans():
+    sent = asyncio.run(_call(ProfilingMiddleware(_app())))
+    headers = dict(sent[0]["headers"])
+    assert sent[0]["status"] == 200
+    assert headers[b"server-timing"].startswith(b"work;dur=")
+    assert b"total;dur=" in headers[b"server-timing"]
+
+
+def test_overlapping_profiled_requests_do_not_fail(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    middleware = ProfilingMiddleware(_app(delay=0.05))
+
+    async def scenario():
+        return await asyncio.gather(*(_call(middleware, [(b"x-profile", b"secret")]) for _ in range(3)))
+
+    for sent in asyncio.run(scenario()):
+        assert sent[0]["status"] == 200
+    # One request held the profiler; the overlapping ones were served unprofiled
+    assert len(os.listdir(tmp_path)) == 1
+    assert not profiling._profiler_active.locked()
+
+    asyncio.run(_call(middleware, [(b"x-profile", b"secret")]))
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_profile_token_required_when_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    middleware = ProfilingMiddleware(_app())
+    asyncio.run(_call(middleware, [(b"x-profile", b"guess")]))
+    assert not tmp_path.exists() or not os.listdir(tmp_path)
+    asyncio.run(_call(middleware, [(b"x-profile", b"secret")]))
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_header_profiling_disabled_without_token(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", None)
+    asyncio.run(_call(ProfilingMiddleware(_app()), [(b"x-profile", b"1")]))
+    assert not os.listdir(tmp_path)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    asyncio.run(_call(ProfilingMiddleware(_app()), [(b"x-profile", b"")]))
+    assert not os.listdir(tmp_path)
+
+
+def test_only_newest_dumps_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_MAX_DUMPS", 2)
+    (tmp_path / "notes.txt").write_text("not a dump")
+    old = tmp_path / "20200101-000000-GET_p-aaaaaa.prof"
+    old.write_bytes(b"")
+    os.utime(old, (0, 0))
+    middleware = ProfilingMiddleware(_app())
+    for _ in range(3):
+        asyncio.run(_call(middleware, [(b"x-profile", b"secret")]))
+    dumps = [name for name in os.listdir(tmp_path) if name.endswith((".prof", ".html"))]
+    assert len(dumps) == 2 and old.name not in dumps
+    assert (tmp_path / "notes.txt").exists()
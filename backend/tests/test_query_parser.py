@@ -0,0 +1,96 @@
+# backend/tests/test_query_parser.py
+import pytest
+
+from src.recommendation.query_parser import ParsedQuery, QueryParser, expand_query, get_query_parser, merge_filters
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return QueryParser(artisans=["Ramesh Kumar"])
+
+
+@pytest.mark.parametrize("text, min_price, max_price", [
+    ("saree under 5000", None, 5000),
+    ("pottery below ₹2,500", None, 2500),
+    ("gift within rs. 3k", None, 3000),
+    ("necklace upto 1.5 lakh", None, 150000),
+    ("brass lamp above 800", 800, None),
+    ("at least inr 1200", 1200, None),
+    ("between 1000 and 3000", 1000, 3000),
+    ("from ₹5k to ₹2k", 2000, 5000),
+    ("₹500 - ₹900 bangles", 500, 900),
+    ("blue pottery", None, None),
+])
+def test_price_phrases(parser, text, min_price, max_price):
+    parsed = parser.parse(text)
+    assert (parsed.min_price, parsed.max_price) == (min_price, max_price)
+
+
+def test_terms_map_to_canonical_values(parser):
+    parsed = parser.parse("Red Madhubani painting from Mithila for a wedding gift")
+    assert parsed.categories == ["Painting"]
+    assert parsed.regions == ["Bihar"]
+    assert parsed.occasions == ["wedding", "gift"]
+    assert parsed.colors == ["red"]
+
+
+def test_longest_phrase_wins(parser):
+    parsed = parser.parse("blue pottery vase")
+    assert parsed.categories == ["Pottery"]
+    assert parsed.colors == []
+
+
+def test_multiword_terms_and_artisans(parser):
+    parsed = parser.parse("something by ramesh  kumar for a house warming")
+    assert parsed.artisans == ["Ramesh Kumar"]
+    assert parsed.occasions == ["housewarming"]
+
+
+def test_terms_match_whole_words_only(parser):
+    # "pot" must not match inside "potato", nor "ring" inside "spring"
+    assert parser.parse("potato spring").is_empty()
+
+
+def test_empty_and_missing_text(parser):
+    assert parser.parse("").is_empty()
+    assert parser.parse(None).is_empty()
+    assert parser.parse("").to_dict() == {}
+
+
+def test_to_dict_drops_unset_fields(parser):
+    assert parser.parse("wooden toys under 700").to_dict() == {"max_price": 700, "categories": ["Woodwork"]}
+
+
+def test_get_query_parser_uses_catalog_artisans():
+    products = [{"id": "1", "artisan": "Lakshmi Devi"}, {"id": "2"}]
+    parser = get_query_parser(products)
+    assert parser.parse("lakshmi devi pottery").artisans == ["Lakshmi Devi"]
+    assert get_query_parser(products) is parser
+    # Rebuilt when the product list grows
+    products.append({"id": "3", "artisan": "Anil Das"})
+    assert get_query_parser(products).parse("by anil das").artisans == ["Anil Das"]
+    assert get_query_parser() is get_query_parser()
+
+
+def test_merge_filters_explicit_values_take_precedence():
+    parsed = ParsedQuery(min_price=1000, max_price=5000, categories=["Pottery"], artisans=["Anil Das"])
+    filters = {"categories": ["Textiles"], "min_price": 2000, "max_price": 8000, "artisans": None}
+    merged = merge_filters(filters, parsed)
+    assert merged["categories"] == ["Textiles"]
+    assert merged["artisans"] == ["Anil Das"]
+    # Price bounds are intersected
+    assert (merged["min_price"], merged["max_price"]) == (2000, 5000)
+    assert filters["artisans"] is None
+
+
+def test_merge_filters_fills_missing_values():
+    merged = merge_filters({"categories": None}, ParsedQuery(max_price=900, categories=["Jewelry"]))
+    assert merged == {"categories": ["Jewelry"], "max_price": 900}
+
+
+def test_scoring_terms_and_expanded_query(parser):
+    parsed = parser.parse("red shawl from kanchipuram for diwali")
+    assert parsed.scoring_terms() == ["tamil nadu", "diwali", "red"]
+    assert expand_query("red shawl", parsed) == "red shawl tamil nadu diwali red"
+    assert expand_query("shawl", parser.parse("shawl")) == "shawl"
+    assert expand_query("shawl", None) == "shawl"
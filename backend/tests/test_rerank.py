@@ -0,0 +1,111 @@
+# backend/tests/test_rerank.py
+import asyncio
+import json
+
+import pytest
+
+from src.recommendation import rerank
+from src.recommendation.rerank import cache_key, parse_ranking, rerank_response
+
+CANDIDATES = [
+    {"id": "a", "name": "Vase", "category": "Pottery"},
+    {"id": "b", "name": "Saree", "category": "Textiles"},
+    {"id": "c", "name": "Bangle", "category": "Jewelry"},
+]
+RESPONSE = {"products": CANDIDATES, "reasoning": "first stage", "categories": []}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(rerank, "_cache", rerank.OrderedDict())
+    monkeypatch.setattr(rerank, "_inflight", {})
+    monkeypatch.setattr(rerank, "_background", set())
+    monkeypatch.setattr(rerank, "_stats", dict.fromkeys(rerank._stats, 0))
+
+
+def _model(ranking, reasoning="Best matches first", delay=0.0, calls=None):
+    async def generate(prompt, **kwargs):
+        if calls is not None:
+            calls.append(kwargs["flow"])
+        await asyncio.sleep(delay)
+        return json.dumps({"ranking": ranking, "reasoning": reasoning})
+    return generate
+
+
+def test_parse_ranking_keeps_known_ids_and_appends_missing():
+    text = 'Sure! ```json\n{"ranking": ["c", "x", "c", 7, "a"], "reasoning": " Bright colours "}\n```'
+    assert parse_ranking(text, ["a", "b", "c", "7"]) == (["c", "7", "a", "b"], "Bright colours")
+
+
+@pytest.mark.parametrize("text", ["no json here", '{"ranking": ["zzz"]}', '{"reasoning": "none"}'])
+def test_parse_ranking_rejects_unusable_responses(text):
+    with pytest.raises(ValueError):
+        parse_ranking(text, ["a", "b"])
+
+
+def test_cache_key_ignores_candidate_order_and_query_spacing():
+    assert cache_key("Blue  Pottery", ["a", "b"]) == cache_key("blue pottery", ["b", "a"])
+    assert cache_key("blue pottery", ["a", "b"]) != cache_key("blue pottery", ["a", "c"])
+
+
+def test_rerank_reorders_and_caches(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rerank, "generate", _model(["c", "a"], calls=calls))
+
+    async def run():
+        first = await rerank_response("gift for her", RESPONSE, max_results=2)
+        second = await rerank_response("gift for her", RESPONSE, max_results=2)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [p["id"] for p in first["products"]] == ["c", "a"]
+    assert first["reasoning"] == "Best matches first"
+    assert sorted(first["categories"]) == ["Jewelry", "Pottery"]
+    assert second == first
+    assert calls == ["recommend"]
+    assert rerank.rerank_stats()["cache_hits"] == 1
+
+
+def test_deadline_returns_first_stage_and_fills_cache_later(monkeypatch):
+    monkeypatch.setattr(rerank, "RERANK_DEADLINE_MS", 20)
+    monkeypatch.setattr(rerank, "generate", _model(["b", "a", "c"], delay=0.1))
+
+    async def run():
+        late = await rerank_response("wedding", RESPONSE, max_results=3)
+        await asyncio.sleep(0.2)
+        return late, await rerank_response("wedding", RESPONSE, max_results=3)
+
+    late, cached = asyncio.run(run())
+    assert late["products"] == CANDIDATES and late["reasoning"] == "first stage"
+    assert [p["id"] for p in cached["products"]] == ["b", "a", "c"]
+    stats = rerank.rerank_stats()
+    assert (stats["deadline_exceeded"], stats["cache_hits"], stats["inflight"]) == (1, 1, 0)
+
+
+def test_concurrent_requests_share_one_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rerank, "generate", _model(["b"], delay=0.01, calls=calls))
+
+    async def run():
+        return await asyncio.gather(*(rerank_response("shawl", RESPONSE, max_results=1) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all([p["id"] for p in r["products"]] == ["b"] for r in results)
+
+
+def test_model_failure_keeps_first_stage(monkeypatch):
+    async def failing(prompt, **kwargs):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(rerank, "generate", failing)
+    result = asyncio.run(rerank_response("lamp", RESPONSE, max_results=2))
+    assert result == {**RESPONSE, "products": CANDIDATES[:2]}
+    assert rerank.rerank_stats()["errors"] == 1
+    assert rerank._cache == {}
+
+
+def test_single_candidate_is_not_reranked(monkeypatch):
+    monkeypatch.setattr(rerank, "generate", None)
+    result = asyncio.run(rerank_response("vase", {"products": CANDIDATES[:1]}, max_results=5))
+    assert result["products"] == CANDIDATES[:1]
@@ -0,0 +1,135 @@
+# backend/tests/test_resilience.py
+import asyncio
+import time
+
+import pytest
+
+from src.ai import llm
+from src.ai.resilience import CircuitBreaker, LLMUnavailableError, RetryPolicy, is_retryable
+
+
+class _Upstream(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_retry_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=2.0)
+    for attempt, cap in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 2.0)):
+        for _ in range(50):
+            assert 0 <= policy.backoff(attempt) <= cap
+
+
+def test_is_retryable():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(_Upstream(503))
+    assert is_retryable(_Upstream(429))
+    assert not is_retryable(_Upstream(400))
+    assert not is_retryable(ValueError("blocked"))
+
+
+def test_breaker_opens_and_half_opens_with_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # the trial
+    assert not breaker.allow()      # only one at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_breaker_release_frees_the_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def fast_llm(monkeypatch):
+    """generate_text with short timeouts and no backoff; the test sets `llm._call_model`."""
+    monkeypatch.setattr(llm, "LLM_TIMEOUT_S", 0.3)
+    monkeypatch.setattr(llm, "LLM_DEADLINE_S", 2.0)
+    monkeypatch.setattr(llm, "LLM_HEDGING", False)
+    monkeypatch.setattr(llm, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0))
+    monkeypatch.setattr(llm, "_breakers", {})
+    monkeypatch.setattr(llm, "_flow_metrics", {})
+    return llm
+
+
+def test_generate_text_retries_retryable_errors(fast_llm, monkeypatch):
+    calls = []
+
+    def call(model_name, contents, generation_config):
+        calls.append(model_name)
+        if len(calls) < 3:
+            raise _Upstream(503)
+        return "ok"
+
+    monkeypatch.setattr(fast_llm, "_call_model", call)
+    assert asyncio.run(fast_llm.generate_text("hi", flow="test", model_name="m")) == "ok"
+    assert len(calls) == 3
+    assert fast_llm.llm_stats()["flows"]["test"]["retries"] == 2
+
+
+def test_generate_text_does_not_retry_bad_requests(fast_llm, monkeypatch):
+    calls = []
+
+    def call(model_name, contents, generation_config):
+        calls.append(model_name)
+        raise _Upstream(400)
+
+    monkeypatch.setattr(fast_llm, "_call_model", call)
+    with pytest.raises(_Upstream):
+        asyncio.run(fast_llm.generate_text("hi", flow="test", model_name="m"))
+    assert len(calls) == 1
+    assert fast_llm._breaker("m").state == CircuitBreaker.CLOSED
+
+
+def test_generate_text_attempts_stop_at_the_deadline(fast_llm, monkeypatch):
+    monkeypatch.setattr(fast_llm, "LLM_TIMEOUT_S", 1.0)
+    monkeypatch.setattr(fast_llm, "LLM_DEADLINE_S", 1.5)
+    monkeypatch.setattr(fast_llm, "_call_model", lambda *args: time.sleep(1.2) or "late")
+
+    async def timed() -> float:
+        started = time.monotonic()
+        with pytest.raises(LLMUnavailableError):
+            await fast_llm.generate_text("hi", flow="test", model_name="m")
+        return time.monotonic() - started
+
+    # The second attempt gets the remaining ~0.5s, not another full second
+    assert asyncio.run(timed()) < 1.8
+
+
+def test_cancelled_trial_does_not_wedge_the_breaker(fast_llm, monkeypatch):
+    breaker = fast_llm._breaker("m")
+    breaker.reset_timeout = 0.0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monkeypatch.setattr(fast_llm, "_call_model", lambda *args: time.sleep(0.2) or "slow")
+
+    async def cancel_trial():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(fast_llm.generate_text("hi", flow="test", model_name="m"), timeout=0.05)
+
+    asyncio.run(cancel_trial())
+    monkeypatch.setattr(fast_llm, "_call_model", lambda *args: "ok")
+    assert asyncio.run(fast_llm.generate_text("hi", flow="test", model_name="m")) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
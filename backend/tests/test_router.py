@@ -0,0 +1,128 @@
+# backend/tests/test_router.py
+import asyncio
+
+import pytest
+
+from src.ai import router
+from src.ai.router import DEFAULT_POLICIES, MODEL_TIERS, ModelPolicy, choose_model, input_size
+
+FAST, HEAVY = MODEL_TIERS["fast"], MODEL_TIERS["heavy"]
+HEALTHY = {"samples": 50, "error_rate": 0.0, "p95_ms": 800.0, "breaker_open": False}
+
+
+@pytest.fixture
+def health(monkeypatch):
+    """Per-model health returned to the router; tests override entries."""
+    table = {FAST: dict(HEALTHY), HEAVY: dict(HEALTHY)}
+    monkeypatch.setattr(router, "model_health", lambda model: table[model])
+    return table
+
+
+@pytest.fixture
+def policies(monkeypatch):
+    table = {name: ModelPolicy(**vars(p)) for name, p in DEFAULT_POLICIES.items()}
+    monkeypatch.setattr(router, "_policies", table)
+    monkeypatch.setattr(router, "_route_counts", {})
+    monkeypatch.setattr(router, "_shadow_stats", {})
+    return table
+
+
+def test_default_tiers_are_current_models():
+    assert "1.5" not in HEAVY and "1.5" not in FAST
+
+
+def test_input_size():
+    assert input_size("abcd") == 4
+    assert input_size(["ab", object(), "cde"]) == 5
+    assert input_size(None) == 0
+
+
+def test_default_tier_per_flow(health, policies):
+    assert choose_model("classify_product") == (FAST, "default")
+    assert choose_model("recommend") == (HEAVY, "default")
+    assert choose_model("unknown_flow") == (FAST, "default")
+
+
+def test_large_input_promoted_to_heavy(health, policies):
+    assert choose_model("generate_product_story", input_chars=1500) == (FAST, "default")
+    assert choose_model("generate_product_story", input_chars=1501) == (HEAVY, "large_input")
+    # Flows without a threshold never promote
+    assert choose_model("classify_product", input_chars=10 ** 6) == (FAST, "default")
+
+
+def test_skips_tier_over_latency_budget(health, policies):
+    health[HEAVY]["p95_ms"] = 4000.0
+    assert choose_model("recommend") == (FAST, "fallback:heavy_over_budget")
+    # A caller's budget replaces the policy's
+    assert choose_model("recommend", latency_budget_ms=5000) == (HEAVY, "default")
+    assert choose_model("recommend", latency_budget_ms=500) == (HEAVY, "degraded:fast_over_budget")
+
+
+def test_skips_tier_with_high_error_rate(health, policies):
+    health[HEAVY]["error_rate"] = 0.5
+    assert choose_model("recommend") == (FAST, "fallback:heavy_error_rate")
+    # Too few samples to judge
+    health[HEAVY]["samples"] = 3
+    assert choose_model("recommend") == (HEAVY, "default")
+
+
+def test_open_breaker_and_no_healthy_tier(health, policies):
+    health[FAST]["breaker_open"] = True
+    assert choose_model("classify_product") == (HEAVY, "fallback:fast_breaker_open")
+    health[HEAVY]["breaker_open"] = True
+    assert choose_model("classify_product") == (FAST, "degraded:heavy_breaker_open")
+
+
+def test_model_policies_override(monkeypatch):
+    monkeypatch.setenv("MODEL_POLICIES", '{"recommend": {"default_tier": "fast", "shadow_rate": 0.1},'
+                                         ' "new_flow": {"heavy_input_chars": 10}}')
+    policies = router._load_policies()
+    assert policies["recommend"].default_tier == "fast"
+    assert policies["recommend"].shadow_rate == 0.1
+    # Fields not overridden keep the built-in values
+    assert policies["recommend"].latency_budget_ms == 3000
+    assert policies["new_flow"] == ModelPolicy(heavy_input_chars=10)
+    assert DEFAULT_POLICIES["recommend"].default_tier == "heavy"
+
+
+@pytest.mark.parametrize("raw", ["not json", '{"recommend": {"no_such_field": 1}}'])
+def test_invalid_model_policies_are_ignored(monkeypatch, raw):
+    monkeypatch.setenv("MODEL_POLICIES", raw)
+    assert router._load_policies() == DEFAULT_POLICIES
+
+
+def _fake_model(calls):
+    async def generate_text(contents, flow, model_name, generation_config=None):
+        calls.append((flow, model_name))
+        return "brass lamp" if model_name == HEAVY else "brass diya lamp"
+    return generate_text
+
+
+def test_shadow_sampling(health, policies, monkeypatch):
+    calls = []
+    monkeypatch.setattr(router, "generate_text", _fake_model(calls))
+    policies["recommend"] = ModelPolicy(default_tier="heavy", shadow_rate=0.5)
+    draws = iter([0.9, 0.1])
+    monkeypatch.setattr(router.random, "random", lambda: next(draws))
+
+    async def run():
+        first = await router.generate("prompt", flow="recommend")
+        second = await router.generate("prompt", flow="recommend")
+        await asyncio.gather(*router._shadow_tasks)
+        return first, second
+
+    assert asyncio.run(run()) == ("brass lamp", "brass lamp")
+    # Only the second draw (0.1 < 0.5) ran a shadow call, on the other tier
+    assert calls == [("recommend", HEAVY), ("recommend", HEAVY), ("recommend:shadow", FAST)]
+    shadow = router.router_stats()["shadow"]["recommend"]
+    assert shadow["samples"] == 1
+    assert shadow["agreement"] == pytest.approx(2 / 3, abs=1e-3)
+    assert router.router_stats()["routes"]["recommend"] == {f"{HEAVY} (default)": 2}
+
+
+def test_no_shadow_without_rate(health, policies, monkeypatch):
+    calls = []
+    monkeypatch.setattr(router, "generate_text", _fake_model(calls))
+    monkeypatch.setattr(router.random, "random", lambda: 0.0)
+    asyncio.run(router.generate("prompt", flow="classify_product"))
+    assert calls == [("classify_product", FAST)]
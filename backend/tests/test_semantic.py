@@ -0,0 +1,100 @@
+# backend/tests/test_semantic.py
+import numpy as np
+import pytest
+
+from data_types_class import RecommendationRequest
+from src.lib.catalog import Catalog
+from src.recommendation import semantic
+from src.recommendation.semantic import HashingEmbedder, SemanticIndex, get_index, product_text
+
+PRODUCTS = [
+    {"id": "1", "name": "Blue pottery vase", "price": 1200, "category": "Pottery", "artisan": "Anil",
+     "aiHint": "vase", "region": "Rajasthan", "tags": ["blue", "glazed"]},
+    {"id": "2", "name": "Kalamkari saree", "price": 6400, "category": "Textiles", "artisan": "Lakshmi",
+     "aiHint": "saree", "description": "Hand-painted cotton saree"},
+    {"id": "3", "name": "Terracotta pot", "price": 450, "category": "Pottery", "artisan": "Anil", "aiHint": "pot"},
+    {"id": "4", "name": "Brass diya", "price": 700, "category": "Metalwork", "artisan": "Meera", "aiHint": "lamp",
+     "materials": ["brass"]},
+    {"id": "5", "name": "Ikat silk stole", "price": 1800, "category": "Textiles", "artisan": "Lakshmi",
+     "aiHint": "stole"},
+]
+
+
+def test_product_text_includes_list_fields():
+    assert product_text(PRODUCTS[0]) == "Blue pottery vase Pottery Anil vase  Rajasthan blue glazed"
+
+
+def test_embedder_is_deterministic_and_normalized():
+    texts = [product_text(p) for p in PRODUCTS]
+    first = HashingEmbedder(dim=256).fit(texts).embed(texts + ["", "!!!"])
+    second = HashingEmbedder(dim=256).fit(texts).embed(texts + ["", "!!!"])
+    assert first.dtype == np.float32 and first.shape == (len(texts) + 2, 256)
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(np.linalg.norm(first[:len(texts)], axis=1), 1.0, rtol=1e-5)
+    # Texts without words embed to zero rather than NaN
+    assert not first[len(texts):].any()
+
+
+def test_related_word_forms_share_features():
+    embedder = HashingEmbedder()
+    potter, pottery, saree = embedder.embed(["potter", "pottery", "saree"])
+    assert potter @ pottery > 0.5 > abs(potter @ saree)
+
+
+def _brute_force(index, query, k, mask=None):
+    q = index.embedder.embed([query])[0]
+    scored = [(row, float(index.vectors[row] @ q)) for row in range(len(index))
+              if mask is None or mask[row]]
+    return sorted(scored, key=lambda item: -item[1])[:k]
+
+
+@pytest.mark.parametrize("query", ["blue pottery", "cotton saree", "brass lamp", "anything at all"])
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_search_matches_brute_force(query, k):
+    rng = np.random.default_rng(7)
+    products = [{**PRODUCTS[i % len(PRODUCTS)], "id": str(i), "name": f"{PRODUCTS[i % 5]['name']} {i}"}
+                for i in range(200)]
+    index = SemanticIndex(products)
+    mask = rng.random(len(products)) < 0.5
+    for m in (None, mask):
+        hits = index.search(query, k, m)
+        expected = _brute_force(index, query, k, m)
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected], abs=1e-5)
+        assert {row for row, _ in hits} <= ({r for r in range(len(products)) if m is None or m[r]})
+        assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_search_edge_cases():
+    index = SemanticIndex(PRODUCTS)
+    assert index.search("vase", 0) == []
+    assert SemanticIndex([]).search("vase", 5) == []
+    # Masked-out rows are never returned, even when k exceeds the matches
+    mask = np.array([False, False, True, False, False])
+    assert [row for row, _ in index.search("vase", 5, mask)] == [2]
+    assert index.search("blue pottery vase", 1)[0][0] == 0
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(semantic, "_index_cache", {})
+
+
+def test_get_index_is_cached_and_rebuilt_when_products_change(fresh_cache):
+    products = list(PRODUCTS)
+    index = get_index(products)
+    assert get_index(products) is index
+    products.append({"id": "6", "name": "Sandalwood elephant", "category": "Woodwork", "aiHint": "carving"})
+    rebuilt = get_index(products)
+    assert rebuilt is not index and len(rebuilt) == 6 and rebuilt.vectors.shape[0] == 6
+    assert rebuilt.search("sandalwood elephant", 1)[0][0] == 5
+    # Another list (e.g. a reloaded catalog) gets its own index
+    assert get_index(Catalog(products)) is not rebuilt
+
+
+def test_semantic_recommendations(fresh_cache):
+    req = RecommendationRequest(userPrompt="blue vase", maxResults=2,
+                                userPreferences={"categories": ["Pottery"]})
+    result = semantic.semantic_recommendations(req, PRODUCTS)
+    assert [p["id"] for p in result["products"]] == ["1", "3"]
+    assert all(0 <= p["relevanceScore"] <= 1 for p in result["products"])
+    assert result["categories"] == ["Pottery"]
@@ -0,0 +1,115 @@
+# backend/tests/test_serialization.py
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from data_types_class import RecommendationResponse
+from src.lib.fastjson import FastJSONResponse, FragmentCache, RawJSON, dumps, json_array, splice
+from src.recommendation import serialization
+from src.recommendation.serialization import encode_product, encode_recommendations
+
+
+def _product(pid, **extra):
+    return {"id": pid, "name": f"Product {pid}", "price": 1200, "imageUrl": f"/img/{pid}.jpg", "artisan": "Asha",
+            "category": "Pottery", "aiHint": "vase", **extra}
+
+
+def _result(products, **extra):
+    return {"products": products, "reasoning": "Matched on category", "confidence": 0.8,
+            "categories": ["Pottery"], **extra}
+
+
+@pytest.fixture(autouse=True)
+def fresh_fragments(monkeypatch):
+    monkeypatch.setattr(serialization, "fragments", FragmentCache(100))
+
+
+def _pydantic_body(result) -> bytes:
+    return RecommendationResponse.model_validate(result).model_dump_json().encode("utf-8")
+
+
+@pytest.mark.parametrize("result", [
+    _result([]),
+    _result([_product("1", relevanceScore=0.91), _product("2", relevanceScore=0)]),
+    _result([_product("3", description="Hand-thrown in Khurja — ₹ \"blue\" glaze", tags=["blue", "glazed"],
+                      materials=[], region=None, rating=4.5, availability=True, relevanceScore=1)]),
+    _result([_product("4", price=999.99, extra_field="dropped")], suggestedFilters={
+        "priceRange": {"min": 10, "max": 20}, "categories": ["Pottery"],
+        "counts": {"categories": {"Pottery": 1}}}, interpretedQuery={"colors": ["blue"], "max_price": 2000}),
+])
+def test_matches_pydantic_encoding_byte_for_byte(result):
+    assert encode_recommendations(result, version=1).data == _pydantic_body(result)
+
+
+def test_product_without_score_defaults_to_zero():
+    result = _result([_product("5")])
+    body = encode_recommendations(result, version=1).data
+    assert body == _pydantic_body(result)
+    assert json.loads(body)["products"][0]["relevanceScore"] == 0.0
+
+
+@pytest.mark.parametrize("score", [-0.01, 1.5])
+def test_relevance_score_out_of_range(score):
+    with pytest.raises(ValueError, match="relevanceScore"):
+        encode_product(_product("6", relevanceScore=score), version=1)
+
+
+def test_placeholder_text_inside_fields_is_left_alone():
+    result = _result([_product("7", name="__products__", description='"__products__"')],
+                     reasoning="__products__", categories=["__products__"])
+    body = encode_recommendations(result, version=1).data
+    assert body == _pydantic_body(result)
+    decoded = json.loads(body)
+    assert decoded["reasoning"] == "__products__"
+    assert decoded["products"][0]["name"] == "__products__"
+
+
+def test_fragments_are_reused_until_the_version_changes():
+    product = _product("8", relevanceScore=0.5)
+    encode_recommendations(_result([product]), version=1)
+    renamed = {**product, "name": "Renamed"}
+    # Same version: the cached fragment is served (the catalog version didn't change)
+    assert b"Product 8" in encode_recommendations(_result([renamed]), version=1).data
+    assert b"Renamed" in encode_recommendations(_result([renamed]), version=2).data
+    assert (serialization.fragments.hits, serialization.fragments.misses) == (1, 2)
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(maxsize=2)
+    builds = []
+
+    def build(value):
+        return lambda: builds.append(value) or value
+
+    cache.get("a", 1, build(b"A"))
+    cache.get("b", 1, build(b"B"))
+    cache.get("a", 1, build(b"A2"))  # hit; "b" is now least recent
+    cache.get("c", 1, build(b"C"))
+    assert cache.get("a", 1, build(b"A3")) == b"A"
+    assert cache.get("b", 1, build(b"B2")) == b"B2"
+    assert builds == [b"A", b"B", b"C", b"B2"]
+    assert cache.stats()["size"] == 2
+
+
+def test_fragment_cache_version_invalidation():
+    cache = FragmentCache()
+    assert cache.get("p", "v1", lambda: b"old") == b"old"
+    assert cache.get("p", "v2", lambda: b"new") == b"new"
+    assert cache.get("p", "v2", lambda: b"unused") == b"new"
+    assert cache.stats()["size"] == 1
+
+
+def test_dumps_extra_types():
+    value = {"when": datetime.date(2024, 5, 1), "n": np.float32(0.5), "arr": np.arange(3), "tags": {"x"}}
+    assert json.loads(dumps(value)) == {"when": "2024-05-01", "n": 0.5, "arr": [0, 1, 2], "tags": ["x"]}
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_raw_json_assembly_and_response():
+    body = splice(dumps({"items": "__x__", "note": "__x__"}), dumps("__x__"), json_array([b"1", b'{"a":2}']))
+    assert json.loads(body) == {"items": [1, {"a": 2}], "note": "__x__"}
+    assert FastJSONResponse(RawJSON(body)).body == body
+    assert FastJSONResponse({"a": [1, 2]}).body == b'{"a":[1,2]}'
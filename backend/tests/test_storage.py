@@ -0,0 +1,89 @@
+# backend/tests/test_storage.py
+import asyncio
+
+import pytest
+
+from src.lib import blobstore, storage
+from src.lib.storage import LocalStorage, MemoryStorage, get_storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_blob_stores(monkeypatch):
+    monkeypatch.setattr(blobstore, "_stores", {})
+    monkeypatch.setattr(blobstore, "_ref_source", None)
+
+
+@pytest.fixture(params=["local", "memory"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path / "ar_models"), "/ar_models")
+    return MemoryStorage(url_base="memory://ar_models/")
+
+
+def test_upload_exists_download(backend, tmp_path):
+    source = tmp_path / "model.glb"
+    source.write_bytes(b"glTF model")
+    target = tmp_path / "copy.glb"
+
+    async def run():
+        assert not backend.exists("p1.glb")
+        await backend.upload_file("p1.glb", str(source), "model/gltf-binary", "public, max-age=60")
+        await backend.upload_bytes("p1_512.glb", b"small", "model/gltf-binary")
+        await backend.download_file("p1.glb", str(target))
+
+    asyncio.run(run())
+    assert backend.exists("p1.glb") and backend.exists("p1_512.glb")
+    assert target.read_bytes() == b"glTF model"
+
+
+def test_download_missing_raises_file_not_found(backend, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(backend.download_file("missing.glb", str(tmp_path / "out.glb")))
+
+
+def test_overwrite_and_delete(backend, tmp_path):
+    backend.put_bytes("p1.glb", b"v1", "model/gltf-binary")
+    backend.put_bytes("p1.glb", b"v2", "model/gltf-binary")
+    backend.get_file("p1.glb", str(tmp_path / "out.glb"))
+    assert (tmp_path / "out.glb").read_bytes() == b"v2"
+    backend.delete("p1.glb")
+    assert not backend.exists("p1.glb")
+    backend.delete("p1.glb")  # deleting a missing key is not an error
+
+
+def test_public_urls(tmp_path):
+    local = LocalStorage(str(tmp_path / "ar_models"), "/ar_models/")
+    assert local.public_url("p1.glb", "http://api") == "http://api/ar_models/p1.glb"
+    assert local.public_url("p1.glb") == "/ar_models/p1.glb"
+    assert MemoryStorage("memory://ar_models/").public_url("p1.glb", "http://api") == "memory://ar_models/p1.glb"
+
+
+def test_local_storage_records_refs(tmp_path):
+    local = LocalStorage(str(tmp_path / "ar_models"), "/ar_models")
+    local.put_bytes("p1.glb", b"glb", "model/gltf-binary")
+    local.add_ref("p1", "p1.glb")
+    local.add_ref("p1", "p1.glb")
+    local.add_ref("p2", "p1.glb")
+    assert sorted(local.store.refs("p1.glb")) == ["p1", "p2"]
+    assert local.store.stat("p1.glb")["content_type"] == "model/gltf-binary"
+
+
+def test_memory_storage_keeps_upload_metadata():
+    memory = MemoryStorage()
+    memory.put_bytes("a.glb", bytearray(b"x"), "model/gltf-binary", "no-cache", public=False)
+    memory.add_ref("p1", "a.glb")  # no garbage collection, so refs are ignored
+    assert memory.objects["a.glb"] == (b"x", "model/gltf-binary", "no-cache", False)
+
+
+@pytest.mark.parametrize("setting, bucket, kind", [
+    ("", None, LocalStorage),
+    ("memory", object(), MemoryStorage),
+    ("local", object(), LocalStorage),
+])
+def test_get_storage_selects_backend(monkeypatch, tmp_path, setting, bucket, kind):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", setting)
+    monkeypatch.setattr(storage, "_storages", {})
+    chosen = get_storage("ar_models", bucket, str(tmp_path / "ar_models"))
+    assert isinstance(chosen, kind)
+    assert get_storage("ar_models", bucket) is chosen
+    assert chosen.public_url("p.glb", "http://api") in ("http://api/ar_models/p.glb", "memory://ar_models/p.glb")
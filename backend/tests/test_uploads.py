@@ -0,0 +1,135 @@
+# backend/tests/test_uploads.py
+import io
+import os
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.lib import uploads
+from src.lib.blobstore import BlobStore
+from src.lib.uploads import normalize_image, sign_local, verify_local
+
+NAME = "0123abcd.png"
+
+
+def _signed(name=NAME, content_type="image/png", ttl=60, max_bytes=1000):
+    expires = int(time.time()) + ttl
+    return name, content_type, expires, max_bytes, sign_local(name, content_type, expires, max_bytes)
+
+
+def test_verify_accepts_a_valid_signature():
+    verify_local(*_signed())
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda n, c, e, m, s: (n, c, e, m, s[:-1] + ("0" if s[-1] != "0" else "1")),
+    lambda n, c, e, m, s: (n, c, e, m * 10, s),        # raised size limit
+    lambda n, c, e, m, s: (n, c, e + 3600, m, s),      # extended expiry
+    lambda n, c, e, m, s: (n, "image/gif", e, m, s),   # other content type
+    lambda n, c, e, m, s: ("0123abce.png", c, e, m, s),
+])
+def test_verify_rejects_tampered_urls(tamper):
+    with pytest.raises(HTTPException) as exc:
+        verify_local(*tamper(*_signed()))
+    assert exc.value.status_code == 403 and "signature" in exc.value.detail
+
+
+def test_verify_rejects_expired_urls():
+    with pytest.raises(HTTPException) as exc:
+        verify_local(*_signed(ttl=-1))
+    assert exc.value.status_code == 403 and "expired" in exc.value.detail
+
+
+@pytest.mark.parametrize("name", ["../etc.png", "0123abcd.exe", ".png", "ABCD.png", "0123/ab.png", "0123abcd"])
+def test_verify_rejects_bad_names(name):
+    with pytest.raises(HTTPException) as exc:
+        verify_local(*_signed(name=name))
+    assert exc.value.status_code == 400
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "uploads"), "/uploads")
+    monkeypatch.setattr(uploads, "upload_store", lambda: store)
+    monkeypatch.setattr(uploads, "UPLOAD_WRITE_BYTES", 256)
+    app = FastAPI()
+
+    @app.put("/direct_upload/{filename}")
+    async def direct_upload(filename: str, request: Request, max_bytes: int):
+        return {"size": await uploads.receive_local(request, filename, max_bytes)}
+
+    client = TestClient(app)
+    client.store = store
+    return client
+
+
+def _chunks(total: int, size: int = 100):
+    for start in range(0, total, size):
+        yield bytes([start % 251]) * min(size, total - start)
+
+
+def test_receive_streams_body_into_store(client):
+    body = b"".join(_chunks(1050))
+    response = client.put(f"/direct_upload/{NAME}", params={"max_bytes": 2000}, content=_chunks(1050),
+                          headers={"Content-Type": "image/png"})
+    assert response.json() == {"size": 1050}
+    with open(client.store.resolve(NAME), "rb") as f:
+        assert f.read() == body
+    assert client.store.stat(NAME)["content_type"] == "image/png"
+    assert os.listdir(client.store.tmp_dir) == []
+
+
+def test_receive_rejects_streamed_body_over_limit(client):
+    # No Content-Length up front: the limit is enforced while streaming
+    response = client.put(f"/direct_upload/{NAME}", params={"max_bytes": 500}, content=_chunks(1050))
+    assert response.status_code == 413
+    assert client.store.resolve(NAME, touch=False) is None
+    assert os.listdir(client.store.tmp_dir) == []
+
+
+def test_receive_rejects_declared_length_over_limit(client):
+    response = client.put(f"/direct_upload/{NAME}", params={"max_bytes": 10}, content=b"x" * 11)
+    assert response.status_code == 413
+
+
+def _jpeg_with_orientation(path, size, orientation):
+    img = Image.new("RGB", size, "white")
+    img.paste((200, 0, 0), (0, 0, size[0] // 2, size[1]))  # left half red
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    img.save(path, format="JPEG", exif=exif)
+
+
+def test_normalize_applies_exif_orientation(tmp_path):
+    src, dst = tmp_path / "in.jpg", tmp_path / "out.jpg"
+    _jpeg_with_orientation(src, (400, 200), 6)  # stored landscape, displayed rotated 90° clockwise
+    assert normalize_image(str(src), str(dst), "image/jpeg")
+    with Image.open(dst) as out:
+        assert out.size == (200, 400)
+        assert 0x0112 not in out.getexif()
+        # The red left half is on top after the rotation
+        assert out.getpixel((100, 50))[0] > 150 and out.getpixel((100, 350))[1] > 150
+
+
+def test_normalize_downscales_large_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_MAX_DIMENSION", 256)
+    src, dst = tmp_path / "in.png", tmp_path / "out.png"
+    Image.new("RGBA", (1024, 512), (0, 0, 255, 128)).save(src)
+    assert normalize_image(str(src), str(dst), "image/png")
+    with Image.open(dst) as out:
+        assert out.size == (256, 128) and out.mode == "RGBA"
+    # Smaller images are never enlarged
+    Image.new("RGB", (100, 50)).save(src)
+    normalize_image(str(src), str(dst), "image/png")
+    with Image.open(dst) as out:
+        assert out.size == (100, 50)
+
+
+def test_normalize_keeps_animated_gifs(tmp_path):
+    src = tmp_path / "in.gif"
+    frames = [Image.new("RGB", (10, 10), color) for color in ("red", "blue")]
+    frames[0].save(src, save_all=True, append_images=frames[1:], duration=100)
+    assert normalize_image(str(src), str(tmp_path / "out.gif"), "image/gif") is False